@@ -10,6 +10,8 @@ from slide_library.core import (
     SlidePlannerAgent,
     SlideRetrievalService,
     SlideStorageAdapter,
+    SlideReconciler,
+    LibrarySnapshot,
     PresentationProcessor,
     process_presentation_flow,
 )
@@ -24,6 +26,9 @@ from slide_library.utils.schemas import (
     SlideLibraryMetadata,
     SlideMetadata,
     StorageReference,
+    PackagePart,
+    SlideReasoning,
+    SlideStorageItem,
     PresentationPlan,
     SlideOutlineItem,
     SlideRetrievalResult,
@@ -45,6 +50,8 @@ __all__ = [
     "SlidePlannerAgent",
     "SlideRetrievalService",
     "SlideStorageAdapter",
+    "SlideReconciler",
+    "LibrarySnapshot",
     "PresentationProcessor",
     "process_presentation_flow",
     # Orchestrators
@@ -53,6 +60,9 @@ __all__ = [
     "SlideLibraryMetadata",
     "SlideMetadata",
     "StorageReference",
+    "PackagePart",
+    "SlideReasoning",
+    "SlideStorageItem",
     "PresentationPlan",
     "SlideOutlineItem",
     "SlideRetrievalResult",
@@ -1,26 +1,55 @@
 # uvicorn api:app --reload --host 0.0.0.0 --port 8000
 
-from fastapi import BackgroundTasks, FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import BackgroundTasks, FastAPI, UploadFile, File, HTTPException, Form, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from botocore.exceptions import ClientError
 from pydantic import BaseModel
-from utils.schemas import SlideLibraryMetadata
+import asyncio
+import json
 import os
 import tempfile
 from pathlib import Path
+from urllib.parse import quote
 
 from orchestrator import SlideLibraryOrchestrator
+from core.reconciliation import SlideReconciler
+from storage.s3 import PRESIGNED_URL_EXPIRY, STREAM_CHUNK_SIZE
+from core.popularity import POPULARITY_FLUSH_SECONDS, PREWARM_TOP_N
+from models.vertex import get_vertex_client_manager
+from models.scheduler import get_model_scheduler
+from models.response_cache import get_response_cache
+from models.routing import get_stage_router
+from models.context_cache import get_context_cache_manager
+from models.hedging import get_hedge_policy
 
 
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+# Previews are stored under their content hash, so a given key never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# "proxy" streams previews through the API, "redirect" hands out presigned S3 URLs
+PREVIEW_DELIVERY = os.getenv("PREVIEW_DELIVERY", "proxy").lower()
+
+# Background reconciliation of partial writes; 0 disables the sweeper
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("RECONCILE_INTERVAL_SECONDS", "0"))
+
 app = FastAPI(title="Slide Agent API", version="0.1.0")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Accept-Ranges", "Cache-Control", "Content-Length", "Content-Range", "ETag"],
 )
 
 orchestrator = SlideLibraryOrchestrator()
+_background_tasks: list[asyncio.Task] = []
+
+# Set once startup prewarming has finished (or failed); gates /ready
+_ready = asyncio.Event()
 
 
 async def _ensure_storage():
@@ -28,6 +57,14 @@ async def _ensure_storage():
     await orchestrator._ensure_initialized()  # noqa: SLF001
 
 
+async def _tenant(tenant_id: str | None) -> SlideLibraryOrchestrator:
+    # Resolve the tenant named by the X-Tenant-ID header (None = shared library)
+    try:
+        return await orchestrator.for_tenant(tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+
 class SearchRequest(BaseModel):
     query: str
     limit: int = 5
@@ -53,6 +90,152 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready():
+    # Readiness waits for popular slides to be preloaded into local caches
+    if not _ready.is_set():
+        return Response(status_code=503, content='{"status": "warming"}', media_type="application/json")
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def metrics(x_tenant_id: str | None = Header(default=None)):
+    tenant = await _tenant(x_tenant_id)
+    return {
+        "metadata_cache": tenant.storage.cache_stats(),  # type: ignore[attr-defined]
+        "popularity": tenant.storage.popularity.stats(),  # type: ignore[attr-defined]
+        "vertex_clients": get_vertex_client_manager().stats(),
+        "llm_scheduler": get_model_scheduler().stats(),
+        "llm_cache": get_response_cache().stats(),
+        "llm_routing": get_stage_router().stats(),
+        "llm_context_cache": get_context_cache_manager().stats(),
+        "llm_hedging": get_hedge_policy().stats(),
+    }
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def _single_byte_range(request: Request) -> str | None:
+    # S3 only honours a single byte range; anything else is served in full
+    range_header = request.headers.get("range")
+    if not range_header:
+        return None
+    range_header = range_header.strip()
+    if not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    return range_header
+
+
+async def _stream_s3_object(
+    request: Request,
+    s3_key: str,
+    media_type: str,
+    filename: str,
+    extra_headers: dict[str, str] | None = None,
+) -> StreamingResponse:
+    """Stream an S3 object to the client in chunks, honouring Range requests."""
+    byte_range = _single_byte_range(request)
+    try:
+        obj = await orchestrator.storage.s3.open_object_stream(s3_key, byte_range=byte_range)  # type: ignore[attr-defined]
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code", "")
+        if code == "InvalidRange":
+            raise HTTPException(status_code=416, detail="Requested range not satisfiable") from None
+        if code in ("NoSuchKey", "404"):
+            raise HTTPException(status_code=404, detail="Object not found in storage") from None
+        raise
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+    }
+    if obj["content_length"] is not None:
+        headers["Content-Length"] = str(obj["content_length"])
+    if obj["etag"]:
+        headers["ETag"] = obj["etag"]
+    if obj["last_modified"]:
+        headers["Last-Modified"] = obj["last_modified"].strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+    if extra_headers:
+        headers.update(extra_headers)
+
+    status_code = 200
+    if byte_range and obj["content_range"]:
+        headers["Content-Range"] = obj["content_range"]
+        status_code = 206
+
+    return StreamingResponse(
+        obj["body"],
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def _stream_local_file(
+    request: Request,
+    path: Path,
+    media_type: str,
+    filename: str,
+    remove: bool = False,
+) -> StreamingResponse:
+    """Stream a local file in chunks, honouring Range requests; remove=True deletes it once sent."""
+    size = path.stat().st_size
+    start, end = 0, size - 1
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+    }
+
+    status_code = 200
+    byte_range = _single_byte_range(request)
+    if byte_range:
+        first, _, last = byte_range.removeprefix("bytes=").partition("-")
+        if first.isdigit():
+            start = int(first)
+            end = min(int(last), size - 1) if last.isdigit() else size - 1
+        elif last.isdigit():
+            start = max(0, size - int(last))
+        if start >= size or start > end:
+            if remove:
+                os.remove(path)
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        status_code = 206
+    headers["Content-Length"] = str(end - start + 1)
+
+    async def body():
+        remaining = end - start + 1
+        with open(path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+        background=BackgroundTask(os.remove, path) if remove else None,
+    )
+
+
 async def _save_upload(file: UploadFile, suffix: str = "") -> str:
     if not file.filename:
         raise HTTPException(status_code=400, detail="Missing filename")
@@ -67,21 +250,23 @@ async def _save_upload(file: UploadFile, suffix: str = "") -> str:
 
 
 @app.post("/slides/ingest")
-async def ingest_slide(file: UploadFile = File(...)):
+async def ingest_slide(file: UploadFile = File(...), x_tenant_id: str | None = Header(default=None)):
     if not file.filename.lower().endswith(".pptx"):
         raise HTTPException(status_code=400, detail="Only .pptx files are supported")
 
     temp_path = await _save_upload(file, suffix=".pptx")
     try:
-        slides = await orchestrator.execute(mode="ingest", pptx_path=temp_path)
+        tenant = await _tenant(x_tenant_id)
+        slides = await tenant.execute(mode="ingest", pptx_path=temp_path)
         return {"count": len(slides), "slides": [s.model_dump() for s in slides]}
     finally:
         os.remove(temp_path)
 
 
 @app.post("/slides/search")
-async def search_slides(payload: SearchRequest):
-    results = await orchestrator.execute(
+async def search_slides(payload: SearchRequest, x_tenant_id: str | None = Header(default=None)):
+    tenant = await _tenant(x_tenant_id)
+    results = await tenant.execute(
         mode="search",
         query=payload.query,
         limit=1,
@@ -98,88 +283,134 @@ async def search_slides(payload: SearchRequest):
 
 
 @app.get("/slides")
-async def list_slides(skip: int = 0, limit: int = 50):
-    await _ensure_storage()
-    limit = max(1, min(limit, 200))
+async def list_slides(
+    limit: int = 50,
+    cursor: str | None = None,
+    fields: str | None = None,
+    x_tenant_id: str | None = Header(default=None),
+):
+    tenant = await _tenant(x_tenant_id)
 
-    collection = orchestrator.storage.mongo.get_collection(  # type: ignore[attr-defined]
-        orchestrator.storage.collection_name,  # type: ignore[attr-defined]
-        orchestrator.storage.database_name,  # type: ignore[attr-defined]
-    )
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        items, next_cursor = await tenant.storage.list_slides(  # type: ignore[attr-defined]
+            limit=limit,
+            cursor=cursor,
+            fields=field_list,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
 
-    cursor = (
-        collection.find({}, sort=[("updated_at", -1)])
-        .skip(skip)
-        .limit(limit)
-    )
-    docs = await cursor.to_list(length=limit)
+    return {"count": len(items), "items": items, "next_cursor": next_cursor}
 
-    # Normalize Mongo ObjectIds and ensure JSON-safe payloads
-    items = []
-    for doc in docs:
-        doc.pop("_id", None)
-        try:
-            items.append(SlideLibraryMetadata(**doc).model_dump())
-        except Exception:
-            # Fallback: best-effort serialization
-            doc["slide_id"] = str(doc.get("slide_id") or doc.get("id") or "")
-            items.append(doc)
 
-    return {"count": len(items), "items": items}
+@app.get("/slides/{slide_id}/download")
+async def download_slide(
+    slide_id: str,
+    request: Request,
+    tenant: str | None = None,
+    x_tenant_id: str | None = Header(default=None),
+):
+    # Links followed by the browser cannot set headers, so ?tenant= is accepted too
+    storage = (await _tenant(x_tenant_id or tenant)).storage
+    metadata = await storage.get_slide_metadata(slide_id)  # type: ignore[attr-defined]
+    if not metadata:
+        raise HTTPException(status_code=404, detail="Slide not found")
 
+    storage.popularity.record([slide_id], "downloads")  # type: ignore[attr-defined]
 
-@app.get("/slides/{slide_id}/download")
-async def download_slide(slide_id: str):
-    await _ensure_storage()
-    try:
-        metadata, local_path = await orchestrator.storage.get_slide_by_id(slide_id)  # type: ignore[attr-defined]
-    except ValueError:
-        raise HTTPException(status_code=404, detail="Slide not found") from None
+    # Prewarmed slide files are served from the local object cache
+    cached = storage.cached_object(metadata.storage_ref.s3_key) if metadata.storage_ref.s3_key else None  # type: ignore[attr-defined]
+    if cached:
+        return FileResponse(
+            cached,
+            media_type=PPTX_MEDIA_TYPE,
+            filename=storage.get_download_filename(metadata),  # type: ignore[attr-defined]
+        )
 
-    background = BackgroundTasks()
-    background.add_task(Path(local_path).unlink, missing_ok=True)
+    # Part-stored slides have no single object to stream: reassemble into a
+    # per-request temp file, removed once the response has been sent
+    if metadata.storage_ref.parts:
+        fd, temp_path = tempfile.mkstemp(suffix=".pptx")
+        os.close(fd)
+        try:
+            await storage.materialize_package(metadata, Path(temp_path))  # type: ignore[attr-defined]
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return _stream_local_file(
+            request,
+            Path(temp_path),
+            media_type=PPTX_MEDIA_TYPE,
+            filename=storage.get_download_filename(metadata),  # type: ignore[attr-defined]
+            remove=True,
+        )
 
-    return FileResponse(
-        path=local_path,
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-        filename=orchestrator.storage.get_download_filename(metadata),  # type: ignore[attr-defined]
-        background=background,
+    return await _stream_s3_object(
+        request,
+        metadata.storage_ref.s3_key,
+        media_type=PPTX_MEDIA_TYPE,
+        filename=storage.get_download_filename(metadata),  # type: ignore[attr-defined]
     )
 
 
 @app.get("/slides/{slide_id}/preview")
-async def download_preview(slide_id: str):
-    await _ensure_storage()
-
-    doc = await orchestrator.storage.mongo.read(  # type: ignore[attr-defined]
-        collection_name=orchestrator.storage.collection_name,  # type: ignore[attr-defined]
-        query={"slide_id": slide_id},
-        database_name=orchestrator.storage.database_name,  # type: ignore[attr-defined]
-    )
-    if not doc:
+async def download_preview(
+    slide_id: str,
+    request: Request,
+    redirect: bool | None = None,
+    tenant: str | None = None,
+    x_tenant_id: str | None = Header(default=None),
+):
+    storage = (await _tenant(x_tenant_id or tenant)).storage
+    metadata = await storage.get_slide_metadata(slide_id)  # type: ignore[attr-defined]
+    if not metadata:
         raise HTTPException(status_code=404, detail="Slide not found")
 
-    preview_key = doc.get("preview")
-    if not preview_key:
+    if not metadata.preview:
         raise HTTPException(status_code=404, detail="No preview available")
 
-    local_path = Path(f"temp/previews/{Path(preview_key).name or slide_id}.png")
-    await orchestrator.storage.s3.download_file(preview_key, local_path)  # type: ignore[attr-defined]
-
-    background = BackgroundTasks()
-    background.add_task(local_path.unlink, missing_ok=True)
-
-    return FileResponse(
-        path=local_path,
+    # The preview key is the SHA256 of the image, which makes it a strong validator
+    etag = f'"{metadata.preview}"'
+    cache_headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    # Prewarmed previews are served from the local object cache
+    cached = storage.cached_object(metadata.preview)  # type: ignore[attr-defined]
+    if cached:
+        return FileResponse(cached, media_type="image/png", headers=cache_headers)
+
+    if redirect is None:
+        redirect = PREVIEW_DELIVERY == "redirect"
+
+    if redirect:
+        s3 = storage.s3  # type: ignore[attr-defined]
+        url = await s3.generate_presigned_url(metadata.preview, content_type="image/png")
+        # Backends that cannot presign (local storage) fall through to streaming
+        if url:
+            # Cache the redirect for less than the URL lifetime so clients never follow an expired link
+            max_age = max(0, PRESIGNED_URL_EXPIRY - 60)
+            return RedirectResponse(
+                url,
+                status_code=307,
+                headers={"Cache-Control": f"private, max-age={max_age}"},
+            )
+
+    return await _stream_s3_object(
+        request,
+        metadata.preview,
         media_type="image/png",
         filename=f"{slide_id}.png",
-        background=background,
+        extra_headers=cache_headers,
     )
 
 
 @app.post("/generation/compose")
-async def compose(payload: ComposeRequest):
-    result = await orchestrator.execute(
+async def compose(payload: ComposeRequest, x_tenant_id: str | None = Header(default=None)):
+    tenant = await _tenant(x_tenant_id)
+    result = await tenant.execute(
         mode="compose",
         user_context=payload.user_context,
         user_prompt=payload.user_prompt,
@@ -216,6 +447,64 @@ async def generate(
         os.remove(temp_path)
 
 
+def _sse(events, background: BackgroundTask | None = None) -> StreamingResponse:
+    # Server-sent events: one JSON object per progress event; a failure ends
+    # the stream with an "error" event since the status line is already sent
+    async def body():
+        try:
+            async for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'event': 'error', 'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background,
+    )
+
+
+@app.post("/generation/compose/stream")
+async def compose_stream(payload: ComposeRequest, x_tenant_id: str | None = Header(default=None)):
+    tenant = await _tenant(x_tenant_id)
+    return _sse(tenant.stream(
+        mode="compose",
+        user_context=payload.user_context,
+        user_prompt=payload.user_prompt,
+        output_dir=payload.output_dir,
+        num_slides=payload.num_slides,
+    ))
+
+
+@app.post("/generation/generate/stream")
+async def generate_stream(
+    payload: str = Form(...),
+    template: UploadFile = File(...),
+):
+    if not template.filename.lower().endswith(".pptx"):
+        raise HTTPException(status_code=400, detail="Template must be a .pptx file")
+
+    temp_path = await _save_upload(template, suffix=".pptx")
+    try:
+        payload_data = GenerateRequest.model_validate_json(payload)
+    except Exception:
+        os.remove(temp_path)
+        raise HTTPException(status_code=422, detail="Invalid payload JSON") from None
+
+    # The upload is removed after the response, even if the body never ran
+    return _sse(
+        orchestrator.stream(
+            mode="generate",
+            pptx_path=temp_path,
+            user_input=payload_data.user_input,
+            documents=payload_data.documents,
+            output_dir=payload_data.output_dir,
+        ),
+        background=BackgroundTask(os.remove, temp_path),
+    )
+
+
 @app.get("/files")
 async def download_file(path: str):
     # Serve files only from within the project directory (e.g., output/)
@@ -234,7 +523,41 @@ async def download_file(path: str):
     )
 
 
+async def _prewarm():
+    try:
+        await _ensure_storage()
+        await orchestrator.storage.popularity.prewarm(PREWARM_TOP_N)  # type: ignore[attr-defined]
+    except Exception as e:
+        # A cold cache is slower, not broken: report ready anyway
+        print(f"Cache prewarming failed: {e}")
+    finally:
+        _ready.set()
+
+
+@app.on_event("startup")
+async def startup_event():
+    if RECONCILE_INTERVAL_SECONDS > 0:
+        await _ensure_storage()
+        reconciler = SlideReconciler(orchestrator.storage)  # type: ignore[arg-type]
+        _background_tasks.append(
+            asyncio.create_task(reconciler.run_periodically(RECONCILE_INTERVAL_SECONDS))
+        )
+
+    if PREWARM_TOP_N > 0:
+        _background_tasks.append(asyncio.create_task(_prewarm()))
+    else:
+        _ready.set()
+
+    if POPULARITY_FLUSH_SECONDS > 0:
+        _background_tasks.append(
+            asyncio.create_task(orchestrator.run_popularity_flush(POPULARITY_FLUSH_SECONDS))
+        )
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
     await orchestrator.close()
 
@@ -0,0 +1,106 @@
+"""
+Prompt Packing Benchmark
+
+Runs the content reasoning pass over every slide of a presentation twice,
+once with one call per slide and once packed, and compares wall time,
+request count, estimated tokens and how many slides got complete reasoning.
+The LLM response cache is bypassed so both runs hit the model.
+
+Estimated tokens are prompt/response characters / 4; each request also
+carries a thinking budget of up to 8192 tokens, which packing amortizes.
+
+Usage:
+    python benchmark_packing.py input/input_1.pptx                    # compare both modes
+    python benchmark_packing.py input/input_1.pptx --max-slides 4     # smaller batches
+    python benchmark_packing.py input/input_1.pptx --max-tokens 12000 # larger batches
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv(override=True)
+
+from core.packing import PACKED_PROMPT_MAX_SLIDES, PACKED_PROMPT_MAX_TOKENS
+from core.slide_generation import content_reasoning_packer, generate_content_reasoning, reasoning_covers_slide
+from models.response_cache import get_response_cache
+from models.scheduler import estimate_tokens
+from prompts import CONTENT_REASONING_PROMPT
+from utils.utils import export_slide_structure, normalize_presentation
+
+
+async def run_single(slides: list) -> dict:
+    """Reasoning with one call per slide."""
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(generate_content_reasoning(slide) for slide in slides))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(slides),
+        "seconds": round(elapsed, 2),
+        "input_tokens": sum(
+            estimate_tokens(CONTENT_REASONING_PROMPT, json.dumps(slide, indent=2, ensure_ascii=False))
+            for slide in slides
+        ),
+        "output_tokens": sum(estimate_tokens(response.model_dump_json()) for response in responses),
+        "complete_slides": sum(
+            reasoning_covers_slide(response.model_dump(), slide)
+            for response, slide in zip(responses, slides)
+        ),
+    }
+
+
+async def run_packed(slides: list, max_tokens: int, max_slides: int) -> dict:
+    """Reasoning with packed requests."""
+    packer = content_reasoning_packer(max_tokens=max_tokens, max_slides=max_slides)
+    results = await packer.run(slides)
+    stats = packer.stats()
+
+    return {
+        "requests": stats["calls"],
+        "seconds": stats["elapsed_seconds"],
+        "input_tokens": stats["input_tokens"],
+        "output_tokens": stats["output_tokens"],
+        "complete_slides": sum(
+            slide["slide"] in results and reasoning_covers_slide(results[slide["slide"]], slide)
+            for slide in slides
+        ),
+        "splits": stats["splits"],
+        "fallbacks": stats["fallbacks"],
+    }
+
+
+async def main(pptx_path: str, max_tokens: int, max_slides: int):
+    """Compare one-call-per-slide and packed reasoning."""
+    get_response_cache().mode = "off"
+
+    _, content_mapping = normalize_presentation(pptx_path)
+    slides = export_slide_structure(content_mapping)
+    print(f"Benchmarking reasoning for {len(slides)} slides")
+
+    single = await run_single(slides)
+    packed = await run_packed(slides, max_tokens, max_slides)
+
+    print("\n" + "=" * 60)
+    print(f"{'':<18}{'single':>14}{'packed':>14}")
+    for metric in ("requests", "seconds", "input_tokens", "output_tokens", "complete_slides"):
+        print(f"{metric:<18}{single[metric]:>14}{packed[metric]:>14}")
+    print(f"{'splits':<18}{'-':>14}{packed['splits']:>14}")
+    print(f"{'fallbacks':<18}{'-':>14}{packed['fallbacks']:>14}")
+    if single["seconds"]:
+        print(f"\nLatency ratio (packed/single): {packed['seconds'] / single['seconds']:.2f}")
+    if single["requests"]:
+        print(f"Request ratio (packed/single): {packed['requests'] / single['requests']:.2f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare packed and one-call-per-slide reasoning")
+    parser.add_argument("pptx", help="Presentation to analyze")
+    parser.add_argument("--max-tokens", type=int, default=PACKED_PROMPT_MAX_TOKENS, help="Estimated input tokens per packed request")
+    parser.add_argument("--max-slides", type=int, default=PACKED_PROMPT_MAX_SLIDES, help="Maximum slides per packed request")
+    args = parser.parse_args()
+    asyncio.run(main(args.pptx, args.max_tokens, args.max_slides))
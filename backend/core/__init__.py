@@ -8,6 +8,8 @@ from .ingestion import SlideIngestionService
 from .planner import SlidePlannerAgent
 from .retrieval import SlideRetrievalService
 from .storage import SlideStorageAdapter
+from .reconciliation import SlideReconciler
+from .snapshot import LibrarySnapshot
 from .slide_generation import PresentationProcessor, process_presentation_flow
 
 __all__ = [
@@ -15,6 +17,8 @@ __all__ = [
     "SlidePlannerAgent",
     "SlideRetrievalService",
     "SlideStorageAdapter",
+    "SlideReconciler",
+    "LibrarySnapshot",
     "PresentationProcessor",
     "process_presentation_flow",
 ]
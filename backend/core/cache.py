@@ -0,0 +1,126 @@
+"""
+Slide Library Caches
+
+In-process caches for hot slide library data.
+
+SlideMetadataCache holds SlideLibraryMetadata keyed by slide_id with a
+secondary file_hash index. It is invalidated by the storage adapter's own
+write paths and, for writes made by other workers, by a version counter the
+adapter polls from MongoDB.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from utils.schemas import SlideLibraryMetadata
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of metadata documents held in memory
+METADATA_CACHE_SIZE = int(os.getenv("SLIDE_METADATA_CACHE_SIZE", "4096"))
+
+# How often the shared library version counter is polled (seconds)
+CACHE_VERSION_POLL_SECONDS = float(os.getenv("SLIDE_CACHE_VERSION_POLL_SECONDS", "2"))
+
+
+class SlideMetadataCache:
+    """
+    Bounded LRU cache of slide metadata.
+
+    Entries are keyed by slide_id; file_hash lookups go through a secondary
+    index. Callers receive copies, so mutating a returned model never
+    corrupts the cache.
+    """
+
+    def __init__(self, max_entries: int = METADATA_CACHE_SIZE):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum number of cached documents
+        """
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self._entries: "OrderedDict[str, SlideLibraryMetadata]" = OrderedDict()
+        self._by_hash: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.clears = 0
+
+    def get_by_id(self, slide_id: str) -> Optional[SlideLibraryMetadata]:
+        """Return cached metadata for a slide id, or None on a miss."""
+        with self._lock:
+            metadata = self._entries.get(slide_id)
+            if metadata is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(slide_id)
+            self.hits += 1
+            return metadata.model_copy(deep=True)
+
+    def get_by_hash(self, file_hash: str) -> Optional[SlideLibraryMetadata]:
+        """Return cached metadata for a file hash, or None on a miss."""
+        with self._lock:
+            slide_id = self._by_hash.get(file_hash)
+            metadata = self._entries.get(slide_id) if slide_id else None
+            if metadata is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(slide_id)
+            self.hits += 1
+            return metadata.model_copy(deep=True)
+
+    def put(self, metadata: SlideLibraryMetadata):
+        """Insert or refresh an entry, evicting the least recently used."""
+        with self._lock:
+            self._remove(metadata.slide_id)
+            self._entries[metadata.slide_id] = metadata.model_copy(deep=True)
+            if metadata.file_hash:
+                self._by_hash[metadata.file_hash] = metadata.slide_id
+
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._by_hash.pop(evicted.file_hash, None)
+
+    def invalidate(self, slide_id: Optional[str] = None, file_hash: Optional[str] = None):
+        """Drop the entry for a slide id and/or file hash."""
+        with self._lock:
+            if file_hash and not slide_id:
+                slide_id = self._by_hash.get(file_hash)
+            if slide_id and self._remove(slide_id):
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._by_hash.clear()
+            self.clears += 1
+
+    def _remove(self, slide_id: str) -> bool:
+        metadata = self._entries.pop(slide_id, None)
+        if metadata is None:
+            return False
+        if self._by_hash.get(metadata.file_hash) == slide_id:
+            del self._by_hash[metadata.file_hash]
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Report size and hit ratio."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "clears": self.clears,
+            "version": self.version,
+        }
@@ -0,0 +1,221 @@
+"""
+Per-Slide Document Context Selection
+
+Content generation used to send every reference document to every slide.
+DocumentIndex chunks the documents once per job and indexes the chunks
+with BM25 in memory; each slide then receives only the chunks most
+relevant to its description, element descriptions and plan guidelines,
+up to a token budget. Chunks are returned in document order so the
+selected passages keep their original reading order.
+
+Documents that fit in the budget are sent whole, as before. Disable
+selection with SLIDE_CONTEXT_SELECTION=false.
+"""
+
+import logging
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from models.scheduler import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Select relevant document chunks per slide instead of sending all documents
+SELECT_SLIDE_CONTEXT = os.getenv("SLIDE_CONTEXT_SELECTION", "true").lower() == "true"
+
+# Estimated document tokens sent per slide, and target size of one chunk
+CONTEXT_TOKEN_BUDGET = int(os.getenv("SLIDE_CONTEXT_TOKEN_BUDGET", "4000"))
+CONTEXT_CHUNK_TOKENS = int(os.getenv("SLIDE_CONTEXT_CHUNK_TOKENS", "300"))
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Marks skipped text between selected chunks
+GAP_MARKER = "[...]"
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?。])\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens for lexical matching."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass
+class DocumentChunk:
+    """One passage of the documents."""
+    index: int
+    text: str
+    tokens: int
+
+
+def chunk_documents(documents: str, chunk_tokens: int = CONTEXT_CHUNK_TOKENS) -> List[DocumentChunk]:
+    """
+    Split documents into passages of about chunk_tokens.
+
+    Paragraphs (blank-line separated) are kept together and merged up to the
+    target size; a longer paragraph is split on sentences, and a longer
+    sentence on a hard character window.
+
+    Args:
+        documents: Reference documents
+        chunk_tokens: Target estimated tokens per chunk
+
+    Returns:
+        Chunks in document order
+    """
+    max_chars = max(1, chunk_tokens) * 4
+
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", documents):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_PATTERN.split(paragraph):
+            for start in range(0, len(sentence), max_chars):
+                pieces.append(sentence[start:start + max_chars])
+
+    chunks: List[DocumentChunk] = []
+    current: List[str] = []
+    current_chars = 0
+    for piece in pieces:
+        if current and current_chars + len(piece) > max_chars:
+            text = "\n\n".join(current)
+            chunks.append(DocumentChunk(len(chunks), text, estimate_tokens(text)))
+            current, current_chars = [], 0
+        current.append(piece)
+        current_chars += len(piece)
+
+    if current:
+        text = "\n\n".join(current)
+        chunks.append(DocumentChunk(len(chunks), text, estimate_tokens(text)))
+    return chunks
+
+
+class DocumentIndex:
+    """
+    In-memory BM25 index over one job's documents.
+    """
+
+    def __init__(
+        self,
+        documents: str,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        chunk_tokens: int = CONTEXT_CHUNK_TOKENS
+    ):
+        """
+        Chunk and index documents.
+
+        Args:
+            documents: Reference documents
+            token_budget: Estimated document tokens per selection
+            chunk_tokens: Target estimated tokens per chunk
+        """
+        self.documents = documents
+        self.token_budget = token_budget
+        self.document_tokens = estimate_tokens(documents) if documents else 0
+        self.chunks = chunk_documents(documents, chunk_tokens) if documents else []
+
+        self._term_counts = [Counter(tokenize(chunk.text)) for chunk in self.chunks]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        document_frequency: Counter = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        total = len(self.chunks)
+        self._idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+        self.selections = 0
+        self.selected_tokens = 0
+
+    @property
+    def fits_budget(self) -> bool:
+        """Whether the whole documents fit in one selection."""
+        return self.document_tokens <= self.token_budget
+
+    def score(self, query: str) -> List[float]:
+        """BM25 score of every chunk for a query."""
+        terms = set(tokenize(query))
+        scores = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            score = 0.0
+            for term in terms:
+                frequency = counts.get(term)
+                if not frequency:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self._avg_length or 1))
+                score += self._idf[term] * frequency * (BM25_K1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def select(self, query: str) -> str:
+        """
+        Select the documents' most relevant passages for a query.
+
+        Chunks are taken by descending score while they fit the budget; if no
+        chunk matches the query, the leading chunks are used.
+
+        Args:
+            query: Slide description, element descriptions and guidelines
+
+        Returns:
+            Selected passages in document order (the whole documents if they
+            fit the budget)
+        """
+        if self.fits_budget:
+            selected = self.documents
+        else:
+            scores = self.score(query)
+            ranked = sorted(
+                (index for index, score in enumerate(scores) if score > 0),
+                key=lambda index: scores[index],
+                reverse=True
+            ) or list(range(len(self.chunks)))
+
+            picked: List[int] = []
+            used = 0
+            for index in ranked:
+                tokens = self.chunks[index].tokens
+                if used + tokens > self.token_budget:
+                    continue
+                picked.append(index)
+                used += tokens
+
+            parts: List[str] = []
+            previous = None
+            for index in sorted(picked):
+                if previous is not None and index != previous + 1:
+                    parts.append(GAP_MARKER)
+                parts.append(self.chunks[index].text)
+                previous = index
+            selected = "\n\n".join(parts)
+
+        self.selections += 1
+        self.selected_tokens += estimate_tokens(selected) if selected else 0
+        return selected
+
+    def stats(self) -> Dict[str, Any]:
+        """Report document tokens sent with and without selection."""
+        without_selection = self.document_tokens * self.selections
+        return {
+            "chunks": len(self.chunks),
+            "document_tokens": self.document_tokens,
+            "token_budget": self.token_budget,
+            "selections": self.selections,
+            "tokens_without_selection": without_selection,
+            "tokens_with_selection": self.selected_tokens,
+            "saved_ratio": round(1 - self.selected_tokens / without_selection, 4) if without_selection else 0.0,
+        }
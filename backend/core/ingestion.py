@@ -5,26 +5,43 @@ Handles ingestion of multi-slide presentations into the slide library.
 Extracts individual slides, generates descriptions, and stores them.
 """
 
+import asyncio
 import logging
+import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import tempfile
-import hashlib
 
 from utils.load_and_merge import PPTXLoader, PPTXSlideManager
-from utils.utils import normalize_presentation, extract_slide_notes
+from utils.utils import normalize_presentation, extract_slide_notes, export_slide_structure
 from models.vertex import vertexai_model
+from models.routing import get_stage_router, stage_model_kwargs
 from models.voyage import voyage_embed
 from utils.schemas import (
+    PresentationMapping,
+    SlideContent,
     SlideLibraryMetadata, 
+    SlideReasoning,
+    SlideStorageItem,
     StorageReference,
 )
-from prompts import SLIDE_DESCRIPTION_SYSTEM_PROMPT, SLIDE_DESCRIPTION_USER_PROMPT
+from prompts import SLIDE_DESCRIPTION_SYSTEM_PROMPT, SLIDE_DESCRIPTION_USER_PROMPT, PACKED_SLIDE_DESCRIPTION_SCHEMA
 
 from core.storage import SlideStorageAdapter
+from core.slide_generation import generate_content_reasoning, generate_content_reasoning_batch, build_slide_reasoning
+from core.packing import SlidePromptPacker, PACK_SLIDE_PROMPTS
+from storage import calculate_file_hash
 
 logger = logging.getLogger(__name__)
 
+# Prune unused layouts/masters/media and downsample images in extracted slides
+# (opt-in; image downsampling needs Pillow)
+MINIMIZE_SLIDE_PACKAGES = os.getenv("SLIDE_MINIMIZE_PACKAGES", "false").lower() == "true"
+
+# Run the content reasoning pass at ingestion and store it with each slide,
+# so compose can skip it for library slides
+STORE_TEMPLATE_REASONING = os.getenv("SLIDE_STORE_REASONING", "true").lower() == "true"
+
 
 class SlideIngestionService:
     """
@@ -33,10 +50,11 @@ class SlideIngestionService:
     Workflow:
     1. Load multi-slide presentation
     2. Extract each slide to single-slide PPTX
-    3. Generate description (user notes > LLM)
+    3. Generate descriptions (user notes > LLM) and template reasoning,
+       packed several slides per request when SLIDE_PROMPT_PACKING is on
     4. Create metadata
     5. Generate embedding
-    6. Store atomically (S3 + MongoDB + Qdrant)
+    6. Store the new slides as one batch (S3 + MongoDB + Qdrant)
     """
     
     def __init__(self, storage: SlideStorageAdapter):
@@ -75,11 +93,18 @@ class SlideIngestionService:
         # Normalize to extract content structure
         _, content_mapping = normalize_presentation(pptx_path)
         
-        # Process each slide
+        # Process each slide; new slides are stored together at the end
         ingested_slides = []
+        pending_items: List[SlideStorageItem] = []
+        pending_by_hash = {}
         temp_dir = Path(tempfile.mkdtemp(prefix="slide_library_"))
         
         try:
+            # Pass 1: extract, render and deduplicate; LLM work is deferred so
+            # the new slides' prompts can be packed together
+            new_slides: List[Tuple[int, Path, Path, str]] = []
+            new_hashes = set()
+            slots: List[SlideLibraryMetadata | str] = []
             for slide_idx in range(slide_count):
                 print(f"Processing slide {slide_idx + 1}/{slide_count}")
                 
@@ -107,15 +132,36 @@ class SlideIngestionService:
                         print(f"⏭️  Slide already exists (hash: {file_hash[:16]}...), skipping")
                         print(f"   Existing slide ID: {existing_slide.slide_id}")
                         print(f"   Description: {existing_slide.description[:100]}...")
-                        ingested_slides.append(existing_slide)
+                        slots.append(existing_slide)
                         continue
                     
-                    # Generate description (user notes > LLM)
-                    description = await self._generate_description(
-                        loader,
-                        slide_idx,
-                        content_mapping
-                    )
+                    # Identical slides within this deck are stored once
+                    if file_hash in new_hashes:
+                        print(f"⏭️  Duplicate slide within presentation (hash: {file_hash[:16]}...), skipping")
+                        slots.append(file_hash)
+                        continue
+                    
+                    new_slides.append((slide_idx, single_slide_path, preview_path, file_hash))
+                    new_hashes.add(file_hash)
+                    slots.append(file_hash)
+                    
+                except Exception as e:
+                    print(f"Failed to ingest slide {slide_idx + 1}: {e}")
+                    # Continue with next slide
+                    continue
+            
+            # Pass 2: descriptions (user notes > LLM) and template reasoning
+            texts = await self._describe_slides(
+                loader,
+                [slide_idx for slide_idx, *_ in new_slides],
+                content_mapping
+            )
+            
+            # Pass 3: metadata and embeddings
+            for slide_idx, single_slide_path, preview_path, file_hash in new_slides:
+                try:
+                    description, reasoning = texts[slide_idx]
+                    slide_content = self._slide_content(content_mapping, slide_idx)
                     
                     # Create metadata
                     metadata = SlideLibraryMetadata(
@@ -126,38 +172,57 @@ class SlideIngestionService:
                             "width": int(dimensions["width"]),
                             "height": int(dimensions["height"])
                         },
-                        element_count=len(content_mapping.slides[slide_idx].content) if slide_idx < len(content_mapping.slides) else 0,
+                        element_count=len(slide_content.content) if slide_content else 0,
                         storage_ref=StorageReference(
                             s3_key="",  # Will be filled by storage
                             mongodb_id="",
                             qdrant_id=""
                         ),
                         source_presentation=Path(pptx_path).name,
-                        slide_index=slide_idx
+                        slide_index=slide_idx,
+                        reasoning=reasoning
                     )
                     
                     # Generate embedding
                     embedding = await self._generate_embedding(description)
                     
-                    # Store atomically
-                    storage_ref = await self.storage.store_slide(
+                    pending_items.append(SlideStorageItem(
                         slide_pptx_path=single_slide_path,
                         preview_image_path=preview_path,
                         metadata=metadata,
                         embedding=embedding
-                    )
-                    
-                    # Update metadata with storage references
-                    metadata.storage_ref = storage_ref
-                    
-                    ingested_slides.append(metadata)
-                    print(f"✅ Ingested slide {slide_idx + 1}: {metadata.slide_id}")
+                    ))
+                    pending_by_hash[file_hash] = metadata
+                    print(f"Prepared slide {slide_idx + 1}: {metadata.slide_id}")
                     
                 except Exception as e:
                     print(f"Failed to ingest slide {slide_idx + 1}: {e}")
-                    # Continue with next slide
                     continue
             
+            ingested_slides = [
+                pending_by_hash.get(slot) if isinstance(slot, str) else slot
+                for slot in slots
+            ]
+            ingested_slides = [metadata for metadata in ingested_slides if metadata]
+            
+            # Store all new slides in one batch; a failed batch is rolled back
+            # as a whole, so its slides are retried one by one
+            if pending_items:
+                failed = set()
+                try:
+                    await self.storage.store_slides(pending_items)
+                    print(f"✅ Stored {len(pending_items)} new slides")
+                except Exception as e:
+                    print(f"Batch store of {len(pending_items)} new slides failed, storing individually: {e}")
+                    for item in pending_items:
+                        try:
+                            await self.storage.store_slides([item])
+                        except Exception as slide_error:
+                            print(f"Failed to store slide {item.metadata.slide_index + 1}: {slide_error}")
+                            failed.add(id(item.metadata))
+                    print(f"✅ Stored {len(pending_items) - len(failed)}/{len(pending_items)} new slides")
+                ingested_slides = [m for m in ingested_slides if id(m) not in failed]
+            
             print(f"Ingestion complete: {len(ingested_slides)}/{slide_count} slides")
             return ingested_slides
             
@@ -211,13 +276,170 @@ class SlideIngestionService:
         
         # Save to temp file
         output_path = temp_dir / f"slide_{slide_idx + 1}.pptx"
-        PPTXSlideManager.save_presentation(new_prs, str(output_path))
+        report = PPTXSlideManager.save_presentation(
+            new_prs,
+            str(output_path),
+            minimize=MINIMIZE_SLIDE_PACKAGES
+        )
+        if report:
+            print(
+                f"Minimized slide {slide_idx + 1}: {report['bytes_before']} -> {report['bytes_after']} bytes "
+                f"(saved {report['bytes_saved']}; layouts -{report['layouts_removed']}, "
+                f"masters -{report['masters_removed']}, media -{report['media_removed']}, "
+                f"images downsampled {report['images_downsampled']})"
+            )
         
         # Dispose
         new_prs.Dispose()
         
         return output_path
     
+    @staticmethod
+    def _slide_content(content_mapping: PresentationMapping, slide_idx: int) -> Optional[SlideContent]:
+        """Find a slide's normalized content (slides without content elements are absent)."""
+        return next(
+            (slide for slide in content_mapping.slides if slide.slide == slide_idx + 1),
+            None
+        )
+    
+    @staticmethod
+    def _description_structure(slide_content: SlideContent) -> Dict:
+        """Slide structure given to the description prompt (no fonts or actual content)."""
+        slide_structure = {
+            "slide": slide_content.slide,
+            "metadata": {
+                "width": slide_content.metadata.width,
+                "height": slide_content.metadata.height
+            },
+            "content": {}
+        }
+        
+        # Extract relevant metadata for each component
+        for uuid, content_item in slide_content.content.items():
+            slide_structure["content"][uuid] = {
+                "content_type": content_item.content_type,
+                "position": {
+                    "x": content_item.position.x,
+                    "y": content_item.position.y
+                },
+                "size": {
+                    "width": content_item.size.width,
+                    "height": content_item.size.height
+                },
+                "content_description": content_item.content_description
+            }
+        return slide_structure
+    
+    async def _describe_slides(
+        self,
+        loader: PPTXLoader,
+        slide_indices: List[int],
+        content_mapping: PresentationMapping
+    ) -> Dict[int, Tuple[str, Optional[SlideReasoning]]]:
+        """
+        Generate descriptions and template reasoning for new slides.
+        
+        Without packing every slide gets its own description and reasoning
+        calls. With packing, slides without notes share description requests
+        and all slides share reasoning requests (see core.packing).
+        
+        Args:
+            loader: PPTXLoader instance
+            slide_indices: Indexes of new slides (0-based)
+            content_mapping: Normalized content mapping
+            
+        Returns:
+            (description, reasoning) per slide index
+        """
+        if not PACK_SLIDE_PROMPTS or len(slide_indices) < 2:
+            results = await asyncio.gather(*(
+                asyncio.gather(
+                    self._generate_description(loader, slide_idx, content_mapping),
+                    self._generate_reasoning(slide_idx, content_mapping)
+                )
+                for slide_idx in slide_indices
+            ))
+            return {slide_idx: tuple(result) for slide_idx, result in zip(slide_indices, results)}
+        
+        from pptx import Presentation as PPTXPresentation
+        pptx_prs = PPTXPresentation(loader.pptx_path)
+        
+        # User notes are ground truth; only the rest need the LLM
+        descriptions: Dict[int, str] = {}
+        structures = []
+        for slide_idx in slide_indices:
+            notes_text = extract_slide_notes(pptx_prs.slides[slide_idx])
+            slide_content = self._slide_content(content_mapping, slide_idx)
+            if notes_text:
+                descriptions[slide_idx] = notes_text
+            elif slide_content:
+                structures.append(self._description_structure(slide_content))
+            else:
+                descriptions[slide_idx] = f"Slide {slide_idx + 1} from presentation"
+        
+        async def describe_single(slide_structure: Dict) -> Optional[Dict]:
+            description = await self._describe_structure(slide_structure)
+            return {"slide": slide_structure["slide"], "description": description} if description else None
+        
+        describer = SlidePromptPacker(
+            system=SLIDE_DESCRIPTION_SYSTEM_PROMPT,
+            schema=PACKED_SLIDE_DESCRIPTION_SCHEMA,
+            task="Analyze each of the following slide template structures and generate a comprehensive description for each.",
+            single_call=describe_single,
+            validate=lambda result, slide: bool(str(result.get("description", "")).strip()),
+            **stage_model_kwargs("description", {"temperature": 0.3})
+        )
+        
+        reasoning_contents = [
+            slide_content
+            for slide_content in (self._slide_content(content_mapping, slide_idx) for slide_idx in slide_indices)
+            if slide_content
+        ] if STORE_TEMPLATE_REASONING else []
+        reasoning_structures = export_slide_structure(PresentationMapping(slides=reasoning_contents))
+        
+        described, reasoned = await asyncio.gather(
+            describer.run(structures),
+            generate_content_reasoning_batch(reasoning_structures, packed=True)
+        )
+        
+        for slide_idx in slide_indices:
+            if slide_idx not in descriptions:
+                result = described.get(slide_idx + 1)
+                descriptions[slide_idx] = result["description"].strip() if result else f"Slide {slide_idx + 1} from presentation"
+        
+        reasonings: Dict[int, SlideReasoning] = {}
+        for slide_content, response in zip(reasoning_contents, reasoned):
+            reasoning = build_slide_reasoning(slide_content, response)
+            if reasoning:
+                reasonings[slide_content.slide - 1] = reasoning
+            else:
+                print(f"Template reasoning incomplete for slide {slide_content.slide}, not stored")
+        
+        return {slide_idx: (descriptions[slide_idx], reasonings.get(slide_idx)) for slide_idx in slide_indices}
+    
+    async def _describe_structure(self, slide_structure: Dict) -> Optional[str]:
+        """Generate a description from a slide structure with one LLM call (None on failure)."""
+        user_prompt = SLIDE_DESCRIPTION_USER_PROMPT(slide_structure)
+
+        try:
+            description = await get_stage_router().run(
+                "description",
+                lambda model_kwargs: vertexai_model(
+                    system=SLIDE_DESCRIPTION_SYSTEM_PROMPT,
+                    user=user_prompt,
+                    **model_kwargs
+                ),
+                validate=lambda text: bool(text and text.strip()),
+                base={"temperature": 0.3}
+            )
+            
+            print(f"Generated description: {description[:100]}...")
+            return description.strip()
+            
+        except Exception as e:
+            print(f"LLM description generation failed: {e}")
+            return None
+    
     async def _generate_description(
         self,
         loader: PPTXLoader,
@@ -252,55 +474,49 @@ class SlideIngestionService:
         print(f"No user notes found, generating description with LLM")
         
         # Get slide content structure
-        slide_content = None
-        if slide_idx < len(content_mapping.slides):
-            slide_content = content_mapping.slides[slide_idx]
+        slide_content = self._slide_content(content_mapping, slide_idx)
         
         if not slide_content:
             print(f"No content mapping found for slide {slide_idx}")
             return f"Slide {slide_idx + 1} from presentation"
         
-        # Prepare slide structure for LLM (exclude font and actual content)
-        slide_structure = {
-            "slide": slide_content.slide,
-            "metadata": {
-                "width": slide_content.metadata.width,
-                "height": slide_content.metadata.height
-            },
-            "content": {}
-        }
+        description = await self._describe_structure(self._description_structure(slide_content))
         
-        # Extract relevant metadata for each component
-        for uuid, content_item in slide_content.content.items():
-            slide_structure["content"][uuid] = {
-                "content_type": content_item.content_type,
-                "position": {
-                    "x": content_item.position.x,
-                    "y": content_item.position.y
-                },
-                "size": {
-                    "width": content_item.size.width,
-                    "height": content_item.size.height
-                },
-                "content_description": content_item.content_description
-            }
+        # Fallback to basic description
+        return description or f"Slide {slide_idx + 1} from presentation"
+    
+    async def _generate_reasoning(
+        self,
+        slide_idx: int,
+        content_mapping: PresentationMapping
+    ) -> Optional[SlideReasoning]:
+        """
+        Run the content reasoning pass for a slide and key it by element fingerprint.
         
-        user_prompt = SLIDE_DESCRIPTION_USER_PROMPT(slide_structure)
-
-        try:
-            description = await vertexai_model(
-                system=SLIDE_DESCRIPTION_SYSTEM_PROMPT,
-                user=user_prompt,
-                temperature=0.3
-            )
-            
-            print(f"Generated description: {description[:100]}...")
-            return description.strip()
+        The reasoning depends only on the slide's structure, so it is computed
+        once here instead of on every compose that uses the slide.
+        
+        Args:
+            slide_idx: Index of slide (0-based)
+            content_mapping: Normalized content mapping
             
-        except Exception as e:
-            print(f"LLM description generation failed: {e}")
-            # Fallback to basic description
-            return f"Slide {slide_idx + 1} from presentation"
+        Returns:
+            SlideReasoning, or None if disabled, the slide has no content
+            elements, or the reasoning pass did not cover every element
+        """
+        if not STORE_TEMPLATE_REASONING:
+            return None
+        
+        slide_content = self._slide_content(content_mapping, slide_idx)
+        if not slide_content:
+            return None
+        
+        slide_data = export_slide_structure(PresentationMapping(slides=[slide_content]))[0]
+        response = await generate_content_reasoning(slide_data)
+        reasoning = build_slide_reasoning(slide_content, response)
+        if reasoning is None:
+            print(f"Template reasoning incomplete for slide {slide_idx + 1}, not stored")
+        return reasoning
     
     async def _generate_embedding(self, description: str) -> list[float]:
         """
@@ -360,10 +576,4 @@ class SlideIngestionService:
         Returns:
             Hexadecimal hash string
         """
-        sha256_hash = hashlib.sha256()
-
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-
-        return sha256_hash.hexdigest()
+        return calculate_file_hash(file_path)
@@ -0,0 +1,109 @@
+"""
+Slide Package Parts - Content-addressed storage of OOXML packages.
+
+A PPTX is a ZIP of parts (slides, layouts, masters, themes, media). Every
+single-slide PPTX extracted from a deck carries the deck's masters, themes
+and media, so storing whole files duplicates them once per slide. Instead a
+package is split into parts keyed by the SHA256 of their bytes and stored
+as a manifest; identical parts are shared across slides and decks, and the
+PPTX is reassembled from the manifest on download.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple
+
+from utils.schemas import PackagePart
+
+logger = logging.getLogger(__name__)
+
+# S3 key prefix for package parts
+PART_KEY_PREFIX = "parts/"
+
+# Fixed member timestamp so reassembly is deterministic
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def part_key(data: bytes) -> str:
+    """Return the content-addressed S3 key for a part."""
+    return PART_KEY_PREFIX + hashlib.sha256(data).hexdigest()
+
+
+def split_package(package_path: Path) -> Tuple[List[PackagePart], Dict[str, bytes]]:
+    """
+    Split an OOXML package into content-addressed parts.
+
+    Args:
+        package_path: Path to the PPTX file
+
+    Returns:
+        Tuple of (manifest in archive order, part bytes by S3 key)
+    """
+    manifest: List[PackagePart] = []
+    parts: Dict[str, bytes] = {}
+
+    with zipfile.ZipFile(package_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            data = archive.read(info)
+            key = part_key(data)
+            parts.setdefault(key, data)
+            manifest.append(PackagePart(
+                name=info.filename,
+                key=key,
+                size=len(data),
+                compressed=info.compress_type != zipfile.ZIP_STORED
+            ))
+
+    return manifest, parts
+
+
+def assemble_package(
+    manifest: List[PackagePart],
+    parts: Mapping[str, bytes],
+    output_path: Path
+) -> Path:
+    """
+    Rebuild an OOXML package from its manifest.
+
+    The result is an equivalent package, not a byte-identical copy of the
+    original archive ([Content_Types].xml keeps its position first).
+
+    Args:
+        manifest: Parts in archive order
+        parts: Part bytes by S3 key
+        output_path: Destination PPTX path
+
+    Returns:
+        Path to the assembled package
+
+    Raises:
+        KeyError: If a part is missing
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, suffix=".partial")
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+
+    try:
+        with zipfile.ZipFile(tmp_path, "w") as archive:
+            for part in manifest:
+                info = zipfile.ZipInfo(part.name, date_time=ZIP_EPOCH)
+                info.compress_type = zipfile.ZIP_DEFLATED if part.compressed else zipfile.ZIP_STORED
+                archive.writestr(info, parts[part.key])
+        tmp_path.replace(output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return output_path
+
+
+def manifest_size(manifest: List[PackagePart]) -> int:
+    """Total uncompressed size of a package's parts."""
+    return sum(part.size for part in manifest)
@@ -0,0 +1,211 @@
+"""
+Multi-Slide Prompt Packing
+
+Small per-slide LLM tasks (template reasoning, slide descriptions) are
+dominated by per-call overhead and the thinking budget rather than by their
+prompt. SlidePromptPacker groups several slide structures into one
+structured-output request whose schema is an array of per-slide results.
+
+Batches are sized by estimated prompt tokens, so many simple slides share a
+call while a dense slide may go alone. Results are validated per slide: the
+valid ones are kept, the rest are split in half and retried, and a slide
+that still fails on its own falls back to the one-call-per-slide path.
+
+Enabled with SLIDE_PROMPT_PACKING=true; compare against one call per slide
+with `python benchmark_packing.py`.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from models.vertex import vertexai_model
+from models.scheduler import estimate_tokens
+from prompts import PACKED_SLIDES_INSTRUCTIONS, PACKED_SLIDES_USER_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Pack small per-slide prompts (reasoning, descriptions) into shared requests
+PACK_SLIDE_PROMPTS = os.getenv("SLIDE_PROMPT_PACKING", "false").lower() == "true"
+
+# Estimated input tokens per packed request, and a hard cap on slides per request
+PACKED_PROMPT_MAX_TOKENS = int(os.getenv("PACKED_PROMPT_MAX_TOKENS", "6000"))
+PACKED_PROMPT_MAX_SLIDES = int(os.getenv("PACKED_PROMPT_MAX_SLIDES", "8"))
+
+SlideData = Dict[str, Any]
+
+
+def plan_batches(
+    slides: List[SlideData],
+    max_tokens: int = PACKED_PROMPT_MAX_TOKENS,
+    max_slides: int = PACKED_PROMPT_MAX_SLIDES
+) -> List[List[SlideData]]:
+    """
+    Group slides into batches by estimated prompt size.
+
+    Slides are taken in order; a batch is closed when adding the next slide
+    would exceed max_tokens or max_slides. A slide larger than max_tokens
+    gets a batch of its own.
+
+    Args:
+        slides: Slide structures, each with a `slide` number
+        max_tokens: Estimated input token budget per batch
+        max_slides: Maximum slides per batch
+
+    Returns:
+        List of batches
+    """
+    batches: List[List[SlideData]] = []
+    current: List[SlideData] = []
+    current_tokens = 0
+
+    for slide in slides:
+        tokens = estimate_tokens(json.dumps(slide, ensure_ascii=False))
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_slides):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(slide)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+class SlidePromptPacker:
+    """
+    Runs one per-slide task over many slides with packed requests.
+    """
+
+    def __init__(
+        self,
+        system: str,
+        schema: Dict[str, Any],
+        task: str,
+        single_call: Callable[[SlideData], Awaitable[Optional[Dict[str, Any]]]],
+        validate: Callable[[Dict[str, Any], SlideData], bool],
+        max_tokens: int = PACKED_PROMPT_MAX_TOKENS,
+        max_slides: int = PACKED_PROMPT_MAX_SLIDES,
+        **model_kwargs
+    ):
+        """
+        Initialize packer.
+
+        Args:
+            system: Single-slide system prompt (packing instructions are appended)
+            schema: Packed response schema ({"slides": [per-slide result]})
+            task: One-line task statement placed before the slides
+            single_call: Unpacked fallback returning the per-slide result dict
+            validate: Whether a result is complete for its input slide
+            max_tokens: Estimated input token budget per request
+            max_slides: Maximum slides per request
+            **model_kwargs: Passed to vertexai_model (model, temperature, ...);
+                a max_output_tokens in extra_config is taken per slide
+        """
+        self.system = system + PACKED_SLIDES_INSTRUCTIONS
+        self.schema = schema
+        self.task = task
+        self.single_call = single_call
+        self.validate = validate
+        self.max_tokens = max_tokens
+        self.max_slides = max_slides
+        self.model_kwargs = model_kwargs
+
+        self.calls = 0
+        self.packed_slides = 0
+        self.splits = 0
+        self.fallbacks = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.elapsed_seconds = 0.0
+
+    async def _call_packed(self, batch: List[SlideData]) -> Dict[int, Dict[str, Any]]:
+        user = PACKED_SLIDES_USER_PROMPT(batch, self.task)
+        self.calls += 1
+        self.input_tokens += estimate_tokens(self.system, user)
+
+        model_kwargs = self.model_kwargs
+        extra_config = model_kwargs.get("extra_config") or {}
+        if extra_config.get("max_output_tokens"):
+            model_kwargs = {
+                **model_kwargs,
+                "extra_config": {**extra_config, "max_output_tokens": extra_config["max_output_tokens"] * len(batch)},
+            }
+
+        try:
+            response = await vertexai_model(system=self.system, user=user, schema=self.schema, **model_kwargs)
+            self.output_tokens += estimate_tokens(response)
+            items = json.loads(response)["slides"]
+        except Exception as e:
+            print(f"Packed request for {len(batch)} slides failed: {e}")
+            return {}
+
+        expected = {slide["slide"]: slide for slide in batch}
+        results: Dict[int, Dict[str, Any]] = {}
+        for item in items if isinstance(items, list) else []:
+            try:
+                number = int(item["slide"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if number in expected and number not in results and self.validate(item, expected[number]):
+                results[number] = item
+        return results
+
+    async def _run_batch(self, batch: List[SlideData]) -> Dict[int, Dict[str, Any]]:
+        if len(batch) == 1:
+            slide = batch[0]
+            self.fallbacks += 1
+            self.calls += 1
+            result = await self.single_call(slide)
+            return {slide["slide"]: result} if result else {}
+
+        results = await self._call_packed(batch)
+        self.packed_slides += len(results)
+
+        remaining = [slide for slide in batch if slide["slide"] not in results]
+        if remaining:
+            # Malformed or incomplete response: split what is left and retry
+            self.splits += 1
+            middle = (len(remaining) + 1) // 2
+            halves = [half for half in (remaining[:middle], remaining[middle:]) if half]
+            for retried in await asyncio.gather(*(self._run_batch(half) for half in halves)):
+                results.update(retried)
+        return results
+
+    async def run(self, slides: List[SlideData]) -> Dict[int, Dict[str, Any]]:
+        """
+        Run the task over slides.
+
+        Args:
+            slides: Slide structures, each with a unique `slide` number
+
+        Returns:
+            Result dict per slide number (slides that failed every attempt are absent)
+        """
+        started = time.perf_counter()
+        batches = plan_batches(slides, self.max_tokens, self.max_slides)
+        results: Dict[int, Dict[str, Any]] = {}
+        for batch_results in await asyncio.gather(*(self._run_batch(batch) for batch in batches)):
+            results.update(batch_results)
+        self.elapsed_seconds += time.perf_counter() - started
+
+        print(
+            f"Packed {len(slides)} slides into {len(batches)} requests "
+            f"({self.calls} calls, {self.splits} splits, {self.fallbacks} single-slide fallbacks)"
+        )
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Report request counts and estimated token usage."""
+        return {
+            "calls": self.calls,
+            "packed_slides": self.packed_slides,
+            "splits": self.splits,
+            "fallbacks": self.fallbacks,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
@@ -9,6 +9,7 @@ import json
 from typing import Optional
 
 from models.vertex import vertexai_model
+from models.routing import get_stage_router
 from utils.schemas import PresentationPlan, SlideOutlineItem
 from prompts import (
     PRESENTATION_PLANNER_SYSTEM_PROMPT,
@@ -58,20 +59,20 @@ class SlidePlannerAgent:
             num_slides=num_slides
         )
 
-        try:
+        async def call(model_kwargs) -> PresentationPlan:
             # Generate plan with structured output
             response = await vertexai_model(
                 system=PRESENTATION_PLANNER_SYSTEM_PROMPT,
                 user=user_full_prompt,
-                temperature=0.7,
-                schema=PRESENTATION_PLANNER_SCHEMA
+                schema=PRESENTATION_PLANNER_SCHEMA,
+                **model_kwargs
             )
             
             # Parse response
             plan_dict = json.loads(response)
             
             # Convert to PresentationPlan
-            plan = PresentationPlan(
+            return PresentationPlan(
                 overall_theme=plan_dict["overall_theme"],
                 target_audience=plan_dict["target_audience"],
                 slides=[
@@ -79,6 +80,14 @@ class SlidePlannerAgent:
                     for slide in plan_dict["slides"]
                 ]
             )
+
+        try:
+            plan = await get_stage_router().run(
+                "planner",
+                call,
+                validate=lambda plan: bool(plan.slides),
+                base={"temperature": 0.7}
+            )
             
             print(f"Generated plan: {len(plan.slides)} slides")
             print(f"Theme: {plan.overall_theme}")
@@ -0,0 +1,191 @@
+"""
+Slide Popularity Tracking
+
+Counts how often library slides are used (search hits, compose picks,
+downloads) and uses the counts to prewarm caches after a restart.
+
+Counters are aggregated in memory and flushed to MongoDB periodically as
+one $inc per touched slide, so recording an access costs a dict update.
+Each slide's document in the popularity collection also carries a weighted
+score, indexed for the top-N query used by prewarming.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from pymongo import DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Access events and their weight in the popularity score
+POPULARITY_WEIGHTS = {
+    "search_hits": 1,
+    "downloads": 2,
+    "compose_picks": 3,
+}
+
+# How often in-memory counters are written to MongoDB (seconds)
+POPULARITY_FLUSH_SECONDS = float(os.getenv("POPULARITY_FLUSH_SECONDS", "30"))
+
+# Number of most popular slides preloaded on startup
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "50"))
+
+POPULARITY_INDEXES = [
+    IndexModel([("slide_id", 1)], name="slide_id_unique", unique=True),
+    IndexModel([("score", DESCENDING)], name="score_desc"),
+]
+
+
+class SlidePopularityTracker:
+    """
+    In-memory access counters for one slide library, flushed to MongoDB.
+    """
+
+    def __init__(self, storage, collection_name: str):
+        """
+        Initialize tracker.
+
+        Args:
+            storage: SlideStorageAdapter owning the library
+            collection_name: MongoDB collection holding the counters
+        """
+        self.storage = storage
+        self.collection_name = collection_name
+        self._pending: Dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+        self.flushed_slides = 0
+        self.flush_failures = 0
+        self.prewarmed = 0
+
+    def _collection(self):
+        return self.storage.mongo.get_collection(
+            self.collection_name,
+            database_name=self.storage.database_name
+        )
+
+    async def ensure_indexes(self):
+        """Apply the popularity collection indexes."""
+        await self.storage.mongo.ensure_indexes(
+            self.collection_name,
+            POPULARITY_INDEXES,
+            database_name=self.storage.database_name
+        )
+
+    def record(self, slide_ids: Iterable[str], event: str):
+        """
+        Count an access event for one or more slides.
+
+        Args:
+            slide_ids: Slides that were accessed
+            event: One of POPULARITY_WEIGHTS
+        """
+        if event not in POPULARITY_WEIGHTS:
+            raise ValueError(f"Unknown popularity event: {event}")
+        with self._lock:
+            for slide_id in slide_ids:
+                if slide_id:
+                    self._pending[slide_id][event] += 1
+
+    async def flush(self) -> int:
+        """
+        Write pending counters to MongoDB.
+
+        Counters that fail to write are merged back and retried next flush.
+
+        Returns:
+            Number of slides updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+        if not pending:
+            return 0
+
+        collection = self._collection()
+        now = datetime.utcnow()
+
+        async def write(slide_id: str, counts: Counter):
+            increments: Dict[str, int] = dict(counts)
+            increments["score"] = sum(POPULARITY_WEIGHTS[event] * n for event, n in counts.items())
+            await collection.update_one(
+                {"slide_id": slide_id},
+                {"$inc": increments, "$set": {"last_accessed_at": now}},
+                upsert=True
+            )
+
+        items = list(pending.items())
+        results = await asyncio.gather(
+            *(write(slide_id, counts) for slide_id, counts in items),
+            return_exceptions=True
+        )
+
+        failed = [(slide_id, counts) for (slide_id, counts), result in zip(items, results) if isinstance(result, BaseException)]
+        if failed:
+            self.flush_failures += 1
+            print(f"Popularity flush failed for {len(failed)} slides: {next(r for r in results if isinstance(r, BaseException))}")
+            with self._lock:
+                for slide_id, counts in failed:
+                    self._pending[slide_id].update(counts)
+
+        written = len(items) - len(failed)
+        self.flushed_slides += written
+        return written
+
+    async def top_slides(self, limit: int = PREWARM_TOP_N) -> List[str]:
+        """Return the ids of the most popular slides, best first."""
+        cursor = self._collection().find(
+            {},
+            projection={"slide_id": 1},
+            sort=[("score", DESCENDING)],
+            limit=limit
+        )
+        return [doc["slide_id"] async for doc in cursor]
+
+    async def prewarm(self, limit: int = PREWARM_TOP_N) -> Dict[str, int]:
+        """
+        Preload metadata, slide files and previews of the most popular slides.
+
+        Metadata goes into the in-process metadata cache; slide files, package
+        parts and previews go into the local object cache.
+
+        Args:
+            limit: Number of slides to preload
+
+        Returns:
+            Counts of warmed slides and fetched objects
+        """
+        slide_ids = await self.top_slides(limit)
+        if not slide_ids:
+            return {"slides": 0, "objects": 0}
+
+        keys: List[str] = []
+        warmed = 0
+        for slide_id in slide_ids:
+            metadata = await self.storage.get_slide_metadata(slide_id)
+            if not metadata:
+                continue
+            warmed += 1
+            keys.extend(part.key for part in metadata.storage_ref.parts)
+            keys.append(metadata.storage_ref.s3_key)
+            keys.append(metadata.preview)
+
+        fetched = await self.storage.cache_objects([key for key in keys if key])
+        self.prewarmed = warmed
+        print(f"Prewarmed {warmed} popular slides ({fetched} objects fetched)")
+        return {"slides": warmed, "objects": fetched}
+
+    def stats(self) -> Dict[str, Any]:
+        """Report pending and flushed counter totals."""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending_slides": pending,
+            "flushed_slides": self.flushed_slides,
+            "flush_failures": self.flush_failures,
+            "prewarmed_slides": self.prewarmed,
+        }
@@ -0,0 +1,425 @@
+"""
+Slide Library Reconciliation
+
+Finds and repairs inconsistencies between S3, MongoDB, and Qdrant:
+1. Stale write intents left by a crash mid-write
+2. MongoDB documents without a vector (re-embedded from their description)
+3. Qdrant vectors without a document (deleted)
+4. Slide-library S3 objects no document references (deleted)
+
+Run once with `python reconcile.py`, or periodically from the API by setting
+RECONCILE_INTERVAL_SECONDS. `python storage_gc.py` runs the S3 garbage
+collection pass alone.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set
+
+from models.voyage import voyage_embed
+from core.storage import SlideStorageAdapter
+
+logger = logging.getLogger(__name__)
+
+# Documents/points processed per round trip
+RECONCILE_BATCH_SIZE = 256
+
+# Intents younger than this may still be in flight
+INTENT_GRACE_SECONDS = 15 * 60
+
+# Unreferenced objects younger than this may belong to an in-flight write
+ORPHAN_GRACE_SECONDS = 60 * 60
+
+# Slide library objects (and package parts) are named by their SHA256 content hash
+CONTENT_KEY_PATTERN = re.compile(r"^(parts/)?[0-9a-f]{64}$")
+
+
+class SlideReconciler:
+    """
+    Reconciles the three slide library backends.
+
+    Every pass is idempotent and safe to run while ingestion is active:
+    anything named by a pending write intent is left alone.
+    """
+
+    def __init__(
+        self,
+        storage: SlideStorageAdapter,
+        intent_grace_seconds: int = INTENT_GRACE_SECONDS,
+        orphan_grace_seconds: int = ORPHAN_GRACE_SECONDS
+    ):
+        """
+        Initialize reconciler.
+
+        Args:
+            storage: Initialized storage adapter
+            intent_grace_seconds: Age after which a write intent is considered abandoned
+            orphan_grace_seconds: Minimum age of an unreferenced object before removal
+        """
+        self.storage = storage
+        self.intent_grace = timedelta(seconds=intent_grace_seconds)
+        self.orphan_grace = timedelta(seconds=orphan_grace_seconds)
+
+    def _slides(self):
+        return self.storage.mongo.get_collection(
+            self.storage.collection_name,
+            database_name=self.storage.database_name
+        )
+
+    def _intents(self):
+        return self.storage.mongo.get_collection(
+            self.storage.intents_collection_name,
+            database_name=self.storage.database_name
+        )
+
+    async def run(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Run every reconciliation pass.
+
+        Args:
+            dry_run: Report what would change without modifying anything
+
+        Returns:
+            Counts per category
+        """
+        report: Dict[str, int] = {}
+        report.update(await self.sweep_stale_intents(dry_run))
+
+        pending_slides, pending_keys = await self._pending_writes()
+        report.update(await self.repair_documents_without_vectors(pending_slides, dry_run))
+        report.update(await self.remove_vectors_without_documents(pending_slides, dry_run))
+        report.update(await self.remove_orphaned_objects(pending_keys, dry_run))
+
+        print(f"Reconciliation {'(dry run) ' if dry_run else ''}complete: {report}")
+        return report
+
+    async def run_periodically(self, interval_seconds: float):
+        """
+        Run reconciliation forever at a fixed interval.
+
+        Args:
+            interval_seconds: Delay between passes
+        """
+        while True:
+            try:
+                await self.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Reconciliation pass failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    async def _pending_writes(self) -> tuple[Set[str], Set[str]]:
+        """Collect slide ids and S3 keys named by write intents still in flight."""
+        slide_ids: Set[str] = set()
+        s3_keys: Set[str] = set()
+        async for intent in self._intents().find({}):
+            slide_ids.update(intent.get("slide_ids", []))
+            s3_keys.update(intent.get("s3_keys", []))
+        return slide_ids, s3_keys
+
+    async def sweep_stale_intents(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Resolve write intents older than the grace period.
+
+        A slide is kept only if it was fully written before the crash: its
+        document and vector exist, and so do its package (or every part of
+        it) and preview in S3, since the three backends are written
+        concurrently. Anything else named by the intent is rolled back;
+        objects it left behind are removed by the GC pass once unreferenced.
+        An intent whose S3 check fails for any reason other than not found
+        is left in place for the next sweep.
+
+        Args:
+            dry_run: Report without modifying anything
+
+        Returns:
+            Counts of stale intents and rolled back slides
+        """
+        cutoff = datetime.utcnow() - self.intent_grace
+        stale = await self._intents().find({"created_at": {"$lt": cutoff}}).to_list(length=None)
+
+        rolled_back = 0
+        for intent in stale:
+            slide_ids: List[str] = intent.get("slide_ids", [])
+
+            docs = await self._slides().find(
+                {"slide_id": {"$in": slide_ids}},
+                projection={"slide_id": 1, "preview": 1, "storage_ref.s3_key": 1, "storage_ref.parts.key": 1}
+            ).to_list(length=None)
+            with_docs = {doc["slide_id"] for doc in docs}
+
+            object_keys = {doc["slide_id"]: self._object_keys(doc) for doc in docs}
+            try:
+                missing = set(await self.storage.s3.missing_objects(
+                    {key for keys in object_keys.values() for key in keys}
+                ))
+            except Exception as e:
+                # Existence is unknown: never roll back on it, the next sweep retries
+                print(f"Skipping write intent {intent['_id']}, object check failed: {e}")
+                continue
+            with_objects = {
+                slide_id for slide_id, keys in object_keys.items()
+                if keys and not missing.intersection(keys)
+            }
+
+            points = await self.storage.qdrant.client.retrieve(
+                collection_name=self.storage.qdrant_collection,
+                ids=slide_ids,
+                with_payload=False,
+                with_vectors=False
+            )
+            with_vectors = {str(point.id) for point in points}
+
+            partial = [
+                sid for sid in slide_ids
+                if sid not in with_docs or sid not in with_vectors or sid not in with_objects
+            ]
+            rolled_back += len(partial)
+
+            if dry_run:
+                continue
+
+            if partial:
+                await self.storage.rollback_slides(partial)
+            await self._intents().delete_one({"_id": intent["_id"]})
+
+        if stale:
+            print(f"Stale write intents: {len(stale)}, partial slides rolled back: {rolled_back}")
+        return {"stale_intents": len(stale), "partial_slides_rolled_back": rolled_back}
+
+    @staticmethod
+    def _object_keys(doc: dict) -> List[str]:
+        """S3 keys a slide document references (package or parts, and preview)."""
+        storage_ref = doc.get("storage_ref") or {}
+        keys = [storage_ref["s3_key"]] if storage_ref.get("s3_key") else []
+        keys.extend(part["key"] for part in storage_ref.get("parts", []))
+        if doc.get("preview"):
+            keys.append(doc["preview"])
+        return keys
+
+    async def repair_documents_without_vectors(
+        self,
+        pending_slides: Set[str],
+        dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Re-embed documents whose vector is missing from Qdrant.
+
+        Args:
+            pending_slides: Slide ids with writes still in flight
+            dry_run: Report without modifying anything
+
+        Returns:
+            Count of repaired documents
+        """
+        from qdrant_client.models import PointStruct
+
+        repaired = 0
+        cursor = self._slides().find(
+            {},
+            projection={
+                "slide_id": 1,
+                "description": 1,
+                "source_presentation": 1,
+                "element_count": 1,
+            }
+        )
+
+        batch: List[dict] = []
+
+        async def flush(docs: List[dict]) -> int:
+            ids = [doc["slide_id"] for doc in docs]
+            points = await self.storage.qdrant.client.retrieve(
+                collection_name=self.storage.qdrant_collection,
+                ids=ids,
+                with_payload=False,
+                with_vectors=False
+            )
+            present = {str(point.id) for point in points}
+            missing = [doc for doc in docs if doc["slide_id"] not in present]
+            if not missing or dry_run:
+                return len(missing)
+
+            embeddings = await voyage_embed(
+                content=[doc.get("description", "") for doc in missing],
+                input_type="document",
+                model="voyage-3-large"
+            )
+            await self.storage.qdrant.client.upsert(
+                collection_name=self.storage.qdrant_collection,
+                points=[
+                    PointStruct(
+                        id=doc["slide_id"],
+                        vector=embedding,
+                        payload={
+                            "slide_id": doc["slide_id"],
+                            "description": doc.get("description", ""),
+                            "source_presentation": doc.get("source_presentation", ""),
+                            "element_count": doc.get("element_count", 0)
+                        }
+                    )
+                    for doc, embedding in zip(missing, embeddings)
+                ]
+            )
+            return len(missing)
+
+        async for doc in cursor:
+            if doc.get("slide_id") in pending_slides:
+                continue
+            batch.append(doc)
+            if len(batch) >= RECONCILE_BATCH_SIZE:
+                repaired += await flush(batch)
+                batch = []
+        if batch:
+            repaired += await flush(batch)
+
+        if repaired:
+            print(f"Documents without vectors: {repaired} {'found' if dry_run else 're-embedded'}")
+        return {"documents_without_vectors": repaired}
+
+    async def remove_vectors_without_documents(
+        self,
+        pending_slides: Set[str],
+        dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Delete Qdrant points that have no MongoDB document.
+
+        Args:
+            pending_slides: Slide ids with writes still in flight
+            dry_run: Report without modifying anything
+
+        Returns:
+            Count of removed vectors
+        """
+        removed = 0
+        offset = None
+
+        while True:
+            points, offset = await self.storage.qdrant.client.scroll(
+                collection_name=self.storage.qdrant_collection,
+                limit=RECONCILE_BATCH_SIZE,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            ids = [str(point.id) for point in points if str(point.id) not in pending_slides]
+
+            if ids:
+                docs = await self._slides().find(
+                    {"slide_id": {"$in": ids}},
+                    projection={"slide_id": 1}
+                ).to_list(length=None)
+                known = {doc["slide_id"] for doc in docs}
+                orphaned = [point_id for point_id in ids if point_id not in known]
+
+                if orphaned and not dry_run:
+                    await self.storage.qdrant.client.delete(
+                        collection_name=self.storage.qdrant_collection,
+                        points_selector=orphaned
+                    )
+                removed += len(orphaned)
+
+            if offset is None:
+                break
+
+        if removed:
+            print(f"Vectors without documents: {removed} {'found' if dry_run else 'removed'}")
+        return {"vectors_without_documents": removed}
+
+    async def live_object_keys(self, pending_keys: Set[str]) -> Set[str]:
+        """
+        Collect every S3 key referenced by a slide document or pending write.
+
+        Args:
+            pending_keys: Keys named by write intents still in flight
+
+        Returns:
+            Set of live keys
+        """
+        live = set(pending_keys)
+        cursor = self._slides().find(
+            {},
+            projection={"storage_ref.s3_key": 1, "storage_ref.parts.key": 1, "preview": 1}
+        )
+        async for doc in cursor:
+            storage_ref = doc.get("storage_ref") or {}
+            if storage_ref.get("s3_key"):
+                live.add(storage_ref["s3_key"])
+            live.update(part["key"] for part in storage_ref.get("parts", []))
+            if doc.get("preview"):
+                live.add(doc["preview"])
+        return live
+
+    async def remove_orphaned_objects(
+        self,
+        pending_keys: Set[str],
+        dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Delete slide library objects no document references.
+
+        Only content-hash keys under the adapter's tenant prefix that are older
+        than the grace period are considered, so unrelated objects in a shared
+        bucket, other tenants' objects and in-flight uploads are kept.
+        Deletes are sent as concurrent batches of up to 1000 keys.
+
+        Args:
+            pending_keys: Keys named by write intents still in flight
+            dry_run: Report without modifying anything
+
+        Returns:
+            Count of removed objects and reclaimed bytes
+        """
+        live = await self.live_object_keys(pending_keys)
+        cutoff = datetime.now(timezone.utc) - self.orphan_grace
+
+        orphaned: List[str] = []
+        sizes: Dict[str, int] = {}
+        scanned = 0
+        prefix = self.storage.key_prefix
+        async for obj in self.storage.s3.list_objects(prefix=prefix):
+            scanned += 1
+            key = obj["key"]
+            if key in live or not CONTENT_KEY_PATTERN.match(key[len(prefix):]):
+                continue
+            if obj["last_modified"] and obj["last_modified"] > cutoff:
+                continue
+            orphaned.append(key)
+            sizes[key] = obj["size"] or 0
+
+        failed: List[str] = []
+        if orphaned and not dry_run:
+            result = await self.storage.s3.delete_files(orphaned)
+            failed = result["failed"]
+
+        failed_set = set(failed)
+        removed = [key for key in orphaned if key not in failed_set]
+        reclaimed = sum(sizes[key] for key in removed)
+
+        if orphaned:
+            print(
+                f"Orphaned S3 objects: {len(removed)} {'found' if dry_run else 'removed'} "
+                f"of {scanned} scanned, {reclaimed} bytes {'reclaimable' if dry_run else 'reclaimed'}"
+            )
+        return {
+            "orphaned_objects": len(removed),
+            "reclaimed_bytes": reclaimed,
+            "failed_deletes": len(failed),
+        }
+
+    async def collect_garbage(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Remove unreferenced S3 objects only (no MongoDB/Qdrant repairs).
+
+        Args:
+            dry_run: Report without deleting anything
+
+        Returns:
+            Count of removed objects and reclaimed bytes
+        """
+        _, pending_keys = await self._pending_writes()
+        return await self.remove_orphaned_objects(pending_keys, dry_run)
@@ -123,21 +123,19 @@ class SlideRetrievalService:
                 relevance_score = rerank_result['relevance_score']
                 slide_id = slide_data[index]['slide_id']
                 
-                # Fetch full metadata from MongoDB
-                metadata_doc = await self.mongo.read(
-                    collection_name=self.mongo_collection,
-                    query={"slide_id": slide_id},
-                    database_name=self.database_name
-                )
+                # Fetch full metadata (metadata cache, then MongoDB)
+                metadata = await self.storage.get_slide_metadata(slide_id)
                 
-                if not metadata_doc:
+                if not metadata:
                     print(f"Warning: Metadata not found for slide_id: {slide_id}")
                     continue
                 
-                # Convert to SlideLibraryMetadata
-                metadata = SlideLibraryMetadata(**metadata_doc)
                 final_results.append((metadata, relevance_score))
             
+            self.storage.popularity.record(
+                (metadata.slide_id for metadata, _ in final_results),
+                "search_hits"
+            )
             print(f"✅ Found {len(final_results)} slides")
             return final_results
             
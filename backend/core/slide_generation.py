@@ -1,7 +1,9 @@
 import asyncio
+import contextlib
 import json
 import os
-from typing import Dict, Any
+import time
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional
 
 from utils.utils import (
     export_slide_structure,
@@ -9,20 +11,244 @@ from utils.utils import (
     apply_content_to_presentation,
     normalize_presentation,
     clear_all_alt_text,
+    element_fingerprint,
 )
+from utils.json_stream import JSONStreamParser
 from utils.schemas import (
     ContentReasoningResponse,
     ContentItem,
     ChartMetadata,
-    ChartSeries
+    ChartSeries,
+    PresentationMapping,
+    SlideContent,
+    SlideReasoning
 )
 from prompts import (
     CONTENT_REASONING_PROMPT,
     CONTENT_REASONING_SCHEMA,
     CONTENT_GENERATION_PROMPT,
-    CONTENT_GENERATION_SCHEMA
+    CONTENT_GENERATION_SCHEMA,
+    PACKED_CONTENT_REASONING_SCHEMA
 )
-from models.vertex import vertexai_model
+from models.vertex import vertexai_model, vertexai_model_stream
+from models.routing import get_stage_router, stage_model_kwargs
+from models.context_cache import CachedContext, get_context_cache_manager
+from core.packing import SlidePromptPacker, PACK_SLIDE_PROMPTS
+from core.context import DocumentIndex, SELECT_SLIDE_CONTEXT
+
+# Content generation samples at a high temperature; set false so repeated
+# generations produce fresh copy even when the LLM response cache is on
+CACHE_GENERATED_CONTENT = os.getenv("LLM_CACHE_GENERATED_CONTENT", "true").lower() == "true"
+
+# Streamed generation saves the partial deck after this many applied slides
+# or seconds since the last save, whichever comes first (the first slide is
+# saved immediately; the final deck is saved once at the end)
+PARTIAL_SAVE_EVERY_SLIDES = int(os.getenv("SLIDE_PARTIAL_SAVE_EVERY", "4"))
+PARTIAL_SAVE_INTERVAL_SECONDS = float(os.getenv("SLIDE_PARTIAL_SAVE_SECONDS", "5"))
+
+# Sampling settings of the content generation pass (buffered and streamed);
+# model, thinking budget and output cap come from the "generation" route
+GENERATION_MODEL_KWARGS = {
+    "temperature": 0.65,
+    "extra_config": {
+        "top_p": 0.85,
+        "top_k": 40,
+        "frequency_penalty": 0.15,
+        "presence_penalty": 0.1,
+    },
+}
+
+# Sampling settings of the content reasoning pass (single and packed
+# requests); model, thinking budget and output cap come from the "reasoning" route
+REASONING_MODEL_KWARGS = {
+    "temperature": 0.2,
+    "extra_config": {
+        "top_p": 0.3,
+        "top_k": 20,
+        "frequency_penalty": 0.1,
+        "presence_penalty": 0.05,
+    },
+}
+
+
+async def generate_content_reasoning(slide_data: Dict[str, Any]) -> ContentReasoningResponse:
+    """
+    Run the content reasoning pass for one slide.
+
+    A response that does not describe every element is retried once on the
+    reasoning route's escalation (see models.routing).
+
+    Args:
+        slide_data: Slide structure as produced by export_slide_structure
+
+    Returns:
+        ContentReasoningResponse with reasoning content descriptions
+        (an empty fallback if the model call fails)
+    """
+    try:
+        slide_json = json.dumps(slide_data, indent=2, ensure_ascii=False)
+
+        async def call(model_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            response_text = await vertexai_model(
+                system=CONTENT_REASONING_PROMPT,
+                user=slide_json,
+                schema=CONTENT_REASONING_SCHEMA,
+                **model_kwargs
+            )
+
+            if slide_data["slide"] == 2:
+                print(response_text)
+
+            return json.loads(response_text)
+
+        response_data = await get_stage_router().run(
+            "reasoning",
+            call,
+            validate=lambda result: reasoning_covers_slide(result, slide_data),
+            base=REASONING_MODEL_KWARGS
+        )
+
+        return ContentReasoningResponse(
+            slide=response_data["slide"],
+            description=response_data["description"],
+            content=response_data["content"]
+        )
+
+    except Exception as e:
+        print(f"Error processing slide {slide_data.get('slide', 'unknown')}: {e}")
+        return ContentReasoningResponse(
+            slide=slide_data.get("slide", 0),
+            description="Error processing slide",
+            content={}
+        )
+
+
+def reasoning_covers_slide(result: Dict[str, Any], slide_data: Dict[str, Any]) -> bool:
+    described = {
+        item.get("uuid")
+        for item in result.get("content") or []
+        if isinstance(item, dict) and item.get("content_description")
+    }
+    return bool(result.get("description")) and set(slide_data["content"]) <= described
+
+
+def content_reasoning_packer(**limits) -> SlidePromptPacker:
+    """
+    Build a packer for the content reasoning pass.
+
+    Args:
+        **limits: Optional max_tokens / max_slides overrides
+
+    Returns:
+        SlidePromptPacker falling back to generate_content_reasoning
+    """
+    async def single(slide_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        response = await generate_content_reasoning(slide_data)
+        return response.model_dump() if response.content else None
+
+    return SlidePromptPacker(
+        system=CONTENT_REASONING_PROMPT,
+        schema=PACKED_CONTENT_REASONING_SCHEMA,
+        task="Analyze each of the following slide content mappings.",
+        single_call=single,
+        validate=reasoning_covers_slide,
+        **limits,
+        **stage_model_kwargs("reasoning", REASONING_MODEL_KWARGS)
+    )
+
+
+async def generate_content_reasoning_batch(
+    slide_structures: List[Dict[str, Any]],
+    packed: bool = PACK_SLIDE_PROMPTS
+) -> List[ContentReasoningResponse]:
+    """
+    Run the content reasoning pass for several slides.
+
+    With packing, slides share requests (see core.packing); otherwise each
+    slide gets its own call. Results are returned in input order.
+
+    Args:
+        slide_structures: Slide structures as produced by export_slide_structure
+        packed: Pack several slides per request
+
+    Returns:
+        ContentReasoningResponse per slide (an empty fallback for failed slides)
+    """
+    if not packed or len(slide_structures) < 2:
+        return list(await asyncio.gather(*(generate_content_reasoning(slide) for slide in slide_structures)))
+
+    results = await content_reasoning_packer().run(slide_structures)
+
+    responses = []
+    for slide_data in slide_structures:
+        result = results.get(slide_data["slide"])
+        if result:
+            responses.append(ContentReasoningResponse(
+                slide=slide_data["slide"],
+                description=result["description"],
+                content=result["content"]
+            ))
+        else:
+            responses.append(ContentReasoningResponse(
+                slide=slide_data["slide"],
+                description="Error processing slide",
+                content=[]
+            ))
+    return responses
+
+
+def build_slide_reasoning(slide_content: SlideContent, response: ContentReasoningResponse) -> Optional[SlideReasoning]:
+    """
+    Convert a reasoning response into storable form, keyed by element fingerprint.
+
+    Args:
+        slide_content: Normalized slide the reasoning was produced for
+        response: Reasoning pass output (element UUIDs are per-normalization)
+
+    Returns:
+        SlideReasoning, or None if the response does not cover every element
+    """
+    descriptions = {
+        item["uuid"]: item["content_description"]
+        for item in response.content
+        if item.get("uuid") and item.get("content_description")
+    }
+    if not slide_content.content or set(slide_content.content) - set(descriptions):
+        return None
+
+    return SlideReasoning(
+        description=response.description,
+        elements={
+            element_fingerprint(item): descriptions[uuid]
+            for uuid, item in slide_content.content.items()
+        }
+    )
+
+
+def reasoning_from_stored(slide_content: SlideContent, reasoning: SlideReasoning) -> Optional[ContentReasoningResponse]:
+    """
+    Rebuild a reasoning response for a freshly normalized slide from stored reasoning.
+
+    Args:
+        slide_content: Normalized slide (with this run's element UUIDs)
+        reasoning: Reasoning stored with the library slide
+
+    Returns:
+        ContentReasoningResponse, or None if any element's fingerprint is unknown
+        (the slide then goes through the reasoning pass)
+    """
+    content = []
+    for uuid, item in slide_content.content.items():
+        description = reasoning.elements.get(element_fingerprint(item))
+        if description is None:
+            return None
+        content.append({"uuid": uuid, "content_description": description})
+
+    return ContentReasoningResponse(
+        slide=slide_content.slide,
+        description=reasoning.description,
+        content=content
+    )
 
 
 class PresentationProcessor:
@@ -31,11 +257,43 @@ class PresentationProcessor:
     Handles the complete pipeline from normalization to final output generation.
     """
 
-    def __init__(self, pptx_path: str, user_input: str, documents: str = "", output_dir: str = "output"):
+    def __init__(
+        self,
+        pptx_path: str,
+        user_input: str,
+        documents: str = "",
+        output_dir: str = "output",
+        template_reasoning: Optional[Dict[int, SlideReasoning]] = None,
+        context_header: str = "",
+        slide_guidelines: Optional[Dict[int, str]] = None,
+        select_context: bool = SELECT_SLIDE_CONTEXT
+    ):
+        """
+        Initialize processor.
+
+        Args:
+            pptx_path: Template presentation
+            user_input: User requirements for content generation
+            documents: Reference documents
+            output_dir: Directory for output files
+            template_reasoning: Stored reasoning by 1-based slide number; slides
+                it fully covers skip the reasoning pass
+            context_header: Context sent to every slide ahead of the documents
+                (e.g. the presentation plan)
+            slide_guidelines: Extra retrieval query text by 1-based slide number in the deck
+            select_context: Send each slide only the documents' most relevant
+                passages (see core.context) instead of all of them
+        """
         self.pptx_path = pptx_path
         self.user_input = user_input
         self.documents = documents
         self.output_dir = output_dir
+        self.template_reasoning = template_reasoning or {}
+        self.context_header = context_header
+        self.slide_guidelines = slide_guidelines or {}
+        self.select_context = select_context
+        self._document_index: Optional[DocumentIndex] = None
+        self._cached_context: Optional[CachedContext] = None
 
         self.presentation = None
         self.content_mapping = None
@@ -45,6 +303,8 @@ class PresentationProcessor:
         self.generated_content = None
         self.merged_mapping = None
         self.final_structure = None
+        self.computed_reasoning: Dict[int, SlideReasoning] = {}
+        self.reused_reasoning = 0
 
     async def execute(self) -> Dict[str, str]:
         """
@@ -64,6 +324,165 @@ class PresentationProcessor:
         self._export_final_structure()
         return self._save_outputs()
 
+    async def stream(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the pipeline with streamed content generation.
+
+        Each slide's content is generated with a streaming request; elements
+        are reported as soon as they are parsed, and the slide is merged and
+        applied to the deck as soon as its response completes. The partial
+        deck is saved after the first slide and then every
+        PARTIAL_SAVE_EVERY_SLIDES slides or PARTIAL_SAVE_INTERVAL_SECONDS, so
+        time to first output no longer waits for the slowest slide.
+
+        Yields:
+            Events, each a dict with an "event" field:
+            - reasoning_complete: slides, reused
+            - element: slide, kind ("content" or "charts"), uuid
+            - slide_complete: slide, completed, total, partial_pptx (the
+              partial deck path when it was saved with this slide, else None)
+            - slide_failed: slide, error
+            - complete: result (same paths as execute()), context (document
+              token counts, see context_stats())
+        """
+        print(f"Starting streamed presentation processing for: {self.pptx_path}")
+
+        await self._normalize_presentation()
+        self._export_slide_structure()
+        await self._process_slides_with_reasoning()
+        self._update_content_mapping()
+        yield {
+            "event": "reasoning_complete",
+            "slides": len(self.slide_structures),
+            "reused": self.reused_reasoning,
+        }
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.presentation.save(self._output_path("normalized"))
+        partial_path = self._output_path("partial")
+
+        slide_structures = [
+            self._extract_slide_data_for_generation(slide_content.model_dump())
+            for slide_content in self.updated_mapping.slides
+        ]
+        total = len(slide_structures)
+        events: asyncio.Queue = asyncio.Queue()
+        apply_lock = asyncio.Lock()
+        results: Dict[int, Dict[str, Any]] = {}
+        unsaved = 0
+        saved_at = 0.0
+
+        async def run_slide(slide_data: Dict[str, Any]):
+            nonlocal unsaved, saved_at
+            slide_num = slide_data["slide"]
+            try:
+                generated = await self._stream_slide_content(slide_data, events.put_nowait)
+                async with apply_lock:
+                    self._merge_slide(generated)
+                    results[slide_num] = generated
+                    completed = len(results)
+                    unsaved += 1
+                    save = (
+                        unsaved >= PARTIAL_SAVE_EVERY_SLIDES
+                        or time.monotonic() - saved_at >= PARTIAL_SAVE_INTERVAL_SECONDS
+                    ) and completed < total
+                    await asyncio.to_thread(self._apply_slide, slide_num, partial_path if save else None)
+                    if save:
+                        unsaved = 0
+                        saved_at = time.monotonic()
+                events.put_nowait({
+                    "event": "slide_complete",
+                    "slide": slide_num,
+                    "completed": completed,
+                    "total": total,
+                    "partial_pptx": partial_path if save else None,
+                })
+            except Exception as e:
+                print(f"Exception in slide {slide_num}: {e}")
+                events.put_nowait({"event": "slide_failed", "slide": slide_num, "error": str(e)})
+
+        async def run_all():
+            try:
+                await asyncio.gather(*(run_slide(slide_data) for slide_data in slide_structures))
+            finally:
+                events.put_nowait(None)
+
+        async with self._shared_context():
+            runner = asyncio.create_task(run_all())
+            try:
+                while True:
+                    event = await events.get()
+                    if event is None:
+                        break
+                    yield event
+                await runner
+            finally:
+                if not runner.done():
+                    runner.cancel()
+                    await asyncio.gather(runner, return_exceptions=True)
+
+        self.generated_content = [results[slide["slide"]] for slide in slide_structures if slide["slide"] in results]
+        self._report_context()
+        self.merged_mapping = self.updated_mapping
+        self._export_final_structure()
+        yield {"event": "complete", "result": self._save_outputs(applied=True), "context": self.context_stats()}
+
+    async def _stream_slide_content(
+        self,
+        slide_data: Dict[str, Any],
+        emit: Callable[[Dict[str, Any]], None]
+    ) -> Dict[str, Any]:
+        """
+        Generate content for a single slide with a streaming request.
+
+        Args:
+            slide_data: Cleaned slide data without original_content
+            emit: Receives an "element" event per completed element
+
+        Returns:
+            Generated content (a fallback structure if generation fails)
+        """
+        print(f"Streaming slide {slide_data['slide']}")
+
+        parser = JSONStreamParser(array_keys=("content", "charts"))
+        try:
+            async for chunk in vertexai_model_stream(
+                system=CONTENT_GENERATION_PROMPT,
+                user=self._generation_input(slide_data),
+                schema=CONTENT_GENERATION_SCHEMA,
+                cache=CACHE_GENERATED_CONTENT,
+                cached_context=self._cached_context,
+                **stage_model_kwargs("generation", GENERATION_MODEL_KWARGS)
+            ):
+                for kind, element in parser.feed(chunk):
+                    emit({
+                        "event": "element",
+                        "slide": slide_data["slide"],
+                        "kind": kind,
+                        "uuid": element.get("uuid"),
+                    })
+            return parser.result()
+
+        except Exception as e:
+            print(f"Error generating content for slide {slide_data.get('slide', 'unknown')}: {e}")
+            # Return fallback structure
+            return {
+                "slide": slide_data.get("slide", 0),
+                "description": slide_data.get("description", "Error generating content"),
+                "content": []
+            }
+
+    def _apply_slide(self, slide_num: int, partial_path: Optional[str] = None) -> None:
+        """Apply one merged slide to the deck; with partial_path, atomically replace the partial deck."""
+        slide_contents = [slide for slide in self.updated_mapping.slides if slide.slide == slide_num]
+        mapping = PresentationMapping(slides=slide_contents)
+        if partial_path is None:
+            apply_content_to_presentation(self.presentation, mapping, save=False)
+            return
+        tmp_path = f"{partial_path}.tmp"
+        apply_content_to_presentation(self.presentation, mapping, tmp_path)
+        os.replace(tmp_path, partial_path)
+
     async def _normalize_presentation(self) -> None:
         """Load and normalize the presentation content."""
         self.presentation, self.content_mapping = normalize_presentation(self.pptx_path)
@@ -73,9 +492,48 @@ class PresentationProcessor:
         self.slide_structures = export_slide_structure(self.content_mapping)
 
     async def _process_slides_with_reasoning(self) -> None:
-        """Process all slides concurrently with reasoning."""
-        tasks = [self._generate_content_description(slide_data) for slide_data in self.slide_structures]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        """
+        Process all slides concurrently with reasoning.
+
+        Slides whose reasoning was stored at ingestion reuse it; only the rest
+        go through the reasoning pass, packed several per request when
+        SLIDE_PROMPT_PACKING is on. Reasoning computed here is kept in
+        computed_reasoning so callers can store it.
+        """
+        slides_by_number = {slide.slide: slide for slide in self.content_mapping.slides}
+
+        results: List[Any] = [None] * len(self.slide_structures)
+        pending = []
+        for i, slide_data in enumerate(self.slide_structures):
+            slide_content = slides_by_number.get(slide_data["slide"])
+            stored = self.template_reasoning.get(slide_data["slide"])
+            reused = reasoning_from_stored(slide_content, stored) if slide_content and stored else None
+            if reused:
+                self.reused_reasoning += 1
+                results[i] = reused
+            else:
+                pending.append(i)
+
+        if self.template_reasoning:
+            print(f"Reused stored reasoning for {self.reused_reasoning}/{len(self.slide_structures)} slides")
+
+        pending_slides = [self.slide_structures[i] for i in pending]
+        if PACK_SLIDE_PROMPTS:
+            try:
+                computed = await generate_content_reasoning_batch(pending_slides, packed=True)
+            except Exception as e:
+                computed = [e] * len(pending_slides)
+        else:
+            tasks = [self._generate_content_description(slide_data) for slide_data in pending_slides]
+            computed = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for i, result in zip(pending, computed):
+            results[i] = result
+            slide_content = slides_by_number.get(self.slide_structures[i]["slide"])
+            if slide_content and isinstance(result, ContentReasoningResponse):
+                reasoning = build_slide_reasoning(slide_content, result)
+                if reasoning:
+                    self.computed_reasoning[slide_content.slide] = reasoning
 
         valid_results = []
         for i, result in enumerate(results):
@@ -102,42 +560,7 @@ class PresentationProcessor:
         Returns:
             ContentReasoningResponse with reasoning content descriptions
         """
-        try:
-            slide_json = json.dumps(slide_data, indent=2, ensure_ascii=False)
-
-            response_text = await vertexai_model(
-                system=CONTENT_REASONING_PROMPT,
-                user=slide_json,
-                temperature=0.2,
-                model="gemini-2.5-flash-preview-09-2025",
-                thinking_config=True,
-                schema=CONTENT_REASONING_SCHEMA,
-                extra_config={
-                    "top_p": 0.3,
-                    "top_k": 20,
-                    "frequency_penalty": 0.1,
-                    "presence_penalty": 0.05,
-                }
-            )
-
-            if slide_data["slide"] == 2:
-                print(response_text)
-
-            response_data = json.loads(response_text)
-
-            return ContentReasoningResponse(
-                slide=response_data["slide"],
-                description=response_data["description"],
-                content=response_data["content"]
-            )
-
-        except Exception as e:
-            print(f"Error processing slide {slide_data.get('slide', 'unknown')}: {e}")
-            return ContentReasoningResponse(
-                slide=slide_data.get("slide", 0),
-                description="Error processing slide",
-                content={}
-            )
+        return await generate_content_reasoning(slide_data)
 
     def _update_content_mapping(self) -> None:
         """Update content mapping with reasoning results."""
@@ -188,21 +611,86 @@ class PresentationProcessor:
             "content": cleaned_content
         }
 
-    async def _generate_slide_content(self, slide_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _index(self) -> DocumentIndex:
+        if self._document_index is None:
+            # Chunked and indexed once per job
+            self._document_index = DocumentIndex(self.documents)
+        return self._document_index
+
+    def _with_header(self, documents: str) -> str:
+        if self.context_header:
+            return f"{self.context_header}\n\nContext:\n{documents}"
+        return documents
+
+    def _slide_documents(self, slide_data: Dict[str, Any]) -> str:
+        """Documents for one slide: the header plus all or the most relevant passages."""
+        if not self.select_context:
+            documents = self.documents
+        else:
+            query = " ".join([
+                slide_data.get("description") or "",
+                self.slide_guidelines.get(slide_data["slide"], ""),
+                *(item.get("content_description") or "" for item in slide_data["content"].values()),
+            ]).strip() or self.user_input
+            documents = self._index().select(query)
+
+        return self._with_header(documents)
+
+    def _shared_prefix(self) -> Optional[str]:
         """
-        Generate content for a single slide using AI reasoning.
-
-        Args:
-            slide_data: Cleaned slide data without original_content
+        Prompt prefix shared by every slide's generation call.
 
         Returns:
-            Generated content with styling decisions
+            User input and documents, or None when slides get different
+            document passages
         """
+        if self.select_context and not self._index().fits_budget:
+            return None
+        return f"""
+<user_input>
+{self.user_input}
+</user_input>
 
-        print(f"Processing slide {slide_data['slide']}")
+<documents>
+{self._with_header(self.documents)}
+</documents>
 
-        try:
-            input_data = f"""
+"""
+
+    @contextlib.asynccontextmanager
+    async def _shared_context(self):
+        """
+        Cache the shared prompt prefix for this job's generation calls.
+
+        While active, prompts carry only the slide data and are sent against
+        the cached context (see models.context_cache); it is deleted on exit.
+        """
+        prefix = self._shared_prefix()
+        if prefix is None:
+            yield
+            return
+
+        model = stage_model_kwargs("generation")["model"]
+        async with get_context_cache_manager().session(model, CONTENT_GENERATION_PROMPT, prefix) as cached_context:
+            self._cached_context = cached_context
+            try:
+                yield
+            finally:
+                self._cached_context = None
+
+    def context_stats(self) -> Optional[Dict[str, Any]]:
+        """Document tokens sent with and without per-slide selection (None before generation)."""
+        return self._document_index.stats() if self._document_index else None
+
+    def _generation_input(self, slide_data: Dict[str, Any]) -> str:
+        """Build the content generation prompt for one slide (the suffix when the prefix is cached)."""
+        if self._cached_context:
+            return f"""<slide_data>
+{json.dumps(slide_data, indent=2, ensure_ascii=False)}
+</slide_data>
+"""
+
+        return f"""
 <user_input>
 {self.user_input}
 </user_input>
@@ -212,31 +700,48 @@ class PresentationProcessor:
 </slide_data>
 
 <documents>
-{self.documents}
+{self._slide_documents(slide_data)}
 </documents>
 
             """
 
+    async def _generate_slide_content(self, slide_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate content for a single slide using AI reasoning.
+
+        Args:
+            slide_data: Cleaned slide data without original_content
+
+        Returns:
+            Generated content with styling decisions
+        """
+
+        print(f"Processing slide {slide_data['slide']}")
+
+        user_prompt = self._generation_input(slide_data)
+
+        async def call(model_kwargs: Dict[str, Any]) -> Dict[str, Any]:
             response_text = await vertexai_model(
                 system=CONTENT_GENERATION_PROMPT,
-                user=input_data,
-                temperature=0.65,
-                model="gemini-2.5-flash-preview-09-2025",
+                user=user_prompt,
                 schema=CONTENT_GENERATION_SCHEMA,
-                thinking_config=True,
-                extra_config={
-                    "top_p": 0.85,
-                    "top_k": 40,
-                    "frequency_penalty": 0.15,
-                    "presence_penalty": 0.1,
-                }
+                cache=CACHE_GENERATED_CONTENT,
+                cached_context=self._cached_context,
+                **model_kwargs
             )
 
             if slide_data["slide"] == 2:
                 print(response_text)
 
-            response_data = json.loads(response_text)
-            return response_data
+            return json.loads(response_text)
+
+        try:
+            return await get_stage_router().run(
+                "generation",
+                call,
+                validate=lambda result: isinstance(result.get("content"), list),
+                base=GENERATION_MODEL_KWARGS
+            )
 
         except Exception as e:
             print(f"Error generating content for slide {slide_data.get('slide', 'unknown')}: {e}")
@@ -255,9 +760,10 @@ class PresentationProcessor:
             slide_structures.append(slide_data)
 
         # Process all slides concurrently
-        tasks = [self._generate_slide_content(slide_data) for slide_data in slide_structures]
+        async with self._shared_context():
+            tasks = [self._generate_slide_content(slide_data) for slide_data in slide_structures]
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = await asyncio.gather(*tasks, return_exceptions=True)
 
         valid_results = []
         for i, result in enumerate(results):
@@ -274,25 +780,79 @@ class PresentationProcessor:
                 valid_results.append(result)
 
         self.generated_content = valid_results
+        self._report_context()
+
+    def _report_context(self) -> None:
+        stats = self.context_stats()
+        if stats:
+            print(
+                f"Document context: {stats['tokens_with_selection']} tokens sent "
+                f"instead of {stats['tokens_without_selection']} ({stats['saved_ratio']:.0%} saved, "
+                f"{stats['chunks']} chunks)"
+            )
 
     def _merge_generated_content(self) -> None:
         """Merge generated content back into the presentation structure."""
         for generated_slide in self.generated_content:
-            slide_num = generated_slide["slide"]
+            self._merge_slide(generated_slide)
 
-            # Find corresponding slide in mapping
-            for slide_content in self.updated_mapping.slides:
-                if slide_content.slide == slide_num:
-                    if not slide_content.description:
-                        slide_content.description = generated_slide["description"]
+        self.merged_mapping = self.updated_mapping
 
-                    # Handle regular content components
-                    for component_data in generated_slide["content"]:
-                        uuid = component_data["uuid"]
+    def _merge_slide(self, generated_slide: Dict[str, Any]) -> None:
+        """Merge one slide's generated content into the content mapping."""
+        slide_num = generated_slide["slide"]
+
+        # Find corresponding slide in mapping
+        for slide_content in self.updated_mapping.slides:
+            if slide_content.slide == slide_num:
+                if not slide_content.description:
+                    slide_content.description = generated_slide["description"]
+
+                # Handle regular content components
+                for component_data in generated_slide["content"]:
+                    uuid = component_data["uuid"]
+
+                    if uuid in slide_content.content:
+                        existing_item = slide_content.content[uuid]
+
+                        updated_item = ContentItem(
+                            original_content=existing_item.original_content,
+                            content_type=existing_item.content_type,
+                            position=existing_item.position,
+                            size=existing_item.size,
+                            font=existing_item.font,
+                            content_description=existing_item.content_description,
+                            content=component_data["content"],
+                            table_style=existing_item.table_style,  # Preserve table styling
+                        )
+
+                        slide_content.content[uuid] = updated_item
+
+                # Handle chart components separately
+                if "charts" in generated_slide:
+                    for chart_data in generated_slide["charts"]:
+
+                        print(chart_data)
+                        
+                        uuid = chart_data["uuid"]
 
                         if uuid in slide_content.content:
+
                             existing_item = slide_content.content[uuid]
 
+                            chart_content = chart_data["content"]
+                            categories = chart_data.get("categories", [])
+                            series_list = []
+
+                            for series in chart_content["series"]:
+                                series_obj = ChartSeries(
+                                    name=series["name"],
+                                    values=series["values"]
+                                )
+                                series_list.append(series_obj)
+
+                            chart_metadata = ChartMetadata(series=series_list, categories=categories)
+
                             updated_item = ContentItem(
                                 original_content=existing_item.original_content,
                                 content_type=existing_item.content_type,
@@ -300,70 +860,37 @@ class PresentationProcessor:
                                 size=existing_item.size,
                                 font=existing_item.font,
                                 content_description=existing_item.content_description,
-                                content=component_data["content"],
-                                table_style=existing_item.table_style,  # Preserve table styling
+                                content=chart_metadata,
                             )
 
                             slide_content.content[uuid] = updated_item
 
-                    # Handle chart components separately
-                    if "charts" in generated_slide:
-                        for chart_data in generated_slide["charts"]:
-
-                            print(chart_data)
-                            
-                            uuid = chart_data["uuid"]
-
-                            if uuid in slide_content.content:
-
-                                existing_item = slide_content.content[uuid]
-
-                                chart_content = chart_data["content"]
-                                categories = chart_data.get("categories", [])
-                                series_list = []
-
-                                for series in chart_content["series"]:
-                                    series_obj = ChartSeries(
-                                        name=series["name"],
-                                        values=series["values"]
-                                    )
-                                    series_list.append(series_obj)
-
-                                chart_metadata = ChartMetadata(series=series_list, categories=categories)
-
-                                updated_item = ContentItem(
-                                    original_content=existing_item.original_content,
-                                    content_type=existing_item.content_type,
-                                    position=existing_item.position,
-                                    size=existing_item.size,
-                                    font=existing_item.font,
-                                    content_description=existing_item.content_description,
-                                    content=chart_metadata,
-                                )
-
-                                slide_content.content[uuid] = updated_item
-
-        self.merged_mapping = self.updated_mapping
-
     def _export_final_structure(self) -> None:
         """Export the final merged structure."""
         self.final_structure = export_slide_structure(self.merged_mapping)
 
-    def _save_outputs(self) -> Dict[str, str]:
-        """Save all output files and return their paths."""
+    def _output_path(self, suffix: str) -> str:
+        base_name = os.path.splitext(os.path.basename(self.pptx_path))[0]
+        return os.path.join(self.output_dir, f"{base_name}_{suffix}.pptx")
+
+    def _save_outputs(self, applied: bool = False) -> Dict[str, str]:
+        """
+        Save all output files and return their paths.
+
+        Args:
+            applied: Content was already applied slide by slide (streaming),
+                and the normalized deck saved before that
+        """
         os.makedirs(self.output_dir, exist_ok=True)
 
         # Save structure.json
         structure_path = os.path.join(self.output_dir, "structure.json")
         save_structure_to_file(self.final_structure, structure_path)
 
-        base_name = os.path.splitext(os.path.basename(self.pptx_path))[0]
-
-        normalized_pptx_path = os.path.join(self.output_dir, f"{base_name}_normalized.pptx")
-        self.presentation.save(normalized_pptx_path)
-        
-        generated_pptx_path = os.path.join(self.output_dir, f"{base_name}_generated.pptx")
-        apply_content_to_presentation(self.presentation, self.merged_mapping, generated_pptx_path)
+        generated_pptx_path = self._output_path("generated")
+        if not applied:
+            self.presentation.save(self._output_path("normalized"))
+            apply_content_to_presentation(self.presentation, self.merged_mapping, generated_pptx_path)
         
         clear_all_alt_text(self.presentation)
         
@@ -0,0 +1,316 @@
+"""
+Slide Library Snapshots
+
+Exports a slide library (MongoDB metadata, Qdrant vectors and payloads and,
+optionally, the S3 objects they reference) to one versioned archive and
+bulk-loads such an archive into empty backends. Restoring a snapshot never
+calls an LLM or the embedding API, so it is bounded by I/O.
+
+Archive layout (plain tar; the JSON members are individually gzipped):
+- documents/NNNNNN.jsonl.gz   MongoDB documents as Extended JSON, one per line
+- vectors/NNNNNN.jsonl.gz     Qdrant points: {"id", "vector", "payload"}
+- objects/<s3 key>            Raw object bytes (with include_objects)
+- manifest.json               Format version, source names and counts (last)
+
+Run with `python snapshot.py export|import`.
+"""
+
+import asyncio
+import gzip
+import io
+import json
+import logging
+import tarfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+from bson import json_util
+
+from core.storage import SlideStorageAdapter
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "slide-library-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Records per archive member (and per insert_many / upsert on import)
+SNAPSHOT_CHUNK_SIZE = 1000
+
+# Objects fetched or uploaded per batch
+SNAPSHOT_OBJECT_BATCH = 64
+
+# Concurrent backend writes during import
+SNAPSHOT_IMPORT_CONCURRENCY = 8
+
+
+def _add_member(archive: tarfile.TarFile, name: str, data: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(datetime.now(timezone.utc).timestamp())
+    archive.addfile(info, io.BytesIO(data))
+
+
+def _jsonl_gz(lines: Iterable[str]) -> bytes:
+    return gzip.compress("\n".join(lines).encode("utf-8"), compresslevel=6)
+
+
+def _document_keys(doc: Dict[str, Any]) -> Set[str]:
+    """S3 keys a slide document references."""
+    storage_ref = doc.get("storage_ref") or {}
+    keys = {part["key"] for part in storage_ref.get("parts", [])}
+    if storage_ref.get("s3_key"):
+        keys.add(storage_ref["s3_key"])
+    if doc.get("preview"):
+        keys.add(doc["preview"])
+    return keys
+
+
+class LibrarySnapshot:
+    """
+    Snapshot export and import for one (tenant's) slide library.
+    """
+
+    def __init__(self, storage: SlideStorageAdapter, chunk_size: int = SNAPSHOT_CHUNK_SIZE):
+        """
+        Initialize snapshot helper.
+
+        Args:
+            storage: Initialized storage adapter
+            chunk_size: Records per archive member
+        """
+        self.storage = storage
+        self.chunk_size = chunk_size
+
+    def _slides(self):
+        return self.storage.mongo.get_collection(
+            self.storage.collection_name,
+            database_name=self.storage.database_name
+        )
+
+    async def export(self, archive_path: Path, include_objects: bool = False) -> Dict[str, Any]:
+        """
+        Write the library to a snapshot archive.
+
+        Documents and points are streamed in chunks, so memory stays bounded
+        by the chunk size. The archive is written to a temporary name and
+        renamed once complete.
+
+        Args:
+            archive_path: Destination .tar path
+            include_objects: Also copy every referenced S3 object
+
+        Returns:
+            Manifest written to the archive
+        """
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = archive_path.with_name(archive_path.name + ".partial")
+
+        counts = {"documents": 0, "vectors": 0, "objects": 0, "object_bytes": 0}
+        object_keys: Set[str] = set()
+
+        with tarfile.open(tmp_path, "w") as archive:
+            # MongoDB documents
+            chunk: List[str] = []
+            member = 0
+            async for doc in self._slides().find({}, sort=[("_id", 1)]):
+                chunk.append(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS))
+                object_keys.update(_document_keys(doc))
+                if len(chunk) >= self.chunk_size:
+                    _add_member(archive, f"documents/{member:06d}.jsonl.gz", _jsonl_gz(chunk))
+                    counts["documents"] += len(chunk)
+                    member += 1
+                    chunk = []
+            if chunk:
+                _add_member(archive, f"documents/{member:06d}.jsonl.gz", _jsonl_gz(chunk))
+                counts["documents"] += len(chunk)
+            print(f"Exported {counts['documents']} documents")
+
+            # Qdrant points with vectors and payloads
+            offset = None
+            member = 0
+            while True:
+                points, offset = await self.storage.qdrant.client.scroll(
+                    collection_name=self.storage.qdrant_collection,
+                    limit=self.chunk_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                if points:
+                    lines = [
+                        json.dumps({"id": str(point.id), "vector": point.vector, "payload": point.payload})
+                        for point in points
+                    ]
+                    _add_member(archive, f"vectors/{member:06d}.jsonl.gz", _jsonl_gz(lines))
+                    counts["vectors"] += len(points)
+                    member += 1
+                if offset is None:
+                    break
+            print(f"Exported {counts['vectors']} vectors")
+
+            # Referenced S3 objects
+            if include_objects:
+                keys = sorted(object_keys)
+                for start in range(0, len(keys), SNAPSHOT_OBJECT_BATCH):
+                    objects = await self.storage.s3.get_objects(keys[start:start + SNAPSHOT_OBJECT_BATCH])
+                    for key, data in objects.items():
+                        _add_member(archive, f"objects/{key}", data)
+                        counts["objects"] += 1
+                        counts["object_bytes"] += len(data)
+                print(f"Exported {counts['objects']} objects ({counts['object_bytes']} bytes)")
+
+            manifest = {
+                "format": SNAPSHOT_FORMAT,
+                "version": SNAPSHOT_VERSION,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "tenant_id": self.storage.tenant_id,
+                "key_prefix": self.storage.key_prefix,
+                "collection": self.storage.collection_name,
+                "qdrant_collection": self.storage.qdrant_collection,
+                "include_objects": include_objects,
+                "counts": counts,
+            }
+            _add_member(archive, "manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+
+        tmp_path.replace(archive_path)
+        print(f"Snapshot written: {archive_path}")
+        return manifest
+
+    @staticmethod
+    def read_manifest(archive_path: Path) -> Dict[str, Any]:
+        """
+        Read and validate a snapshot manifest.
+
+        Raises:
+            ValueError: If the archive is not a supported snapshot
+        """
+        with tarfile.open(archive_path, "r") as archive:
+            try:
+                manifest = json.load(archive.extractfile("manifest.json"))
+            except KeyError:
+                raise ValueError(f"Not a slide library snapshot: {archive_path}") from None
+
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Not a slide library snapshot: {archive_path}")
+        if manifest.get("version", 0) > SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+        return manifest
+
+    async def _ensure_empty(self):
+        if await self._slides().find_one({}, projection={"_id": 1}):
+            raise ValueError(f"MongoDB collection {self.storage.collection_name} is not empty")
+
+        info = await self.storage.qdrant.client.get_collection(self.storage.qdrant_collection)
+        if info.points_count:
+            raise ValueError(f"Qdrant collection {self.storage.qdrant_collection} is not empty")
+
+    async def restore(
+        self,
+        archive_path: Path,
+        concurrency: int = SNAPSHOT_IMPORT_CONCURRENCY,
+        include_objects: bool = True
+    ) -> Dict[str, int]:
+        """
+        Bulk-load a snapshot into empty backends.
+
+        The archive is read sequentially while document inserts, point
+        upserts and object uploads run concurrently (bounded by concurrency).
+
+        Args:
+            archive_path: Snapshot .tar path
+            concurrency: Maximum concurrent backend writes
+            include_objects: Upload objects contained in the archive
+
+        Returns:
+            Counts of restored documents, vectors and objects
+
+        Raises:
+            ValueError: If the archive is invalid, was taken from another
+                tenant's key space, or the target backends are not empty
+        """
+        from qdrant_client.models import PointStruct
+
+        manifest = self.read_manifest(archive_path)
+        if manifest.get("key_prefix", "") != self.storage.key_prefix:
+            raise ValueError(
+                f"Snapshot was taken for tenant {manifest.get('tenant_id')!r}; "
+                f"restore it into the same tenant"
+            )
+        await self._ensure_empty()
+
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks: List[asyncio.Task] = []
+        counts = {"documents": 0, "vectors": 0, "objects": 0}
+
+        async def insert_documents(docs: List[Dict[str, Any]]):
+            async with semaphore:
+                await self._slides().insert_many(docs, ordered=False)
+            counts["documents"] += len(docs)
+
+        async def upsert_points(points: List[PointStruct]):
+            async with semaphore:
+                await self.storage.qdrant.client.upsert(
+                    collection_name=self.storage.qdrant_collection,
+                    points=points
+                )
+            counts["vectors"] += len(points)
+
+        async def upload_objects(objects: Dict[str, bytes]):
+            async with semaphore:
+                await self.storage.s3.put_objects(objects)
+            counts["objects"] += len(objects)
+
+        def schedule(coro):
+            tasks.append(asyncio.create_task(coro))
+
+        pending_objects: Dict[str, bytes] = {}
+
+        try:
+            with tarfile.open(archive_path, "r") as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+                    name = member.name
+                    data = archive.extractfile(member).read()
+
+                    if name.startswith("documents/"):
+                        lines = gzip.decompress(data).decode("utf-8").splitlines()
+                        docs = [json_util.loads(line) for line in lines if line]
+                        schedule(insert_documents(docs))
+                    elif name.startswith("vectors/"):
+                        lines = gzip.decompress(data).decode("utf-8").splitlines()
+                        points = [
+                            PointStruct(id=record["id"], vector=record["vector"], payload=record["payload"])
+                            for record in map(json.loads, filter(None, lines))
+                        ]
+                        schedule(upsert_points(points))
+                    elif name.startswith("objects/") and include_objects:
+                        pending_objects[name[len("objects/"):]] = data
+                        if len(pending_objects) >= SNAPSHOT_OBJECT_BATCH:
+                            schedule(upload_objects(pending_objects))
+                            pending_objects = {}
+
+                    # Keep the amount of buffered archive data bounded
+                    if len(tasks) >= concurrency * 2:
+                        await asyncio.gather(*tasks)
+                        tasks = []
+
+            if pending_objects:
+                schedule(upload_objects(pending_objects))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        self.storage.metadata_cache.clear()
+        await self.storage._bump_version()
+
+        expected = manifest.get("counts", {})
+        for category in ("documents", "vectors"):
+            if counts[category] != expected.get(category, counts[category]):
+                print(f"Warning: restored {counts[category]} {category}, snapshot lists {expected[category]}")
+
+        print(f"Snapshot restored: {counts}")
+        return counts
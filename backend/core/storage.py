@@ -2,26 +2,190 @@
 Slide Library Storage Adapter
 
 Wraps storage services (MongoDB, S3, Qdrant) for slide library operations.
-Provides atomic storage with rollback on failure.
+Writes to the three backends run concurrently under a write intent and are
+compensated on failure; see core.reconciliation for crash recovery.
 """
 
+import asyncio
+import base64
+import json
 import logging
+import os
+import re
+import shutil
+import time
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 from datetime import datetime
 
-from utils.schemas import SlideLibraryMetadata, StorageReference
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+
+from utils.schemas import PackagePart, SlideLibraryMetadata, SlideReasoning, SlideStorageItem, StorageReference
 
 # Import new modular storage services
-from storage import get_mongo_service, get_s3_service, get_qdrant_service
+from storage import (
+    get_mongo_service,
+    get_s3_service,
+    get_qdrant_service,
+    get_local_document_store,
+    get_local_blob_store,
+    get_local_qdrant_service,
+    calculate_file_hash,
+)
+from core.cache import SlideMetadataCache, CACHE_VERSION_POLL_SECONDS
+from core.packages import assemble_package, split_package
+from core.popularity import SlidePopularityTracker
 
 logger = logging.getLogger(__name__)
 
 # Database and collection names
 MONGODB_DATABASE = "slide_library"
 MONGODB_COLLECTION = "slides"
+MONGODB_INTENTS_COLLECTION = "slide_write_intents"
+MONGODB_STATE_COLLECTION = "library_state"  # Per-collection write version counters
+MONGODB_POPULARITY_COLLECTION = "slide_popularity"
 QDRANT_COLLECTION = "slide_library"
 
+# "remote" uses MongoDB/S3/Qdrant servers, "local" uses embedded stores under LOCAL_STORAGE_DIR
+STORAGE_BACKEND = os.getenv("SLIDE_STORAGE_BACKEND", "remote")
+
+# "parts" stores slide packages as manifests of shared content-addressed
+# parts, "whole" stores one object per slide PPTX
+PACKAGE_STORAGE = os.getenv("SLIDE_PACKAGE_STORAGE", "parts")
+
+# Local cache of immutable, content-addressed S3 objects (package parts,
+# slide files, previews) named by content hash; entries never go stale
+OBJECT_CACHE_DIR = Path(os.getenv("SLIDE_OBJECT_CACHE_DIR", "temp/objects"))
+
+# Size cap of the object cache; least recently used entries are evicted
+# past it (0 disables the cap)
+OBJECT_CACHE_MAX_BYTES = int(os.getenv("SLIDE_OBJECT_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# Indexes for the slide collection, applied on every startup
+SLIDE_INDEXES = [
+    IndexModel([("slide_id", ASCENDING)], name="slide_id_unique", unique=True),
+    IndexModel([("file_hash", ASCENDING)], name="file_hash_unique", unique=True),
+    # Serves the /slides listing sorted by recency
+    IndexModel([("updated_at", DESCENDING), ("slide_id", DESCENDING)], name="updated_at_desc"),
+    # Reference checks for shared, content-addressed S3 objects
+    IndexModel([("storage_ref.s3_key", ASCENDING)], name="s3_key"),
+    IndexModel([("preview", ASCENDING)], name="preview", sparse=True),
+    IndexModel([("storage_ref.parts.key", ASCENDING)], name="part_keys"),
+    # Facets
+    IndexModel([("source_presentation", ASCENDING), ("slide_index", ASCENDING)], name="source_presentation"),
+    IndexModel([("tags", ASCENDING)], name="tags"),
+]
+
+# Indexes for pending write intents (scanned by age by the reconciliation sweeper)
+INTENT_INDEXES = [
+    IndexModel([("created_at", ASCENDING)], name="created_at"),
+]
+
+# Representative queries issued against the slide collection: (name, filter, sort)
+SLIDE_QUERY_SHAPES = [
+    ("get_slide_by_id", {"slide_id": "probe"}, None),
+    ("slide_exists_by_hash", {"file_hash": "probe"}, None),
+    ("list_slides", {}, [("updated_at", -1), ("slide_id", -1)]),
+    (
+        "list_slides_page",
+        {"$or": [
+            {"updated_at": {"$lt": datetime(2000, 1, 1)}},
+            {"updated_at": datetime(2000, 1, 1), "slide_id": {"$lt": "probe"}},
+        ]},
+        [("updated_at", -1), ("slide_id", -1)],
+    ),
+    (
+        "key_referenced",
+        {"$or": [{"storage_ref.s3_key": "probe"}, {"preview": "probe"}, {"storage_ref.parts.key": "probe"}]},
+        None,
+    ),
+    ("known_parts", {"storage_ref.parts.key": {"$in": ["probe"]}}, None),
+    ("by_source_presentation", {"source_presentation": "probe"}, [("slide_index", 1)]),
+    ("by_tag", {"tags": "probe"}, None),
+]
+
+# Tenant ids become part of collection names and S3 key prefixes
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+# Listing page size bounds
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 200
+
+# Batch storage tuning
+UPLOAD_CONCURRENCY = 8
+QDRANT_UPSERT_BATCH_SIZE = 64
+
+
+def prune_object_cache(max_bytes: int = OBJECT_CACHE_MAX_BYTES) -> int:
+    """
+    Evict least recently used object cache entries until the cache fits max_bytes.
+    
+    Entries are touched on every hit, so their mtime is the last access time
+    (atime is unreliable on noatime/relatime mounts).
+    
+    Returns:
+        Number of entries removed
+    """
+    if max_bytes <= 0 or not OBJECT_CACHE_DIR.exists():
+        return 0
+    
+    entries = []
+    total = 0
+    for path in OBJECT_CACHE_DIR.iterdir():
+        # Skip writes in progress
+        if path.suffix == ".tmp":
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def validate_tenant_id(tenant_id: str) -> str:
+    """
+    Normalize and validate a tenant id.
+    
+    Raises:
+        ValueError: If the id is not 1-63 lowercase letters, digits, '-' or '_'
+    """
+    normalized = tenant_id.strip().lower()
+    if not TENANT_ID_PATTERN.match(normalized):
+        raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+    return normalized
+
+
+def encode_list_cursor(updated_at: datetime, slide_id: str) -> str:
+    """Encode a listing position as an opaque continuation token."""
+    raw = json.dumps({"u": updated_at.isoformat(), "s": slide_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_list_cursor(token: str) -> Tuple[datetime, str]:
+    """
+    Decode a continuation token produced by encode_list_cursor.
+    
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["u"]), str(data["s"])
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+
 
 class SlideStorageAdapter:
     """
@@ -30,19 +194,67 @@ class SlideStorageAdapter:
     Wraps storage services and provides atomic operations with rollback.
     All slides are stored in a separate 'slide_library' database to avoid
     contaminating other databases.
+    
+    An adapter bound to a tenant uses its own MongoDB collections, Qdrant
+    collection and S3 key prefix, so searches, listings, caches and garbage
+    collection only ever see that tenant's slides. Without a tenant the
+    original shared names are used.
     """
     
-    def __init__(self):
-        """Initialize storage adapter with storage services."""
-        self.mongo = get_mongo_service()
-        self.s3 = get_s3_service()
-        self.qdrant = get_qdrant_service()
+    def __init__(
+        self,
+        backend: str = STORAGE_BACKEND,
+        mongo=None,
+        s3=None,
+        qdrant=None,
+        tenant_id: Optional[str] = None
+    ):
+        """
+        Initialize storage adapter with storage services.
+        
+        Args:
+            backend: "remote" (MongoDB, S3, Qdrant servers) or "local"
+                (SQLite, filesystem, embedded Qdrant)
+            mongo: Document store overriding the backend default
+            s3: Blob store overriding the backend default
+            qdrant: Vector store overriding the backend default
+            tenant_id: Partition the library for this tenant
+        
+        Raises:
+            ValueError: If the backend or tenant id is invalid
+        """
+        if backend == "local":
+            defaults = (get_local_document_store, get_local_blob_store, get_local_qdrant_service)
+        elif backend == "remote":
+            defaults = (get_mongo_service, get_s3_service, get_qdrant_service)
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        
+        self.backend = backend
+        self.mongo = mongo or defaults[0]()
+        self.s3 = s3 or defaults[1]()
+        self.qdrant = qdrant or defaults[2]()
+        
+        self.tenant_id = validate_tenant_id(tenant_id) if tenant_id else None
+        suffix = f"__{self.tenant_id}" if self.tenant_id else ""
         
         self.database_name = MONGODB_DATABASE
-        self.collection_name = MONGODB_COLLECTION
-        self.qdrant_collection = QDRANT_COLLECTION
+        self.collection_name = MONGODB_COLLECTION + suffix
+        self.intents_collection_name = MONGODB_INTENTS_COLLECTION + suffix
+        self.state_collection_name = MONGODB_STATE_COLLECTION
+        
+        self.metadata_cache = SlideMetadataCache()
+        self._cache_checked_at = 0.0
+        self.qdrant_collection = QDRANT_COLLECTION + suffix
+        self.popularity = SlidePopularityTracker(self, MONGODB_POPULARITY_COLLECTION + suffix)
+        
+        # Prepended to every S3 key this adapter writes
+        self.key_prefix = f"tenants/{self.tenant_id}/" if self.tenant_id else ""
         
-        print(f"SlideStorageAdapter initialized (database: {self.database_name})")
+        print(
+            f"SlideStorageAdapter initialized (database: {self.database_name}, "
+            f"collection: {self.collection_name}, backend: {self.backend})"
+        )
     
     async def initialize(self):
         """
@@ -52,6 +264,7 @@ class SlideStorageAdapter:
         """
         # Initialize MongoDB
         await self.mongo.initialize()
+        await self.ensure_indexes()
         
         # Initialize S3
         await self.s3.initialize()
@@ -62,6 +275,51 @@ class SlideStorageAdapter:
         
         print("All storage backends initialized")
     
+    async def ensure_indexes(self):
+        """Apply the declared MongoDB indexes for the slide collection."""
+        names = await self.mongo.ensure_indexes(
+            self.collection_name,
+            SLIDE_INDEXES,
+            database_name=self.database_name
+        )
+        print(f"MongoDB indexes ensured on {self.collection_name}: {', '.join(names)}")
+        await self.mongo.ensure_indexes(
+            self.intents_collection_name,
+            INTENT_INDEXES,
+            database_name=self.database_name
+        )
+        await self.popularity.ensure_indexes()
+    
+    async def check_indexes(self) -> Dict[str, List[str]]:
+        """
+        Report missing indexes and query shapes that fall back to collection scans.
+        
+        Returns:
+            Dict with "missing_indexes" (index names) and "collection_scans"
+            (query shape names whose winning plan contains COLLSCAN)
+        """
+        missing = await self.mongo.missing_indexes(
+            self.collection_name,
+            SLIDE_INDEXES,
+            database_name=self.database_name
+        )
+        
+        collection_scans = []
+        for name, query, sort in SLIDE_QUERY_SHAPES:
+            stages = await self.mongo.explain_plan_stages(
+                self.collection_name,
+                query,
+                sort=sort,
+                database_name=self.database_name
+            )
+            if "COLLSCAN" in stages:
+                collection_scans.append(name)
+        
+        return {
+            "missing_indexes": [index.document["name"] for index in missing],
+            "collection_scans": collection_scans,
+        }
+    
     async def _ensure_qdrant_collection(self):
         """Ensure Qdrant collection exists with correct configuration."""
         try:
@@ -95,12 +353,14 @@ class SlideStorageAdapter:
         embedding: list[float]
     ) -> StorageReference:
         """
-        Store a slide atomically across S3, MongoDB, and Qdrant.
+        Store a slide across S3, MongoDB, and Qdrant.
         
-        If any step fails, all changes are rolled back.
+        The three writes run concurrently under a write intent; if any of
+        them fails, the others are compensated. See store_slides.
         
         Args:
             slide_pptx_path: Path to single-slide PPTX file
+            preview_image_path: Optional path to the PNG preview
             metadata: Slide metadata
             embedding: 1024-dim Voyage embedding vector
             
@@ -110,120 +370,511 @@ class SlideStorageAdapter:
         Raises:
             Exception: If storage fails (after rollback)
         """
-        s3_key = None
-        preview_s3_key = None
-        mongodb_id = None
-        qdrant_id = None
-        
-        try:
-            # Step 1: Upload to S3 (hash-based naming for deduplication)
-            print(f"Uploading slide to S3: {slide_pptx_path.name}")
-            s3_result = await self.s3.upload_file_with_hash(
-                file_path=slide_pptx_path,
-                original_name=slide_pptx_path.name
+        refs = await self.store_slides([
+            SlideStorageItem(
+                slide_pptx_path=slide_pptx_path,
+                preview_image_path=preview_image_path,
+                metadata=metadata,
+                embedding=embedding
             )
-            s3_key = s3_result["s3_key"]
-            print(f"S3 upload successful: {s3_key}")
-
-            if preview_image_path:
-                print(f"Uploading preview to S3: {preview_image_path.name}")
-                preview_result = await self.s3.upload_file_with_hash(
-                    file_path=preview_image_path,
-                    original_name=preview_image_path.name
-                )
-                preview_s3_key = preview_result["s3_key"]
-                print(f"S3 preview upload successful: {preview_s3_key}")
-            
-            # Step 2: Store metadata in MongoDB
-            print(f"Storing metadata in MongoDB (database: {self.database_name})")
-            metadata.preview = preview_s3_key
-            mongo_doc = metadata.model_dump()
-            mongo_doc["storage_ref"] = {
-                "s3_key": s3_key,
-                "mongodb_id": "",  # Will be filled after insert
-                "qdrant_id": metadata.slide_id
-            }
+        ])
+        print(f"Slide stored successfully: {metadata.slide_id}")
+        return refs[0]
+    
+    async def store_slides(
+        self,
+        items: List[SlideStorageItem],
+        upload_concurrency: int = UPLOAD_CONCURRENCY,
+        qdrant_batch_size: int = QDRANT_UPSERT_BATCH_SIZE
+    ) -> List[StorageReference]:
+        """
+        Store a batch of slides across S3, MongoDB, and Qdrant.
+        
+        Every key is content-addressed or pre-generated, so the three backend
+        writes are independent and run concurrently: storage latency is the
+        slowest backend rather than the sum. A write intent recorded first
+        lists everything the batch may create; it is removed once the batch
+        commits or has been compensated. Intents left behind by a crash are
+        repaired or cleaned up by the reconciliation sweeper.
+        
+        S3 objects are uploaded concurrently, metadata is written with a
+        single insert_many using pre-generated ObjectIds, and vectors are
+        upserted in chunks. If any write fails, the whole batch is rolled back.
+        
+        With SLIDE_PACKAGE_STORAGE=parts each PPTX is split into
+        content-addressed parts, so masters, themes and media are stored once.
+        Previews and parts referenced by committed slides are not uploaded
+        again; their existence is re-checked once the intent protects them
+        from garbage collection, and any missing object is uploaded.
+        
+        Args:
+            items: Prepared slides (file paths, metadata and embeddings)
+            upload_concurrency: Maximum concurrent S3 uploads
+            qdrant_batch_size: Points per Qdrant upsert request
             
-            # Insert into MongoDB
-            collection = self.mongo.get_collection(
-                self.collection_name,
-                database_name=self.database_name
-            )
-            result = await collection.insert_one(mongo_doc)
-            mongodb_id = str(result.inserted_id)
+        Returns:
+            StorageReference for each item, in input order
             
-            # Update storage_ref with mongodb_id
-            await collection.update_one(
-                {"_id": result.inserted_id},
-                {"$set": {"storage_ref.mongodb_id": mongodb_id}}
+        Raises:
+            Exception: If storage fails (after rollback)
+        """
+        if not items:
+            return []
+        
+        from qdrant_client.models import PointStruct
+        
+        collection = self.mongo.get_collection(
+            self.collection_name,
+            database_name=self.database_name
+        )
+        
+        # Resolve every key up front: S3 keys are content hashes, MongoDB ids
+        # are pre-generated and Qdrant ids are the slide ids.
+        slide_keys = [
+            self.key_prefix + (item.metadata.file_hash or calculate_file_hash(item.slide_pptx_path))
+            for item in items
+        ]
+        preview_keys = {
+            idx: self.key_prefix + calculate_file_hash(item.preview_image_path)
+            for idx, item in enumerate(items)
+            if item.preview_image_path
+        }
+        
+        # Identical files within the batch share one upload
+        uploads: Dict[str, Path] = {}
+        part_uploads: Dict[str, bytes] = {}
+        manifests: List[List[PackagePart]] = []
+        
+        if PACKAGE_STORAGE == "parts":
+            for item in items:
+                manifest, parts = split_package(item.slide_pptx_path)
+                for part in manifest:
+                    part.key = self.key_prefix + part.key
+                manifests.append(manifest)
+                for key, data in parts.items():
+                    part_uploads.setdefault(self.key_prefix + key, data)
+        else:
+            for item, key in zip(items, slide_keys):
+                uploads.setdefault(key, item.slide_pptx_path)
+        
+        for idx, key in preview_keys.items():
+            uploads.setdefault(key, items[idx].preview_image_path)
+        
+        # Previews and parts referenced by committed slides need no upload
+        committed = await self._committed_keys([*preview_keys.values(), *part_uploads])
+        skipped_uploads = {key: uploads.pop(key) for key in committed if key in uploads}
+        skipped_parts = {key: part_uploads.pop(key) for key in committed if key in part_uploads}
+        
+        docs = []
+        refs = []
+        for idx, (item, s3_key) in enumerate(zip(items, slide_keys)):
+            item.metadata.preview = preview_keys.get(idx)
+            object_id = ObjectId()
+            ref = StorageReference(
+                s3_key="" if manifests else s3_key,
+                mongodb_id=str(object_id),
+                qdrant_id=item.metadata.slide_id,
+                parts=manifests[idx] if manifests else []
             )
-            print(f"MongoDB insert successful: {mongodb_id}")
-            
-            # Step 3: Store in Qdrant
-            print(f"Storing vector in Qdrant (collection: {self.qdrant_collection})")
-            from qdrant_client.models import PointStruct
-            
-            point = PointStruct(
-                id=metadata.slide_id,
-                vector=embedding,
+            doc = item.metadata.model_dump()
+            doc["_id"] = object_id
+            doc["storage_ref"] = ref.model_dump()
+            docs.append(doc)
+            refs.append(ref)
+        
+        points = [
+            PointStruct(
+                id=item.metadata.slide_id,
+                vector=item.embedding,
                 payload={
-                    "slide_id": metadata.slide_id,
-                    "description": metadata.description,
-                    "source_presentation": metadata.source_presentation,
-                    "element_count": metadata.element_count
+                    "slide_id": item.metadata.slide_id,
+                    "description": item.metadata.description,
+                    "source_presentation": item.metadata.source_presentation,
+                    "element_count": item.metadata.element_count
                 }
             )
-            
-            await self.qdrant.client.upsert(
-                collection_name=self.qdrant_collection,
-                points=[point]
+            for item in items
+        ]
+        
+        # Skipped keys are listed too, so GC keeps them while the batch is open
+        intent_id = await self._record_intent(
+            slide_ids=[item.metadata.slide_id for item in items],
+            s3_keys=[*uploads, *part_uploads, *skipped_uploads, *skipped_parts]
+        )
+        
+        # A skipped object may have been collected before the intent was recorded
+        skipped = [*skipped_uploads, *skipped_parts]
+        try:
+            missing = await self.s3.missing_objects(skipped)
+        except Exception as e:
+            print(f"Could not verify {len(skipped)} existing objects, uploading them: {e}")
+            missing = skipped
+        for key in missing:
+            if key in skipped_uploads:
+                uploads[key] = skipped_uploads[key]
+            else:
+                part_uploads[key] = skipped_parts[key]
+        written_keys = [*uploads, *part_uploads]
+        
+        semaphore = asyncio.Semaphore(upload_concurrency)
+        
+        async def upload(s3_key: str, path: Path) -> str:
+            async with semaphore:
+                result = await self.s3.upload_file_with_hash(
+                    file_path=path,
+                    original_name=path.name,
+                    file_hash=s3_key,
+                    check_exists=False
+                )
+            return result["s3_key"]
+        
+        async def write_s3():
+            print(
+                f"Uploading {len(uploads)} files and {len(part_uploads)} package parts "
+                f"to S3 for {len(items)} slides"
             )
-            qdrant_id = metadata.slide_id
-            print(f"Qdrant upsert successful: {qdrant_id}")
-            
-            # Create storage reference
-            storage_ref = StorageReference(
-                s3_key=s3_key,
-                mongodb_id=mongodb_id,
-                qdrant_id=qdrant_id
+            await asyncio.gather(
+                *(upload(key, path) for key, path in uploads.items()),
+                self.s3.put_objects(part_uploads, concurrency=upload_concurrency)
             )
+            print(f"S3 upload successful: {len(written_keys)} objects")
+        
+        async def write_mongo():
+            print(f"Storing {len(docs)} documents in MongoDB (database: {self.database_name})")
+            await collection.insert_many(docs)
+            print(f"MongoDB insert successful: {len(docs)} documents")
+        
+        async def write_qdrant():
+            print(f"Storing {len(points)} vectors in Qdrant (collection: {self.qdrant_collection})")
+            for start in range(0, len(points), qdrant_batch_size):
+                await self.qdrant.client.upsert(
+                    collection_name=self.qdrant_collection,
+                    points=points[start:start + qdrant_batch_size]
+                )
+            print(f"Qdrant upsert successful: {len(points)} points")
+        
+        results = await asyncio.gather(
+            write_s3(),
+            write_mongo(),
+            write_qdrant(),
+            return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        
+        if not errors:
+            for item, ref in zip(items, refs):
+                item.metadata.storage_ref = ref
+            await self._bump_version()
+            for item in items:
+                self.metadata_cache.put(item.metadata)
+            await self._clear_intent(intent_id)
+            print(f"Batch stored successfully: {len(items)} slides")
+            return refs
+        
+        print(f"Storage failed, rolling back {len(items)} slides: {errors[0]}")
+        await self.rollback_slides(slide_ids=[item.metadata.slide_id for item in items])
+        await self._clear_intent(intent_id)
+        raise errors[0]
+    
+    async def _record_intent(self, slide_ids: List[str], s3_keys: List[str]) -> ObjectId:
+        """
+        Record everything a pending write may create.
+        
+        Args:
+            slide_ids: Slide ids (MongoDB documents and Qdrant points)
+            s3_keys: S3 object keys
             
-            print(f"Slide stored successfully: {metadata.slide_id}")
-            return storage_ref
-            
+        Returns:
+            Intent id
+        """
+        intents = self.mongo.get_collection(
+            self.intents_collection_name,
+            database_name=self.database_name
+        )
+        result = await intents.insert_one({
+            "slide_ids": slide_ids,
+            "s3_keys": s3_keys,
+            "created_at": datetime.utcnow(),
+        })
+        return result.inserted_id
+    
+    async def _clear_intent(self, intent_id: ObjectId):
+        """Remove a write intent once its batch has committed or been compensated."""
+        try:
+            await self.mongo.get_collection(
+                self.intents_collection_name,
+                database_name=self.database_name
+            ).delete_one({"_id": intent_id})
         except Exception as e:
-            print(f"Storage failed, rolling back: {e}")
+            # A leftover intent is harmless: the sweeper will find the batch complete
+            print(f"Failed to clear write intent {intent_id}: {e}")
+    
+    async def rollback_slides(self, slide_ids: List[str]):
+        """
+        Undo a partial write in MongoDB and Qdrant.
+        
+        Deletes are idempotent, so this is safe whichever writes succeeded.
+        S3 objects are content-addressed and may be about to be referenced by
+        a concurrent batch, so they are not deleted here: once unreferenced,
+        the reconciliation GC pass removes them after its grace period.
+        
+        Args:
+            slide_ids: Slide ids written by the failed batch
+        """
+        try:
+            await self.qdrant.client.delete(
+                collection_name=self.qdrant_collection,
+                points_selector=slide_ids
+            )
+            print(f"Rolled back Qdrant: {len(slide_ids)} points")
+        except Exception as rollback_error:
+            print(f"Qdrant rollback failed: {rollback_error}")
+        
+        try:
+            result = await self.mongo.get_collection(
+                self.collection_name,
+                database_name=self.database_name
+            ).delete_many({"slide_id": {"$in": slide_ids}})
+            print(f"Rolled back MongoDB: {result.deleted_count} documents")
+        except Exception as rollback_error:
+            print(f"MongoDB rollback failed: {rollback_error}")
+        
+        for slide_id in slide_ids:
+            self.metadata_cache.invalidate(slide_id=slide_id)
+        await self._bump_version()
+    
+    async def _is_key_referenced(
+        self,
+        s3_key: str,
+        exclude_slide_id: Optional[str] = None
+    ) -> bool:
+        """
+        Check whether any slide document references an S3 key.
+        
+        Objects are content-addressed and shared between slides, so this
+        replaces an S3 head_object probe and guards deletes of shared keys.
+        
+        Args:
+            s3_key: S3 object key (content hash)
+            exclude_slide_id: Ignore references from this slide
             
-            # Rollback: Delete what was created
-            if qdrant_id:
-                try:
-                    await self.qdrant.client.delete(
-                        collection_name=self.qdrant_collection,
-                        points_selector=[qdrant_id]
-                    )
-                    print(f"Rolled back Qdrant: {qdrant_id}")
-                except Exception as rollback_error:
-                    print(f"Qdrant rollback failed: {rollback_error}")
+        Returns:
+            True if at least one (other) slide references the key
+        """
+        query = {"$or": [
+            {"storage_ref.s3_key": s3_key},
+            {"preview": s3_key},
+            {"storage_ref.parts.key": s3_key},
+        ]}
+        if exclude_slide_id:
+            query = {"$and": [query, {"slide_id": {"$ne": exclude_slide_id}}]}
+        
+        collection = self.mongo.get_collection(
+            self.collection_name,
+            database_name=self.database_name
+        )
+        doc = await collection.find_one(query, projection={"_id": 1})
+        return doc is not None
+    
+    async def _committed_keys(self, s3_keys: Sequence[str]) -> Set[str]:
+        """
+        Find which preview or part keys are referenced by committed slides.
+        
+        A reference from a slide whose batch still has an open write intent
+        does not prove the object exists: that batch may still be uploading
+        or about to roll back, so such references are ignored.
+        
+        Args:
+            s3_keys: Candidate preview and package part keys
             
-            if mongodb_id:
-                try:
-                    await self.mongo.delete(
-                        collection_name=self.collection_name,
-                        query={"slide_id": metadata.slide_id},
-                        database_name=self.database_name
-                    )
-                    print(f"Rolled back MongoDB: {mongodb_id}")
-                except Exception as rollback_error:
-                    print(f"MongoDB rollback failed: {rollback_error}")
+        Returns:
+            Keys referenced by at least one committed slide
+        """
+        keys = list(dict.fromkeys(s3_keys))
+        if not keys:
+            return set()
+        
+        collection = self.mongo.get_collection(
+            self.collection_name,
+            database_name=self.database_name
+        )
+        wanted = set(keys)
+        references: Dict[str, Set[str]] = {}
+        cursor = collection.find(
+            {"$or": [
+                {"preview": {"$in": keys}},
+                {"storage_ref.parts.key": {"$in": keys}},
+            ]},
+            projection={"slide_id": 1, "preview": 1, "storage_ref.parts.key": 1}
+        )
+        async for doc in cursor:
+            parts = (doc.get("storage_ref") or {}).get("parts") or []
+            doc_keys = {doc.get("preview"), *(part.get("key") for part in parts)}
+            references.setdefault(doc["slide_id"], set()).update(doc_keys & wanted)
+        if not references:
+            return set()
+        
+        pending = set()
+        intents = self.mongo.get_collection(
+            self.intents_collection_name,
+            database_name=self.database_name
+        )
+        async for intent in intents.find(
+            {"slide_ids": {"$in": list(references)}},
+            projection={"slide_ids": 1}
+        ):
+            pending.update(intent["slide_ids"])
+        
+        committed = set()
+        for slide_id, doc_keys in references.items():
+            if slide_id not in pending:
+                committed.update(doc_keys)
+        return committed
+    
+    @staticmethod
+    def _object_cache_path(s3_key: str) -> Path:
+        # Keys end in the content hash; tenant prefixes share cache entries
+        return OBJECT_CACHE_DIR / s3_key.rsplit("/", 1)[-1]
+    
+    def cached_object(self, s3_key: str) -> Optional[Path]:
+        """Return the local cache path of an S3 object, or None if not cached."""
+        path = self._object_cache_path(s3_key)
+        try:
+            # Mark as recently used for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+    
+    async def _prune_object_cache(self):
+        removed = await asyncio.to_thread(prune_object_cache)
+        if removed:
+            print(f"Evicted {removed} objects from the local object cache")
+    
+    async def cache_objects(self, s3_keys: Sequence[str]) -> int:
+        """
+        Fetch S3 objects into the local object cache.
+        
+        Args:
+            s3_keys: Content-addressed S3 keys
             
-            if s3_key:
-                try:
-                    await self.s3.delete_file(s3_key)
-                    print(f"Rolled back S3: {s3_key}")
-                except Exception as rollback_error:
-                    print(f"S3 rollback failed: {rollback_error}")
+        Returns:
+            Number of objects fetched (already cached keys are skipped)
+        """
+        missing = [key for key in dict.fromkeys(s3_keys) if key and not self.cached_object(key)]
+        if not missing:
+            return 0
+        
+        OBJECT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fetched = await self.s3.get_objects(missing)
+        for key, data in fetched.items():
+            target = self._object_cache_path(key)
+            tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            tmp.replace(target)
+        await self._prune_object_cache()
+        return len(fetched)
+    
+    async def materialize_package(self, metadata: SlideLibraryMetadata, output_path: Path) -> Path:
+        """
+        Write a slide's PPTX to a local path.
+        
+        Whole-file slides are copied from the object cache, or downloaded and
+        then cached. Part-stored slides are reassembled from their manifest;
+        parts are fetched once into OBJECT_CACHE_DIR and reused by every
+        later slide that shares them, until evicted by the cache size cap.
+        
+        Args:
+            metadata: Slide metadata
+            output_path: Destination path
             
-            raise
+        Returns:
+            Path to the PPTX
+        """
+        manifest = metadata.storage_ref.parts
+        if not manifest:
+            s3_key = metadata.storage_ref.s3_key
+            cached = self.cached_object(s3_key)
+            if cached:
+                try:
+                    shutil.copyfile(cached, output_path)
+                    return output_path
+                except FileNotFoundError:
+                    # Evicted since the lookup
+                    pass
+            await self.s3.download_file(s3_key, output_path)
+            OBJECT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            target = self._object_cache_path(s3_key)
+            tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            shutil.copyfile(output_path, tmp)
+            tmp.replace(target)
+            await self._prune_object_cache()
+            return output_path
+        
+        fetched = await self.cache_objects([part.key for part in manifest])
+        parts: Dict[str, bytes] = {}
+        for part in manifest:
+            try:
+                parts[part.key] = self._object_cache_path(part.key).read_bytes()
+            except FileNotFoundError:
+                # Evicted before it was read (cache smaller than the package)
+                pass
+        evicted = [part.key for part in manifest if part.key not in parts]
+        if evicted:
+            parts.update(await self.s3.get_objects(evicted))
+        assemble_package(manifest, parts, output_path)
+        print(f"Assembled {output_path.name} from {len(manifest)} parts ({fetched} fetched)")
+        return output_path
+    
+    async def _bump_version(self):
+        """
+        Advance the shared write version so other workers drop stale cache entries.
+        
+        If the counter moved by more than our own increment, another worker
+        wrote in between and the local cache is cleared as well.
+        """
+        try:
+            state = await self.mongo.get_collection(
+                self.state_collection_name,
+                database_name=self.database_name
+            ).find_one_and_update(
+                {"_id": self.collection_name},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            print(f"Failed to bump library version: {e}")
+            self.metadata_cache.clear()
+            return
+        
+        version = state["version"]
+        if self.metadata_cache.version is not None and version != self.metadata_cache.version + 1:
+            self.metadata_cache.clear()
+        self.metadata_cache.version = version
+        self._cache_checked_at = time.monotonic()
+    
+    async def _sync_cache(self):
+        """Poll the shared write version and clear the cache if another worker wrote."""
+        now = time.monotonic()
+        if now - self._cache_checked_at < CACHE_VERSION_POLL_SECONDS:
+            return
+        self._cache_checked_at = now
+        
+        state = await self.mongo.get_collection(
+            self.state_collection_name,
+            database_name=self.database_name
+        ).find_one({"_id": self.collection_name})
+        version = state["version"] if state else 0
+        
+        if version != self.metadata_cache.version:
+            if self.metadata_cache.version is not None:
+                self.metadata_cache.clear()
+            self.metadata_cache.version = version
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Report metadata cache size and hit ratio."""
+        return self.metadata_cache.stats()
     
     async def slide_exists_by_hash(self, file_hash: str) -> Optional[SlideLibraryMetadata]:
         """
@@ -235,6 +886,11 @@ class SlideStorageAdapter:
         Returns:
             SlideLibraryMetadata if exists, None otherwise
         """
+        await self._sync_cache()
+        cached = self.metadata_cache.get_by_hash(file_hash)
+        if cached:
+            return cached
+        
         doc = await self.mongo.read(
             collection_name=self.collection_name,
             query={"file_hash": file_hash},
@@ -242,7 +898,38 @@ class SlideStorageAdapter:
         )
         
         if doc:
-            return SlideLibraryMetadata(**doc)
+            metadata = SlideLibraryMetadata(**doc)
+            self.metadata_cache.put(metadata)
+            return metadata
+        return None
+    
+    async def get_slide_metadata(self, slide_id: str) -> Optional[SlideLibraryMetadata]:
+        """
+        Fetch slide metadata without touching S3.
+        
+        Served from the metadata cache when possible.
+        
+        Args:
+            slide_id: Slide UUID
+            
+        Returns:
+            SlideLibraryMetadata if found, None otherwise
+        """
+        await self._sync_cache()
+        cached = self.metadata_cache.get_by_id(slide_id)
+        if cached:
+            return cached
+        
+        doc = await self.mongo.read(
+            collection_name=self.collection_name,
+            query={"slide_id": slide_id},
+            database_name=self.database_name
+        )
+        
+        if doc:
+            metadata = SlideLibraryMetadata(**doc)
+            self.metadata_cache.put(metadata)
+            return metadata
         return None
     
     async def get_slide_by_id(
@@ -261,43 +948,61 @@ class SlideStorageAdapter:
         Raises:
             ValueError: If slide not found
         """
-        # Fetch metadata from MongoDB
-        doc = await self.mongo.read(
-            collection_name=self.collection_name,
-            query={"slide_id": slide_id},
-            database_name=self.database_name
-        )
+        metadata = await self.get_slide_metadata(slide_id)
         
-        if not doc:
+        if not metadata:
             raise ValueError(f"Slide not found: {slide_id}")
         
-        # Convert to SlideLibraryMetadata
-        metadata = SlideLibraryMetadata(**doc)
-        
         # Get proper download filename from metadata
         download_filename = self.get_download_filename(metadata)
         
-        # Download from S3
-        s3_key = metadata.storage_ref.s3_key
+        # Download from S3 (reassembled when stored as parts)
         local_path = Path(f"temp/slides/{download_filename}")
         local_path.parent.mkdir(parents=True, exist_ok=True)
         
-        await self.s3.download_file(s3_key, local_path)
+        await self.materialize_package(metadata, local_path)
         
         print(f"Retrieved slide: {slide_id} as {download_filename}")
         return metadata, local_path
     
+    async def set_slide_reasoning(self, slide_id: str, reasoning: SlideReasoning) -> bool:
+        """
+        Store template reasoning for a slide ingested before reasoning was persisted.
+        
+        Args:
+            slide_id: Slide UUID
+            reasoning: Fingerprint-keyed element reasoning
+            
+        Returns:
+            True if the slide was updated
+        """
+        collection = self.mongo.get_collection(self.collection_name, database_name=self.database_name)
+        result = await collection.update_one(
+            {"slide_id": slide_id, "reasoning": None},
+            {"$set": {"reasoning": reasoning.model_dump()}}
+        )
+        if not result.modified_count:
+            return False
+        
+        self.metadata_cache.invalidate(slide_id=slide_id)
+        await self._bump_version()
+        return True
+    
     async def delete_slide(self, slide_id: str) -> bool:
         """
         Delete a slide from all storage backends.
         
+        S3 objects are content-addressed and may be shared with other slides
+        or about to be reused by a concurrent batch, so they are not deleted
+        here: once unreferenced, the reconciliation GC pass removes them after
+        its grace period.
+        
         Args:
             slide_id: Slide UUID
             
         Returns:
             True if deleted, False if not found
         """
-        # Get metadata first
         doc = await self.mongo.read(
             collection_name=self.collection_name,
             query={"slide_id": slide_id},
@@ -308,8 +1013,6 @@ class SlideStorageAdapter:
             print(f"Slide not found for deletion: {slide_id}")
             return False
         
-        metadata = SlideLibraryMetadata(**doc)
-        
         # Delete from all backends
         try:
             # Delete from Qdrant
@@ -325,8 +1028,8 @@ class SlideStorageAdapter:
                 database_name=self.database_name
             )
             
-            # Delete from S3
-            await self.s3.delete_file(metadata.storage_ref.s3_key)
+            self.metadata_cache.invalidate(slide_id=slide_id)
+            await self._bump_version()
             
             print(f"Deleted slide: {slide_id}")
             return True
@@ -335,6 +1038,78 @@ class SlideStorageAdapter:
             print(f"Failed to delete slide {slide_id}: {e}")
             raise
     
+    async def list_slides(
+        self,
+        limit: int = LIST_DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List slides newest first using keyset pagination.
+        
+        Pages are addressed by the (updated_at, slide_id) of the last item
+        seen, so every page is an index range scan regardless of depth.
+        
+        Args:
+            limit: Page size (clamped to LIST_MAX_LIMIT)
+            cursor: Continuation token from a previous page
+            fields: Optional subset of SlideLibraryMetadata fields to return
+            
+        Returns:
+            Tuple of (items, next_cursor); next_cursor is None on the last page
+            
+        Raises:
+            ValueError: If the cursor or a field name is invalid
+        """
+        limit = max(1, min(limit, LIST_MAX_LIMIT))
+        
+        query: Dict[str, Any] = {}
+        if cursor:
+            updated_at, slide_id = decode_list_cursor(cursor)
+            query = {
+                "$or": [
+                    {"updated_at": {"$lt": updated_at}},
+                    {"updated_at": updated_at, "slide_id": {"$lt": slide_id}},
+                ]
+            }
+        
+        projection = None
+        if fields:
+            unknown = set(fields) - set(SlideLibraryMetadata.model_fields)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            # Keyset columns are always needed to build the next cursor
+            projection = {field: 1 for field in (*fields, "slide_id", "updated_at")}
+            projection["_id"] = 0
+        
+        collection = self.mongo.get_collection(
+            self.collection_name,
+            database_name=self.database_name
+        )
+        docs = await collection.find(
+            query,
+            projection=projection,
+            sort=[("updated_at", -1), ("slide_id", -1)],
+            limit=limit
+        ).to_list(length=limit)
+        
+        items = []
+        for doc in docs:
+            doc.pop("_id", None)
+            if projection is None:
+                try:
+                    doc = SlideLibraryMetadata(**doc).model_dump()
+                except Exception:
+                    # Fallback: best-effort serialization
+                    doc["slide_id"] = str(doc.get("slide_id") or doc.get("id") or "")
+            items.append(doc)
+        
+        next_cursor = None
+        if len(docs) == limit and docs[-1].get("updated_at"):
+            next_cursor = encode_list_cursor(docs[-1]["updated_at"], docs[-1]["slide_id"])
+        
+        return items, next_cursor
+    
     def get_download_filename(self, metadata: SlideLibraryMetadata) -> str:
         """
         Get the download filename for a slide.
@@ -356,6 +1131,10 @@ class SlideStorageAdapter:
         return f"{original_name}_{metadata.slide_index}_{timestamp_str}.pptx"
     
     async def close(self):
-        """Close all storage connections."""
+        """Flush popularity counters and close all storage connections."""
+        try:
+            await self.popularity.flush()
+        except Exception as e:
+            print(f"Final popularity flush failed: {e}")
         await self.mongo.close()
         print("Storage connections closed")
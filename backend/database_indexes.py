@@ -0,0 +1,60 @@
+"""
+Database Index Script
+
+Applies the declared MongoDB indexes for the slide library, or checks them.
+
+The check reports:
+- Declared indexes that are missing from the slides collection
+- Known query shapes whose winning plan is a collection scan (COLLSCAN)
+
+Usage:
+    python database_indexes.py                # create missing indexes
+    python database_indexes.py --check        # report only, exit 1 on problems
+    python database_indexes.py --tenant acme  # one tenant's collections
+"""
+
+import argparse
+import asyncio
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv(override=True)
+
+from core.storage import SlideStorageAdapter
+
+
+async def main(check_only: bool, tenant_id: str | None = None) -> int:
+    """Apply or check slide library indexes."""
+    storage = SlideStorageAdapter(tenant_id=tenant_id)
+    await storage.mongo.initialize()
+
+    try:
+        if not check_only:
+            print("\n=== Applying MongoDB indexes ===")
+            await storage.ensure_indexes()
+
+        print("\n=== Checking MongoDB indexes ===")
+        report = await storage.check_indexes()
+
+        if report["missing_indexes"]:
+            print(f"Missing indexes: {', '.join(report['missing_indexes'])}")
+        else:
+            print("All declared indexes present")
+
+        if report["collection_scans"]:
+            print(f"Queries using collection scans: {', '.join(report['collection_scans'])}")
+        else:
+            print("No collection scans in known query shapes")
+
+        return 1 if report["missing_indexes"] or report["collection_scans"] else 0
+    finally:
+        await storage.mongo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage slide library MongoDB indexes")
+    parser.add_argument("--check", action="store_true", help="Report missing indexes and collection scans without creating anything")
+    parser.add_argument("--tenant", default=None, help="Operate on this tenant's library instead of the shared one")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check, args.tenant)))
@@ -4,7 +4,7 @@ Database Reset Script
 Clears all data from:
 - MongoDB database:
   - slide_library database (slides collection)
-- S3 bucket (only files referenced in MongoDB slide collection)
+- S3 bucket (only files and previews referenced in MongoDB slide collection)
 - Qdrant vector database (slide_library collection)
 
 Usage:
@@ -66,14 +66,18 @@ async def clear_s3():
         slide_db = client[MONGODB_DATABASE]
         collection = slide_db[MONGODB_COLLECTION]
         
-        # Query all documents and extract S3 keys
-        cursor = collection.find({}, {"storage_ref.s3_key": 1})
-        s3_keys = []
+        # Query all documents and extract S3 keys (slides, package parts and previews)
+        cursor = collection.find({}, {"storage_ref.s3_key": 1, "storage_ref.parts.key": 1, "preview": 1})
+        s3_keys = set()
         async for doc in cursor:
             if "storage_ref" in doc and "s3_key" in doc["storage_ref"]:
                 s3_key = doc["storage_ref"]["s3_key"]
                 if s3_key:  # Only add non-empty keys
-                    s3_keys.append(s3_key)
+                    s3_keys.add(s3_key)
+            for part in (doc.get("storage_ref") or {}).get("parts", []):
+                s3_keys.add(part["key"])
+            if doc.get("preview"):
+                s3_keys.add(doc["preview"])
         
         if not s3_keys:
             print("No S3 files found in MongoDB collection")
@@ -81,19 +85,10 @@ async def clear_s3():
         
         print(f"Found {len(s3_keys)} S3 files to delete")
         
-        # Delete each S3 file
-        deleted_count = 0
-        failed_count = 0
-        for s3_key in s3_keys:
-            try:
-                success = await s3.delete_file(s3_key)
-                if success:
-                    deleted_count += 1
-                else:
-                    failed_count += 1
-            except Exception as e:
-                print(f"Failed to delete {s3_key}: {e}")
-                failed_count += 1
+        # Delete in batches of up to 1000 keys
+        result = await s3.delete_files(s3_keys)
+        deleted_count = result["deleted"]
+        failed_count = len(result["failed"])
         
         print(f"S3 cleared: {deleted_count} deleted, {failed_count} failed")
     except Exception as e:
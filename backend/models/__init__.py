@@ -4,11 +4,34 @@ Slide Library Models Module
 AI model integrations for slide library.
 """
 
-from .vertex import vertexai_model
+from .vertex import vertexai_model, vertexai_model_stream, VertexClientManager, get_vertex_client_manager
 from .voyage import voyage_embed, voyage_rerank
+from .scheduler import ModelScheduler, get_model_scheduler, llm_job
+from .response_cache import LLMResponseCache, ResponseCacheMiss, get_response_cache
+from .routing import StageRoute, StageRouter, get_stage_router, stage_model_kwargs
+from .context_cache import CachedContext, ContextCacheManager, get_context_cache_manager
+from .hedging import HedgePolicy, get_hedge_policy
 
 __all__ = [
     "vertexai_model",
+    "vertexai_model_stream",
+    "VertexClientManager",
+    "get_vertex_client_manager",
     "voyage_embed",
     "voyage_rerank",
+    "ModelScheduler",
+    "get_model_scheduler",
+    "llm_job",
+    "LLMResponseCache",
+    "ResponseCacheMiss",
+    "get_response_cache",
+    "StageRoute",
+    "StageRouter",
+    "get_stage_router",
+    "stage_model_kwargs",
+    "CachedContext",
+    "ContextCacheManager",
+    "get_context_cache_manager",
+    "HedgePolicy",
+    "get_hedge_policy",
 ]
@@ -0,0 +1,198 @@
+"""
+Shared Context Caching
+
+A job's content generation calls share a long prefix: the system prompt,
+the user input and the documents. ContextCacheManager puts that prefix
+into a Vertex AI cached context once per job, so each slide's call sends
+only its slide data as the suffix and the prefix is billed and processed
+at the cached-token rate. The cached context is deleted when the job ends;
+its TTL only covers jobs that die without cleaning up.
+
+LLM_CONTEXT_CACHE selects the backend:
+- off: no context caching (default)
+- vertex: provider-side cached contexts
+- local: stand-in that keeps the prefix in memory and sends it inline,
+  exercising the same code path without the provider (tests, emulators)
+
+Prefixes below LLM_CONTEXT_CACHE_MIN_TOKENS (estimated) are sent inline,
+since the provider rejects small caches and they would not pay off. If a
+cached context cannot be created or has expired, calls fall back to
+sending the prefix inline.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from google.genai.types import Content, CreateCachedContentConfig, Part
+from dotenv import load_dotenv
+
+from .scheduler import estimate_tokens
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_CACHE_MODES = ("off", "vertex", "local")
+
+CONTEXT_CACHE_MODE = os.getenv("LLM_CONTEXT_CACHE", "off").lower()
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("LLM_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("LLM_CONTEXT_CACHE_TTL_SECONDS", "1800"))
+
+# Global singleton
+_context_cache_instance: Optional['ContextCacheManager'] = None
+
+
+def get_context_cache_manager() -> 'ContextCacheManager':
+    """Get singleton instance of ContextCacheManager."""
+    global _context_cache_instance
+    if _context_cache_instance is None:
+        _context_cache_instance = ContextCacheManager()
+    return _context_cache_instance
+
+
+@dataclass
+class CachedContext:
+    """A shared prompt prefix, cached for one model."""
+    name: str
+    backend: str
+    model: str
+    system: str
+    prefix: str
+    tokens: int
+    expires_at: float
+
+    def usable_for(self, model: str) -> bool:
+        """Whether a call to model can send only its suffix against this cache."""
+        return self.backend == "vertex" and self.model == model and time.time() < self.expires_at
+
+
+class ContextCacheManager:
+    """
+    Creates and expires per-job cached contexts.
+    """
+
+    def __init__(
+        self,
+        mode: str = CONTEXT_CACHE_MODE,
+        min_tokens: int = CONTEXT_CACHE_MIN_TOKENS,
+        ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize manager.
+
+        Args:
+            mode: 'off', 'vertex' or 'local'
+            min_tokens: Smallest estimated prefix worth caching
+            ttl_seconds: Provider-side expiry of a cached context
+        """
+        if mode not in CONTEXT_CACHE_MODES:
+            print(f"Unknown LLM_CONTEXT_CACHE '{mode}', context caching disabled")
+            mode = "off"
+        self.mode = mode
+        self.min_tokens = min_tokens
+        self.ttl_seconds = ttl_seconds
+
+        self.created = 0
+        self.create_failures = 0
+        self.deleted = 0
+        self.below_minimum = 0
+        self.cached_calls = 0
+        self.inline_calls = 0
+        self._active: Dict[str, CachedContext] = {}
+
+    async def create(self, model: str, system: str, prefix: str) -> Optional[CachedContext]:
+        """
+        Cache a prompt prefix for a model.
+
+        Args:
+            model: Model the cached context is created for
+            system: System instruction (part of the cached prefix)
+            prefix: Shared start of the user prompt
+
+        Returns:
+            CachedContext, or None when caching is off, the prefix is too
+            small or the provider rejected it
+        """
+        if self.mode == "off":
+            return None
+
+        tokens = estimate_tokens(system, prefix)
+        if tokens < self.min_tokens:
+            self.below_minimum += 1
+            return None
+
+        expires_at = time.time() + self.ttl_seconds
+        if self.mode == "local":
+            context = CachedContext(f"local/{uuid.uuid4().hex}", "local", model, system, prefix, tokens, expires_at)
+        else:
+            # Imported here: vertex imports this module for CachedContext
+            from .vertex import get_vertex_client_manager
+            try:
+                client = await get_vertex_client_manager().get_client()
+                cache = await client.aio.caches.create(
+                    model=model,
+                    config=CreateCachedContentConfig(
+                        system_instruction=system,
+                        contents=[Content(role="user", parts=[Part(text=prefix)])],
+                        ttl=f"{self.ttl_seconds}s",
+                        display_name=f"slide-job-{uuid.uuid4().hex[:12]}",
+                    ),
+                )
+            except Exception as e:
+                self.create_failures += 1
+                print(f"Context cache creation failed, sending prefix inline: {e}")
+                return None
+            context = CachedContext(cache.name, "vertex", model, system, prefix, tokens, expires_at)
+
+        self.created += 1
+        self._active[context.name] = context
+        print(f"Created {context.backend} context cache {context.name} (~{tokens} tokens)")
+        return context
+
+    async def delete(self, context: CachedContext) -> None:
+        """Expire a cached context (failures are left to its TTL)."""
+        self._active.pop(context.name, None)
+        if context.backend == "vertex":
+            from .vertex import get_vertex_client_manager
+            try:
+                client = await get_vertex_client_manager().get_client()
+                await client.aio.caches.delete(name=context.name)
+            except Exception as e:
+                print(f"Failed to delete context cache {context.name}, expires by TTL: {e}")
+                return
+        self.deleted += 1
+
+    @contextlib.asynccontextmanager
+    async def session(self, model: str, system: str, prefix: str) -> AsyncIterator[Optional[CachedContext]]:
+        """
+        Cached context for the duration of a job.
+
+        Yields:
+            CachedContext or None (see create); deleted on exit
+        """
+        context = await self.create(model, system, prefix)
+        try:
+            yield context
+        finally:
+            if context:
+                # Shielded so a cancelled job still expires its cache
+                await asyncio.shield(self.delete(context))
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cached context lifecycle and usage counters."""
+        return {
+            "mode": self.mode,
+            "active": len(self._active),
+            "created": self.created,
+            "create_failures": self.create_failures,
+            "deleted": self.deleted,
+            "below_minimum": self.below_minimum,
+            "cached_calls": self.cached_calls,
+            "inline_calls": self.inline_calls,
+        }
@@ -0,0 +1,232 @@
+"""
+Hedged Model Requests
+
+Content generation waits on asyncio.gather over every slide, so a deck is
+as slow as its slowest call. With hedging, a call that is still running
+after the recent p95 latency of its model and stage gets a duplicate
+request; the first valid response wins and the other request is
+cancelled.
+
+The threshold adapts: it is a percentile of a sliding window of observed
+latencies, never below a floor. Latencies and the hedge delay are measured
+from the moment the scheduler admits the call, so time spent queued for a
+slot neither inflates the threshold nor triggers a hedge. Hedges are capped
+by a budget (a fraction of calls, with a small burst allowance), so
+duplicated load stays bounded when the model slows down as a whole.
+Duplicates go through the scheduler like any other call.
+
+Enabled with LLM_HEDGING=true (non-streaming calls only).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HEDGING_ENABLED = os.getenv("LLM_HEDGING", "false").lower() == "true"
+
+# Latency percentile after which a duplicate is sent, and its lower bound
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "2.0"))
+
+# Latencies observed before hedging starts, and the sliding window size
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+
+# Hedges allowed as a fraction of calls, plus a burst allowance
+HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+HEDGE_BURST = int(os.getenv("LLM_HEDGE_BURST", "2"))
+
+# Global singleton
+_hedge_policy_instance: Optional['HedgePolicy'] = None
+
+
+def get_hedge_policy() -> 'HedgePolicy':
+    """Get singleton instance of HedgePolicy."""
+    global _hedge_policy_instance
+    if _hedge_policy_instance is None:
+        _hedge_policy_instance = HedgePolicy()
+    return _hedge_policy_instance
+
+
+class LatencyWindow:
+    """Recent latencies of one model and stage, and hedge counters."""
+
+    def __init__(self, size: int = HEDGE_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgePolicy:
+    """
+    Sends a duplicate of slow calls, within a budget.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = HEDGING_ENABLED,
+        percentile: float = HEDGE_PERCENTILE,
+        min_delay_seconds: float = HEDGE_MIN_DELAY_SECONDS,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        budget: float = HEDGE_BUDGET,
+        burst: int = HEDGE_BURST
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            enabled: Hedge calls by default
+            percentile: Latency percentile that triggers a hedge
+            min_delay_seconds: Lower bound of the hedge delay
+            min_samples: Latencies observed before a key is hedged
+            budget: Hedges allowed as a fraction of calls
+            burst: Hedges allowed beyond the budget
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay_seconds = min_delay_seconds
+        self.min_samples = min_samples
+        self.budget = budget
+        self.burst = burst
+
+        self.calls = 0
+        self.hedged = 0
+        self._windows: Dict[Tuple[str, str], LatencyWindow] = {}
+
+    def window(self, key: Tuple[str, str]) -> LatencyWindow:
+        window = self._windows.get(key)
+        if window is None:
+            window = LatencyWindow()
+            self._windows[key] = window
+        return window
+
+    def delay(self, key: Tuple[str, str]) -> Optional[float]:
+        """Seconds after which a call is hedged (None until enough latencies are known)."""
+        window = self.window(key)
+        if len(window.samples) < self.min_samples:
+            return None
+        return max(self.min_delay_seconds, window.percentile(self.percentile))
+
+    def _take_budget(self) -> bool:
+        if self.hedged >= self.budget * self.calls + self.burst:
+            return False
+        self.hedged += 1
+        return True
+
+    async def run(
+        self,
+        key: Tuple[str, str],
+        call: Callable[[Callable[[], None]], Awaitable[T]],
+        validate: Callable[[T], bool] = lambda result: True,
+        enabled: Optional[bool] = None
+    ) -> T:
+        """
+        Run a call, hedging it if it outlives the key's latency threshold.
+
+        Args:
+            key: (model, stage) whose latencies set the threshold
+            call: Starts one request (called again for the duplicate); it
+                receives a callback to invoke when the request is admitted
+                (ModelScheduler's on_admitted)
+            validate: Whether a result may win; an invalid first result waits
+                for the other request
+            enabled: Override the policy default for this call
+
+        Returns:
+            First valid result (or the last result/error if neither is valid)
+        """
+        window = self.window(key)
+        window.calls += 1
+        self.calls += 1
+
+        started = time.monotonic()
+        admitted = asyncio.Event()
+
+        def on_admitted():
+            # A throttled retry is admitted again: time the latest attempt
+            nonlocal started
+            started = time.monotonic()
+            admitted.set()
+
+        delay = self.delay(key)
+        if not (self.enabled if enabled is None else enabled) or delay is None:
+            result = await call(on_admitted)
+            window.samples.append(time.monotonic() - started)
+            return result
+
+        primary = asyncio.ensure_future(call(on_admitted))
+        hedge = None
+        admission = asyncio.ensure_future(admitted.wait())
+        try:
+            # The hedge delay starts once the primary holds a slot
+            await asyncio.wait({primary, admission}, return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._take_budget():
+                if not done:
+                    window.budget_denied += 1
+                result = await primary
+                window.samples.append(time.monotonic() - started)
+                return result
+
+            window.hedged += 1
+            print(f"Hedging {key[0]} ({key[1]}) call after {delay:.1f}s")
+            hedge = asyncio.ensure_future(call(lambda: None))
+            pending = {primary, hedge}
+            outcome: Any = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    outcome = task
+                    if task.exception() is None and validate(task.result()):
+                        if task is hedge:
+                            window.hedge_wins += 1
+                        window.samples.append(time.monotonic() - started)
+                        return task.result()
+            # Neither result was valid: surface the last one
+            return outcome.result()
+        finally:
+            for task in (primary, hedge, admission):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    @staticmethod
+    def _rounded(seconds: Optional[float]) -> Optional[float]:
+        return round(seconds, 3) if seconds is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Report hedge rate, wins and current thresholds per model and stage."""
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "budget": self.budget,
+            "keys": {
+                f"{model}/{stage}": {
+                    "calls": window.calls,
+                    "hedged": window.hedged,
+                    "hedge_wins": window.hedge_wins,
+                    "budget_denied": window.budget_denied,
+                    "threshold_seconds": self._rounded(self.delay((model, stage))),
+                }
+                for (model, stage), window in self._windows.items()
+            },
+        }
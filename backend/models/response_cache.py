@@ -0,0 +1,303 @@
+"""
+LLM Response Cache
+
+Content-addressed cache for vertexai_model responses. The key is a SHA-256
+of everything that determines the output: model, system instruction, user
+prompt, response schema, temperature, thinking and extra config.
+
+Modes (LLM_CACHE_MODE):
+- off:        never touch the cache (default)
+- read_write: serve hits, store misses
+- record:     always call the model and overwrite the stored response
+- replay:     serve hits only; a miss raises ResponseCacheMiss instead of
+              calling the model (offline runs, reproducible fixtures)
+
+Backends (LLM_CACHE_BACKEND):
+- disk:  one JSON file per key under LLM_CACHE_DIR
+- mongo: the slide library's document store (MongoDB, or the embedded store
+         when SLIDE_STORAGE_BACKEND=local), with a TTL index on expires_at
+
+Entries expire after LLM_CACHE_TTL_SECONDS (0 keeps them forever). Callers
+opt out per call with vertexai_model(..., cache=False). Responses to calls
+with a JSON schema are only stored when they parse as JSON, so a truncated
+or malformed response is not replayed forever.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("off", "read_write", "record", "replay")
+
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "disk")
+LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", "temp/llm_cache"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+LLM_CACHE_DATABASE = "slide_library"
+LLM_CACHE_COLLECTION = "llm_response_cache"
+
+# Bump to invalidate every stored response (e.g. after changing response cleaning)
+CACHE_KEY_VERSION = 1
+
+# Global singleton
+_response_cache_instance: Optional['LLMResponseCache'] = None
+
+
+def get_response_cache() -> 'LLMResponseCache':
+    """Get singleton instance of LLMResponseCache."""
+    global _response_cache_instance
+    if _response_cache_instance is None:
+        _response_cache_instance = LLMResponseCache()
+    return _response_cache_instance
+
+
+class ResponseCacheMiss(LookupError):
+    """Raised in replay mode when no recorded response exists."""
+
+
+def response_cache_key(
+    model: str,
+    system: str,
+    user: str,
+    schema: Optional[Dict[str, Any]] = None,
+    temperature: Optional[float] = None,
+    thinking_config: Any = None,
+    extra_config: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Hash the inputs that determine a model response.
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = {
+        "v": CACHE_KEY_VERSION,
+        "model": model,
+        "system": system,
+        "user": user,
+        "schema": schema,
+        "temperature": temperature,
+        "thinking_config": thinking_config,
+        "extra_config": extra_config,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class DiskCacheBackend:
+    """One JSON file per entry, sharded by the first two hex digits."""
+
+    def __init__(self, directory: Path = LLM_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, entry: Dict[str, Any]):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def put(self, key: str, entry: Dict[str, Any]):
+        await asyncio.to_thread(self._write, key, entry)
+
+
+class MongoCacheBackend:
+    """Entries in a document store collection, expired by a TTL index."""
+
+    def __init__(self, collection_name: str = LLM_CACHE_COLLECTION, database_name: str = LLM_CACHE_DATABASE):
+        self.collection_name = collection_name
+        self.database_name = database_name
+        self._store = None
+        self._lock = asyncio.Lock()
+
+    async def _collection(self):
+        if self._store is None:
+            async with self._lock:
+                if self._store is None:
+                    from pymongo import IndexModel
+                    from storage import get_local_document_store, get_mongo_service
+
+                    local = os.getenv("SLIDE_STORAGE_BACKEND", "remote") == "local"
+                    store = get_local_document_store() if local else get_mongo_service()
+                    if not store._initialized:
+                        await store.initialize()
+                    await store.ensure_indexes(
+                        self.collection_name,
+                        [IndexModel([("expires_at", 1)], name="expires_at_ttl", expireAfterSeconds=0)],
+                        database_name=self.database_name
+                    )
+                    self._store = store
+        return self._store.get_collection(self.collection_name, database_name=self.database_name)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        collection = await self._collection()
+        return await collection.find_one({"_id": key}, projection={"_id": 0})
+
+    async def put(self, key: str, entry: Dict[str, Any]):
+        collection = await self._collection()
+        await collection.update_one({"_id": key}, {"$set": entry}, upsert=True)
+
+
+class LLMResponseCache:
+    """
+    Mode-aware response cache in front of vertexai_model.
+
+    Backend failures are logged and treated as misses, so a broken cache
+    never fails a model call (except in replay mode, which has no fallback).
+    """
+
+    def __init__(
+        self,
+        mode: str = LLM_CACHE_MODE,
+        backend: str = LLM_CACHE_BACKEND,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            mode: One of CACHE_MODES
+            backend: "disk" or "mongo"
+            ttl_seconds: Entry lifetime (0 for no expiry)
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Invalid LLM_CACHE_MODE: {mode}. Must be one of: {', '.join(CACHE_MODES)}")
+        if backend not in ("disk", "mongo"):
+            raise ValueError(f"Invalid LLM_CACHE_BACKEND: {backend}. Must be 'disk' or 'mongo'")
+
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.backend = MongoCacheBackend() if backend == "mongo" else DiskCacheBackend()
+        self._stats_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.rejected = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a response.
+
+        Returns:
+            Cached response text, or None on a miss (and in record mode)
+
+        Raises:
+            ResponseCacheMiss: On a miss in replay mode
+        """
+        if self.mode in ("off", "record"):
+            return None
+
+        try:
+            entry = await self.backend.get(key)
+        except Exception as e:
+            self._count("errors")
+            print(f"LLM cache read failed: {e}")
+            entry = None
+
+        if entry and entry.get("expires_at"):
+            expires_at = entry["expires_at"]
+            if isinstance(expires_at, str):
+                expires_at = datetime.fromisoformat(expires_at)
+            if expires_at <= datetime.utcnow():
+                entry = None
+
+        if entry is None:
+            self._count("misses")
+            if self.mode == "replay":
+                raise ResponseCacheMiss(f"No recorded LLM response for key {key}")
+            return None
+
+        self._count("hits")
+        return entry["response"]
+
+    async def put(self, key: str, model: str, response: str, json_response: bool = False):
+        """
+        Store a response (no-op in off and replay modes).
+
+        Args:
+            key: Cache key from response_cache_key
+            model: Model that produced the response
+            response: Cleaned response text
+            json_response: The call asked for JSON output; responses that do
+                not parse are not stored
+        """
+        if self.mode not in ("read_write", "record") or not response:
+            return
+        if json_response:
+            try:
+                json.loads(response)
+            except ValueError:
+                self._count("rejected")
+                return
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds) if self.ttl_seconds > 0 else None
+        entry: Dict[str, Any] = {"model": model, "response": response}
+        if isinstance(self.backend, DiskCacheBackend):
+            entry["created_at"] = now.isoformat()
+            entry["expires_at"] = expires_at.isoformat() if expires_at else None
+        else:
+            entry["created_at"] = now
+            entry["expires_at"] = expires_at
+
+        try:
+            await self.backend.put(key, entry)
+            self._count("writes")
+        except Exception as e:
+            self._count("errors")
+            print(f"LLM cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Report hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
@@ -0,0 +1,319 @@
+"""
+Per-Stage Model Routing
+
+Each pipeline stage that calls Gemini gets its own route: model tier,
+thinking budget and output token cap. A cheap stage (slide descriptions)
+runs on a small tier with thinking off, while content generation keeps
+the large thinking budget. A route can name an escalation (a larger tier
+or budget) that is tried once when the stage's result fails validation.
+
+Stages: planner, description, reasoning, generation.
+
+Routes are overridden with LLM_STAGE_ROUTES, a JSON object such as
+{"description": {"tier": "flash", "thinking_budget": 512},
+ "reasoning": {"escalate_tier": "pro"}}.
+Tiers map to model names through LLM_MODEL_TIERS (same JSON form, e.g.
+{"lite": "gemini-2.5-flash-lite"}). A thinking_budget of -1 lets the
+model decide, 0 disables thinking.
+
+Per-stage latency, token usage (from the response usage metadata),
+cache hits, failures and escalations are reported in /metrics.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MODEL_TIERS = {
+    "lite": "gemini-2.5-flash-lite-preview-09-2025",
+    "flash": "gemini-2.5-flash-preview-09-2025",
+    "pro": "gemini-2.5-pro",
+}
+
+STAGES = ("planner", "description", "reasoning", "generation")
+
+# Latency samples kept per stage for percentiles
+LATENCY_WINDOW = 512
+
+# Global singleton
+_router_instance: Optional['StageRouter'] = None
+
+
+def get_stage_router() -> 'StageRouter':
+    """Get singleton instance of StageRouter."""
+    global _router_instance
+    if _router_instance is None:
+        _router_instance = StageRouter()
+    return _router_instance
+
+
+@dataclass
+class StageRoute:
+    """Model settings of one stage."""
+    tier: str = "flash"
+    thinking_budget: int = 8192
+    include_thoughts: bool = False
+    max_output_tokens: Optional[int] = None
+    escalate_tier: Optional[str] = None
+    escalate_thinking_budget: Optional[int] = None
+
+    @property
+    def escalates(self) -> bool:
+        return self.escalate_tier is not None or self.escalate_thinking_budget is not None
+
+
+DEFAULT_ROUTES: Dict[str, StageRoute] = {
+    "planner": StageRoute(tier="flash", thinking_budget=4096),
+    "description": StageRoute(tier="lite", thinking_budget=0, max_output_tokens=1024, escalate_tier="flash"),
+    "reasoning": StageRoute(tier="flash", thinking_budget=2048, escalate_thinking_budget=8192),
+    "generation": StageRoute(tier="flash", thinking_budget=8192),
+}
+
+
+def _load_json_env(name: str) -> Dict[str, Any]:
+    raw = os.getenv(name)
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except Exception as e:
+        print(f"Ignoring invalid {name}: {e}")
+        return {}
+
+
+def _load_routes() -> Dict[str, StageRoute]:
+    routes = {stage: StageRoute(**vars(route)) for stage, route in DEFAULT_ROUTES.items()}
+    known = {field.name for field in fields(StageRoute)}
+    for stage, values in _load_json_env("LLM_STAGE_ROUTES").items():
+        try:
+            unknown = set(values) - known
+            if unknown:
+                raise ValueError(f"unknown settings {sorted(unknown)}")
+            routes[stage] = StageRoute(**{**vars(routes.get(stage, StageRoute())), **values})
+        except Exception as e:
+            print(f"Ignoring invalid LLM_STAGE_ROUTES entry for {stage}: {e}")
+    return routes
+
+
+class StageMetrics:
+    """Latency and token counters of one stage."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cached = 0
+        self.failed = 0
+        self.escalations = 0
+        self.escalation_failures = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.thinking_tokens = 0
+        self.context_cached_tokens = 0
+        self.latency_seconds = 0.0
+        self.models: Dict[str, int] = {}
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def _percentile(self, q: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    def stats(self) -> Dict[str, Any]:
+        live = self.calls - self.cached
+        return {
+            "calls": self.calls,
+            "cached": self.cached,
+            "failed": self.failed,
+            "escalations": self.escalations,
+            "escalation_failures": self.escalation_failures,
+            "models": dict(self.models),
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "thinking_tokens": self.thinking_tokens,
+            "context_cached_tokens": self.context_cached_tokens,
+            "avg_latency_seconds": round(self.latency_seconds / live, 3) if live else None,
+            "p50_latency_seconds": self._percentile(0.5),
+            "p95_latency_seconds": self._percentile(0.95),
+        }
+
+
+class StageRouter:
+    """
+    Resolves stage routes to vertexai_model settings and records stage metrics.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, StageRoute]] = None,
+        tiers: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize router.
+
+        Args:
+            routes: Route per stage (defaults to DEFAULT_ROUTES + LLM_STAGE_ROUTES)
+            tiers: Model name per tier (defaults to MODEL_TIERS + LLM_MODEL_TIERS)
+        """
+        self.routes = routes if routes is not None else _load_routes()
+        self.tiers = tiers if tiers is not None else {**MODEL_TIERS, **_load_json_env("LLM_MODEL_TIERS")}
+        self._metrics: Dict[str, StageMetrics] = {}
+
+    def route(self, stage: str) -> StageRoute:
+        """Return the route of a stage (unknown stages use the StageRoute defaults)."""
+        route = self.routes.get(stage)
+        if route is None:
+            route = StageRoute()
+            self.routes[stage] = route
+        return route
+
+    def model_name(self, tier: str) -> str:
+        # A tier that is not configured is taken as a model name
+        return self.tiers.get(tier, tier)
+
+    def model_kwargs(
+        self,
+        stage: str,
+        base: Optional[Dict[str, Any]] = None,
+        escalated: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Build vertexai_model keyword arguments for a stage.
+
+        Args:
+            stage: Pipeline stage
+            base: Stage-specific settings to keep (temperature, extra_config, ...)
+            escalated: Use the route's escalation tier and thinking budget
+
+        Returns:
+            base with model, thinking_config, max_output_tokens and stage set
+        """
+        route = self.route(stage)
+        tier = route.tier
+        thinking_budget = route.thinking_budget
+        if escalated:
+            tier = route.escalate_tier or tier
+            if route.escalate_thinking_budget is not None:
+                thinking_budget = route.escalate_thinking_budget
+
+        kwargs = dict(base or {})
+        kwargs["model"] = self.model_name(tier)
+        kwargs["thinking_config"] = {
+            "thinking_budget": thinking_budget,
+            "include_thoughts": route.include_thoughts,
+        }
+        if route.max_output_tokens:
+            kwargs["extra_config"] = {**(kwargs.get("extra_config") or {}), "max_output_tokens": route.max_output_tokens}
+        kwargs["stage"] = stage
+        return kwargs
+
+    async def run(
+        self,
+        stage: str,
+        call: Callable[[Dict[str, Any]], Awaitable[T]],
+        validate: Callable[[T], bool],
+        base: Optional[Dict[str, Any]] = None
+    ) -> T:
+        """
+        Run a stage call, escalating once if its result fails validation.
+
+        Args:
+            stage: Pipeline stage
+            call: Makes the model call with the given vertexai_model kwargs
+            validate: Whether a result is acceptable
+            base: Stage-specific settings passed through model_kwargs
+
+        Returns:
+            The first acceptable result, or the last result if none was
+
+        Raises:
+            Exception: From call, if the last attempt raised
+        """
+        route = self.route(stage)
+        attempts = [False, True] if route.escalates else [False]
+
+        result = None
+        for escalated in attempts:
+            if escalated:
+                self.metrics(stage).escalations += 1
+                print(f"Escalating {stage} call to {self.model_kwargs(stage, escalated=True)['model']}")
+            try:
+                result = await call(self.model_kwargs(stage, base, escalated))
+            except Exception:
+                if escalated or not route.escalates:
+                    raise
+                continue
+            if validate(result):
+                return result
+
+        if route.escalates:
+            self.metrics(stage).escalation_failures += 1
+        return result
+
+    def metrics(self, stage: str) -> StageMetrics:
+        metrics = self._metrics.get(stage)
+        if metrics is None:
+            metrics = StageMetrics()
+            self._metrics[stage] = metrics
+        return metrics
+
+    def record(
+        self,
+        stage: str,
+        model: str,
+        seconds: float = 0.0,
+        usage: Any = None,
+        cached: bool = False,
+        failed: bool = False
+    ) -> None:
+        """
+        Record one model call of a stage.
+
+        Args:
+            stage: Pipeline stage
+            model: Model that served the call
+            seconds: Call latency (excluding cache hits)
+            usage: Response usage_metadata (prompt/candidates/thoughts/cached token counts)
+            cached: Served from the response cache
+            failed: The call raised or returned no text
+        """
+        metrics = self.metrics(stage)
+        metrics.calls += 1
+        metrics.models[model] = metrics.models.get(model, 0) + 1
+        if cached:
+            metrics.cached += 1
+            return
+        if failed:
+            metrics.failed += 1
+        metrics.latency_seconds += seconds
+        metrics._latencies.append(seconds)
+        if usage is not None:
+            metrics.prompt_tokens += getattr(usage, "prompt_token_count", None) or 0
+            metrics.output_tokens += getattr(usage, "candidates_token_count", None) or 0
+            metrics.thinking_tokens += getattr(usage, "thoughts_token_count", None) or 0
+            metrics.context_cached_tokens += getattr(usage, "cached_content_token_count", None) or 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Report routes and per-stage metrics."""
+        return {
+            stage: {
+                "route": {**vars(self.route(stage)), "model": self.model_name(self.route(stage).tier)},
+                **self.metrics(stage).stats(),
+            }
+            for stage in sorted(set(STAGES) | set(self._metrics))
+        }
+
+
+def stage_model_kwargs(stage: str, base: Optional[Dict[str, Any]] = None, escalated: bool = False) -> Dict[str, Any]:
+    """vertexai_model kwargs of a stage from the shared router."""
+    return get_stage_router().model_kwargs(stage, base, escalated)
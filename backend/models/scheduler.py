@@ -0,0 +1,356 @@
+"""
+Model Call Scheduler
+
+Shared admission control for every Vertex AI and Voyage AI request:
+1. Per-model concurrency caps
+2. Token buckets for requests per minute (RPM) and tokens per minute (TPM)
+3. Exponential backoff with full jitter on 429 / RESOURCE_EXHAUSTED, during
+   which the whole model lane pauses instead of every caller retrying at once
+4. Fair sharing: waiting calls are admitted round-robin across jobs, so one
+   large deck cannot starve a concurrent small request
+
+A job is whatever the caller marks with `llm_job(...)` (the orchestrator
+marks each execute() call); calls outside a job share a default one.
+
+Limits are configured per model with LLM_MODEL_LIMITS, a JSON object such as
+{"gemini-2.5-flash": {"concurrency": 16, "rpm": 600, "tpm": 2000000}}.
+Models not listed use the LLM_DEFAULT_* settings; 0 disables a budget.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_CONCURRENCY = int(os.getenv("LLM_DEFAULT_CONCURRENCY", "16"))
+DEFAULT_RPM = int(os.getenv("LLM_DEFAULT_RPM", "0"))
+DEFAULT_TPM = int(os.getenv("LLM_DEFAULT_TPM", "0"))
+
+# Retries of throttled calls and their backoff bounds (seconds)
+RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "6"))
+BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1.0"))
+BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+
+# Rough prompt size estimate used for TPM budgeting
+CHARS_PER_TOKEN = 4
+
+DEFAULT_JOB = "default"
+
+_current_job: contextvars.ContextVar[str] = contextvars.ContextVar("llm_job", default=DEFAULT_JOB)
+
+# Global singleton
+_scheduler_instance: Optional['ModelScheduler'] = None
+
+
+def get_model_scheduler() -> 'ModelScheduler':
+    """Get singleton instance of ModelScheduler."""
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        _scheduler_instance = ModelScheduler()
+    return _scheduler_instance
+
+
+@contextlib.contextmanager
+def llm_job(job_id: str):
+    """Attribute model calls made inside this context (and its tasks) to a job."""
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+def estimate_tokens(*texts: Optional[str]) -> int:
+    """Cheap token estimate for budgeting (about 4 characters per token)."""
+    return max(1, sum(len(text) for text in texts if text) // CHARS_PER_TOKEN)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE_SECONDS, cap: float = BACKOFF_MAX_SECONDS) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an SDK error means the request was throttled."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None) or getattr(error, "http_status", None)
+    if code in (429, "429"):
+        return True
+    name = type(error).__name__
+    if name in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+        return True
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text or "rate limit" in text.lower()
+
+
+@dataclass
+class ModelLimits:
+    """Admission limits for one model."""
+    concurrency: int = DEFAULT_CONCURRENCY
+    rpm: int = DEFAULT_RPM
+    tpm: int = DEFAULT_TPM
+
+
+def _load_limits() -> Dict[str, ModelLimits]:
+    raw = os.getenv("LLM_MODEL_LIMITS")
+    if not raw:
+        return {}
+    try:
+        return {model: ModelLimits(**values) for model, values in json.loads(raw).items()}
+    except Exception as e:
+        print(f"Ignoring invalid LLM_MODEL_LIMITS: {e}")
+        return {}
+
+
+class TokenBucket:
+    """Continuously refilling budget of units per minute."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Take units from the bucket, waiting for refill if needed.
+
+        Returns:
+            Seconds spent waiting
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class ModelLane:
+    """
+    Admission state for one model: a fair concurrency limiter plus budgets.
+
+    When a slot frees up it is handed to the next waiting job in
+    round-robin order rather than to whichever caller queued first.
+    """
+
+    def __init__(self, model: str, limits: ModelLimits):
+        self.model = model
+        self.limits = limits
+        self.rpm = TokenBucket(limits.rpm) if limits.rpm > 0 else None
+        self.tpm = TokenBucket(limits.tpm) if limits.tpm > 0 else None
+
+        self.active = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.paused_until = 0.0
+
+        self.completed = 0
+        self.failed = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    async def acquire(self, job: str):
+        if self.active < self.limits.concurrency and not self._waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(job, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled
+                self.release()
+            else:
+                queue = self._waiters.get(job)
+                if queue and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[job]
+            raise
+
+    def release(self):
+        self.active -= 1
+        while self._waiters and self.active < self.limits.concurrency:
+            job, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            # Rotate the job to the back so the next slot goes to another job
+            del self._waiters[job]
+            if queue:
+                self._waiters[job] = queue
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    async def wait_if_paused(self):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.limits.concurrency,
+            "rpm": self.limits.rpm,
+            "tpm": self.limits.tpm,
+            "active": self.active,
+            "waiting": self.waiting,
+            "waiting_jobs": len(self._waiters),
+            "completed": self.completed,
+            "failed": self.failed,
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+class ModelScheduler:
+    """
+    Process-wide scheduler for model API calls.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, ModelLimits]] = None):
+        """
+        Initialize scheduler.
+
+        Args:
+            limits: Per-model limits (defaults to LLM_MODEL_LIMITS)
+        """
+        self.limits = limits if limits is not None else _load_limits()
+        self._lanes: Dict[str, ModelLane] = {}
+
+    def lane(self, model: str) -> ModelLane:
+        """Return the lane for a model, creating it on first use."""
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = ModelLane(model, self.limits.get(model, ModelLimits()))
+            self._lanes[model] = lane
+        return lane
+
+    @contextlib.asynccontextmanager
+    async def reserve(
+        self,
+        model: str,
+        tokens: int = 1,
+        attempt: int = 0,
+        on_admitted: Optional[Callable[[], None]] = None
+    ):
+        """
+        Hold one admission slot for a model call (e.g. a streamed response).
+
+        A throttling error raised inside the block pauses the lane for a
+        jittered backoff (growing with attempt) and is re-raised.
+
+        Args:
+            model: Model name (the lane key)
+            tokens: Estimated tokens for the TPM budget
+            attempt: Retry number of this call, for the backoff
+            on_admitted: Called once the slot and budgets are granted, right
+                before the block runs (e.g. to time the call without queueing)
+        """
+        lane = self.lane(model)
+        job = _current_job.get()
+        started = time.monotonic()
+        await lane.wait_if_paused()
+        await lane.acquire(job)
+        # A backoff may have started while this call was queued for its slot
+        while lane.paused_until > time.monotonic():
+            lane.release()
+            await lane.wait_if_paused()
+            await lane.acquire(job)
+        try:
+            if lane.rpm:
+                await lane.rpm.acquire(1)
+            if lane.tpm:
+                await lane.tpm.acquire(tokens)
+            lane.wait_seconds += time.monotonic() - started
+            if on_admitted:
+                on_admitted()
+
+            try:
+                yield lane
+            except Exception as e:
+                if is_rate_limited(e):
+                    lane.throttled += 1
+                    delay = backoff_delay(attempt)
+                    lane.pause(delay)
+                    print(f"{model} throttled, backing off {delay:.1f}s (attempt {attempt + 1})")
+                else:
+                    lane.failed += 1
+                raise
+            lane.completed += 1
+        finally:
+            lane.release()
+
+    async def run(
+        self,
+        model: str,
+        call: Callable[[], Awaitable[T]],
+        tokens: int = 1,
+        max_retries: int = RATE_LIMIT_RETRIES,
+        on_admitted: Optional[Callable[[], None]] = None
+    ) -> T:
+        """
+        Run a model call under the model's limits.
+
+        Throttled calls are retried with exponential backoff and full jitter;
+        the lane pauses for the backoff period so concurrent calls back off
+        too. Other errors propagate immediately.
+
+        Args:
+            model: Model name (the lane key)
+            call: Zero-argument coroutine factory performing the request
+            tokens: Estimated tokens for the TPM budget
+            max_retries: Retries of throttled calls
+            on_admitted: Called each time an attempt is admitted (see reserve)
+
+        Returns:
+            The call's result
+        """
+        for attempt in range(max_retries + 1):
+            try:
+                async with self.reserve(model, tokens, attempt, on_admitted):
+                    return await call()
+            except Exception as e:
+                if not is_rate_limited(e):
+                    raise
+                if attempt == max_retries:
+                    self.lane(model).failed += 1
+                    raise
+
+        raise RuntimeError("unreachable")
+
+    def stats(self) -> Dict[str, Any]:
+        """Report per-model admission counters."""
+        return {model: lane.stats() for model, lane in self._lanes.items()}
@@ -1,16 +1,264 @@
 
 import re
-from typing import Dict, Any, Optional
+import os
+import time
+import asyncio
+import weakref
+import threading
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 from google import genai
 from google.genai.types import (
     GenerateContentConfig, 
     ThinkingConfig, 
     HttpOptions
 )
+from google.auth.transport.requests import Request as AuthRequest
 from google.oauth2.service_account import Credentials
 from dotenv import load_dotenv
 
+from .scheduler import get_model_scheduler, estimate_tokens, backoff_delay, is_rate_limited
+from .response_cache import get_response_cache, response_cache_key
+from .routing import get_stage_router
+from .context_cache import CachedContext, get_context_cache_manager
+from .hedging import get_hedge_policy
+
 load_dotenv(override=True)
+
+# Vertex AI settings
+VERTEX_CREDENTIALS_FILE = os.getenv("VERTEX_CREDENTIALS_FILE") or os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or "auth.json"
+VERTEX_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT", "brae-v2")
+VERTEX_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "global")
+VERTEX_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+# Access tokens are refreshed this long before they expire
+VERTEX_TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("VERTEX_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+
+# Global singleton
+_vertex_client_manager_instance: Optional['VertexClientManager'] = None
+
+
+def get_vertex_client_manager() -> 'VertexClientManager':
+    """Get singleton instance of VertexClientManager."""
+    global _vertex_client_manager_instance
+    if _vertex_client_manager_instance is None:
+        _vertex_client_manager_instance = VertexClientManager()
+    return _vertex_client_manager_instance
+
+
+class VertexClientManager:
+    """
+    Process-wide pool of Vertex AI clients.
+    
+    Service account credentials are loaded once and their access token is
+    refreshed proactively, shortly before expiry, by a single caller while
+    the others keep using the current token. One genai.Client is kept per
+    (project, location) and event loop, so its HTTP connection pool is
+    reused across calls (async transports cannot be shared between loops).
+    Clients of closed or collected loops are dropped when a client is created.
+    """
+
+    def __init__(
+        self,
+        credentials_file: str = VERTEX_CREDENTIALS_FILE,
+        project: str = VERTEX_PROJECT,
+        location: str = VERTEX_LOCATION,
+        refresh_margin_seconds: int = VERTEX_TOKEN_REFRESH_MARGIN_SECONDS
+    ):
+        self.credentials_file = credentials_file
+        self.project = project
+        self.location = location
+        self.refresh_margin_seconds = refresh_margin_seconds
+
+        self._credentials: Optional[Credentials] = None
+        # (project, location, loop id) -> (loop weakref, client); the weakref
+        # tells a live loop apart from a dead one whose id was reused
+        self._clients: Dict[Tuple[str, str, int], Tuple[weakref.ref, genai.Client]] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._lock = threading.Lock()
+
+        self.clients_created = 0
+        self.clients_evicted = 0
+        self.requests = 0
+        self.credential_loads = 0
+        self.credential_refreshes = 0
+        self.refresh_failures = 0
+        self.last_refresh_seconds: Optional[float] = None
+
+    def _load_credentials(self) -> Credentials:
+        if self._credentials is None:
+            if not self.credentials_file or not os.path.exists(self.credentials_file):
+                raise ValueError(
+                    "Vertex credentials not found: set VERTEX_CREDENTIALS_FILE or "
+                    "GOOGLE_APPLICATION_CREDENTIALS to a service account JSON file"
+                )
+            self._credentials = Credentials.from_service_account_file(self.credentials_file, scopes=VERTEX_SCOPES)
+            self.credential_loads += 1
+        return self._credentials
+
+    def _needs_refresh(self, credentials: Credentials) -> bool:
+        if not credentials.token or not credentials.expiry:
+            return True
+        expiry = credentials.expiry
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        remaining = (expiry - datetime.now(timezone.utc)).total_seconds()
+        return remaining < self.refresh_margin_seconds
+
+    async def _ensure_fresh_credentials(self) -> Credentials:
+        credentials = self._load_credentials()
+        if not self._needs_refresh(credentials):
+            return credentials
+
+        async with self._refresh_lock:
+            # Another caller may have refreshed while we waited
+            if self._needs_refresh(credentials):
+                started = time.perf_counter()
+                try:
+                    await asyncio.to_thread(credentials.refresh, AuthRequest())
+                    self.credential_refreshes += 1
+                    self.last_refresh_seconds = round(time.perf_counter() - started, 3)
+                except Exception:
+                    self.refresh_failures += 1
+                    # A token that has not expired yet is still usable
+                    if not credentials.valid:
+                        raise
+        return credentials
+
+    async def get_client(self, project: Optional[str] = None, location: Optional[str] = None) -> genai.Client:
+        """
+        Return the shared client for a project and location.
+        
+        Args:
+            project: GCP project (defaults to GOOGLE_CLOUD_PROJECT)
+            location: Vertex location (defaults to GOOGLE_CLOUD_LOCATION)
+            
+        Returns:
+            Reusable genai.Client with fresh credentials
+        """
+        credentials = await self._ensure_fresh_credentials()
+        loop = asyncio.get_running_loop()
+        key = (project or self.project, location or self.location, id(loop))
+
+        with self._lock:
+            self.requests += 1
+            entry = self._clients.get(key)
+            if entry is not None and entry[0]() is loop:
+                return entry[1]
+
+            self._evict_dead_loops()
+            client = genai.Client(
+                vertexai=True,
+                project=key[0],
+                location=key[1],
+                credentials=credentials,
+                http_options=HttpOptions(api_version="v1")
+            )
+            self._clients[key] = (weakref.ref(loop), client)
+            self.clients_created += 1
+        return client
+
+    def _evict_dead_loops(self):
+        # Called with self._lock held
+        for key, (loop_ref, _) in list(self._clients.items()):
+            loop = loop_ref()
+            if loop is None or loop.is_closed():
+                del self._clients[key]
+                self.clients_evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Report client reuse and credential refresh counters."""
+        return {
+            "clients": len(self._clients),
+            "clients_created": self.clients_created,
+            "clients_evicted": self.clients_evicted,
+            "requests": self.requests,
+            "reused_requests": self.requests - self.clients_created,
+            "reuse_ratio": round(1 - self.clients_created / self.requests, 4) if self.requests else 0.0,
+            "credential_loads": self.credential_loads,
+            "credential_refreshes": self.credential_refreshes,
+            "refresh_failures": self.refresh_failures,
+            "last_refresh_seconds": self.last_refresh_seconds,
+        }
+
+
+def _clean_response(text: str) -> str:
+    """Strip thinking tokens and markdown fences from a response."""
+    return re.sub(r'^.*?</think>\s*|```json\s*|\s*```', '', text, flags=re.DOTALL).strip()
+
+
+def _generation_config(
+    system: str,
+    temperature: Optional[float],
+    schema: Optional[Dict[str, Any]],
+    thinking_config: Optional[Dict[str, Any] | bool],
+    extra_config: Optional[Dict[str, Any]],
+    cached_content: Optional[str] = None
+) -> GenerateContentConfig:
+    # The system instruction of a cached context is part of the cache
+    config_params = {
+        "system_instruction": [system] if system and not cached_content else None,
+    }
+    
+    if cached_content:
+        config_params["cached_content"] = cached_content
+    
+    if temperature is not None:
+        config_params["temperature"] = temperature
+    
+    # config_params["tools"] = [
+    #         # Tool(google_search=GoogleSearch()),
+    #     {"url_context": {}},
+    # ]
+    if isinstance(thinking_config, dict):
+        config_params["thinking_config"] = ThinkingConfig(**thinking_config)
+    elif thinking_config:
+        config_params["thinking_config"] = ThinkingConfig(thinking_budget=8192, include_thoughts=True)
+
+    if schema:
+        config_params["response_mime_type"] = "application/json"
+        config_params["response_schema"] = schema
+    
+    if extra_config:
+        config_params.update(extra_config)
+    
+    return GenerateContentConfig(**config_params)
+
+
+def _expects_json(schema: Optional[Dict[str, Any]], extra_config: Optional[Dict[str, Any]]) -> bool:
+    return bool(schema) or (extra_config or {}).get("response_mime_type") == "application/json"
+
+
+def _resolve_context(
+    cached_context: Optional[CachedContext],
+    model: str,
+    system: str,
+    user: str
+) -> Tuple[str, str, Optional[str]]:
+    """
+    Full prompt of a call and the cached context its suffix is sent against.
+
+    Returns:
+        (system, user) of the complete prompt, used for response cache keys
+        and token estimates, and the provider cache name (None to send the
+        complete prompt inline)
+    """
+    if cached_context is None:
+        return system, user, None
+    cache_name = cached_context.name if cached_context.usable_for(model) else None
+    return cached_context.system, cached_context.prefix + user, cache_name
+
+
+def _count_context_call(cached_context: Optional[CachedContext], cache_name: Optional[str]) -> None:
+    if cached_context is None:
+        return
+    manager = get_context_cache_manager()
+    if cache_name:
+        manager.cached_calls += 1
+    else:
+        manager.inline_calls += 1
+
+
 async def vertexai_model(
     system: str,
     user: str,
@@ -19,12 +267,21 @@ async def vertexai_model(
     schema: Optional[Dict[str, Any]] = None,
     thinking_config: Optional[Dict[str, Any] | bool] = None,
     extra_config: Optional[Dict[str, Any]] = None,
+    cache: bool = True,
+    stage: Optional[str] = None,
+    cached_context: Optional[CachedContext] = None,
+    hedge: Optional[bool] = None,
 ) -> str:
     """
     Calls a Vertex AI Gemini model using service account authentication and returns cleaned response.
 
-    Requires the following environment variables:
-        GOOGLE_APPLICATION_CREDENTIALS: Path to service account JSON key file
+    Calls are admitted through the shared ModelScheduler (per-model
+    concurrency, RPM/TPM budgets and 429 backoff), and looked up in the
+    LLM response cache first when LLM_CACHE_MODE enables it. Slow calls
+    are hedged with a duplicate request when LLM_HEDGING enables it.
+
+    Uses the shared client from VertexClientManager, configured by:
+        VERTEX_CREDENTIALS_FILE / GOOGLE_APPLICATION_CREDENTIALS: Service account JSON key file
         GOOGLE_CLOUD_PROJECT: Your GCP project ID
         GOOGLE_CLOUD_LOCATION: GCP region (e.g., 'us-central1')
 
@@ -34,74 +291,188 @@ async def vertexai_model(
         temperature: Sampling temperature (0.0-2.0)
         model: Model ID (e.g., 'gemini-2.5-flash', 'gemini-2.0-flash-001')
         schema: Optional JSON schema for structured output
+        thinking_config: ThinkingConfig fields (thinking_budget, include_thoughts),
+            or True for the default 8192-token budget
         extra_config: Optional additional config parameters (safety_settings, max_tokens, etc.)
+        cache: Set False to bypass the response cache for this call (e.g. when
+            sampling variety is wanted)
+        stage: Pipeline stage the call belongs to, for per-stage metrics
+            (settings usually come from stage_model_kwargs)
+        cached_context: Shared prefix from ContextCacheManager; its system
+            instruction replaces system and user is the suffix. Sent inline
+            when the context is local, expired or for another model
+        hedge: Override LLM_HEDGING for this call (see models.hedging)
 
     Returns:
         Cleaned response text with markdown and thinking tokens stripped
+
+    Raises:
+        ResponseCacheMiss: In replay mode, when no response was recorded
     """
     
     attempts = 3
 
-    scopes = ["https://www.googleapis.com/auth/cloud-platform"]
-
-    service_account_file = "auth.json"
-
-    if not service_account_file:
-        raise ValueError("GOOGLE_APPLICATION_CREDENTIALS environment variable must be set to the path of your service account JSON file")
+    suffix = user
+    system, user, cache_name = _resolve_context(cached_context, model, system, user)
 
-    credentials = Credentials.from_service_account_file(service_account_file, scopes=scopes)
+    response_cache = get_response_cache()
+    cache_key = None
+    if cache and response_cache.enabled:
+        cache_key = response_cache_key(model, system, user, schema, temperature, thinking_config, extra_config)
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            if stage:
+                get_stage_router().record(stage, model, cached=True)
+            return cached
 
-    client = genai.Client(
-        vertexai=True,
-        project="brae-v2",
-        location="global",
-        credentials=credentials,
-        http_options=HttpOptions(api_version="v1")
-    )
+    client = await get_vertex_client_manager().get_client()
+    scheduler = get_model_scheduler()
+    max_output_tokens = (extra_config or {}).get("max_output_tokens") or 0
+    tokens = estimate_tokens(system, user) + max_output_tokens
     
     for _ in range(attempts):
+        started = time.perf_counter()
         try:
-            config_params = {
-                "system_instruction": [system] if system else None,
-            }
-            
-            if temperature is not None:
-                config_params["temperature"] = temperature
-            
-            # config_params["tools"] = [
-            #         # Tool(google_search=GoogleSearch()),
-            #     {"url_context": {}},
-            # ]
-            if thinking_config:
-                config_params["thinking_config"] = ThinkingConfig(thinking_budget=8192, include_thoughts=True)
-
-            if schema:
-                config_params["response_mime_type"] = "application/json"
-                config_params["response_schema"] = schema
+            config = _generation_config(system, temperature, schema, thinking_config, extra_config, cache_name)
+            contents = suffix if cache_name else user
+            _count_context_call(cached_context, cache_name)
             
-            if extra_config:
-                config_params.update(extra_config)
-            
-            config = GenerateContentConfig(**config_params)
-            
-            response = await client.aio.models.generate_content(
-                model=model,
-                contents=user,
-                config=config,
+            response = await get_hedge_policy().run(
+                (model, stage or "default"),
+                lambda on_admitted: scheduler.run(
+                    model,
+                    lambda: client.aio.models.generate_content(
+                        model=model,
+                        contents=contents,
+                        config=config,
+                    ),
+                    tokens=tokens,
+                    on_admitted=on_admitted
+                ),
+                validate=lambda response: bool(response.text),
+                enabled=hedge
             )
 
             print(response.text)
             
+            if stage:
+                get_stage_router().record(
+                    stage, model, time.perf_counter() - started,
+                    usage=response.usage_metadata, failed=not response.text
+                )
+            
             if not response.text:
                 continue
             
-            content = re.sub(r'^.*?</think>\s*|```json\s*|\s*```', '', response.text, flags=re.DOTALL).strip()
+            content = _clean_response(response.text)
+            
+            if cache_key:
+                await response_cache.put(cache_key, model, content, json_response=_expects_json(schema, extra_config))
             
             return content
             
         except Exception as e:
-            if _ == attempts - 1:
+            if stage:
+                get_stage_router().record(stage, model, time.perf_counter() - started, failed=True)
+            # The scheduler already retried throttling with backoff
+            if is_rate_limited(e) or _ == attempts - 1:
                 raise e
+            # The cached context may have expired: retry with the prefix inline
+            cache_name = None
+            await asyncio.sleep(backoff_delay(_))
             continue
     
-    return ""
\ No newline at end of file
+    return ""
+
+
+async def vertexai_model_stream(
+    system: str,
+    user: str,
+    temperature: float = None,
+    model: str = "gemini-2.5-flash-preview-09-2025",
+    schema: Optional[Dict[str, Any]] = None,
+    thinking_config: Optional[Dict[str, Any] | bool] = None,
+    extra_config: Optional[Dict[str, Any]] = None,
+    cache: bool = True,
+    stage: Optional[str] = None,
+    cached_context: Optional[CachedContext] = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of vertexai_model: yields response text as it arrives.
+
+    Thought parts are not yielded. The stream holds one scheduler slot for
+    its whole duration. Opening the stream is retried like vertexai_model;
+    once text has been yielded, errors propagate to the caller. A response
+    cache hit is yielded as a single chunk, and a completed stream is stored
+    in the cache.
+
+    Args:
+        Same as vertexai_model
+
+    Yields:
+        Raw response text chunks (callers clean or parse the concatenation)
+
+    Raises:
+        ResponseCacheMiss: In replay mode, when no response was recorded
+    """
+    attempts = 3
+
+    suffix = user
+    system, user, cache_name = _resolve_context(cached_context, model, system, user)
+
+    response_cache = get_response_cache()
+    cache_key = None
+    if cache and response_cache.enabled:
+        cache_key = response_cache_key(model, system, user, schema, temperature, thinking_config, extra_config)
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            if stage:
+                get_stage_router().record(stage, model, cached=True)
+            yield cached
+            return
+
+    client = await get_vertex_client_manager().get_client()
+    scheduler = get_model_scheduler()
+    max_output_tokens = (extra_config or {}).get("max_output_tokens") or 0
+    tokens = estimate_tokens(system, user) + max_output_tokens
+
+    for attempt in range(attempts):
+        chunks = []
+        usage = None
+        started = time.perf_counter()
+        config = _generation_config(system, temperature, schema, thinking_config, extra_config, cache_name)
+        contents = suffix if cache_name else user
+        _count_context_call(cached_context, cache_name)
+        try:
+            async with scheduler.reserve(model, tokens, attempt):
+                stream = await client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                )
+                async for chunk in stream:
+                    # Usage metadata is complete on the last chunk
+                    usage = chunk.usage_metadata or usage
+                    if chunk.text:
+                        chunks.append(chunk.text)
+                        yield chunk.text
+        except Exception as e:
+            if stage:
+                get_stage_router().record(stage, model, time.perf_counter() - started, usage=usage, failed=True)
+            if chunks or attempt == attempts - 1:
+                raise
+            # A throttled stream already paused the lane: the next reserve waits it out
+            if not is_rate_limited(e):
+                cache_name = None
+                await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        if stage:
+            get_stage_router().record(stage, model, time.perf_counter() - started, usage=usage, failed=not chunks)
+
+        if not chunks:
+            continue
+
+        if cache_key:
+            await response_cache.put(cache_key, model, _clean_response("".join(chunks)), json_response=_expects_json(schema, extra_config))
+        return
@@ -4,6 +4,8 @@ import voyageai
 
 from dotenv import load_dotenv
 
+from .scheduler import get_model_scheduler, estimate_tokens
+
 load_dotenv(override=True)
 
 vo = voyageai.AsyncClient(api_key=os.getenv("VOYAGE_API_KEY"))
@@ -13,10 +15,14 @@ async def voyage_embed(
     input_type: str = "document", 
     model: str = "voyage-finance-2"
 ) -> List[List[float]]:
-    response = await vo.embed(
-        content,
-        model=model,
-        input_type=input_type,
+    response = await get_model_scheduler().run(
+        model,
+        lambda: vo.embed(
+            content,
+            model=model,
+            input_type=input_type,
+        ),
+        tokens=estimate_tokens(*content)
     )
     return response.embeddings
 
@@ -35,11 +41,15 @@ async def voyage_rerank(query: str, documents: List[str], top_k: int = 5) -> Lis
     if not documents:
         return []
     
-    response = await vo.rerank(
-        query=query,
-        documents=documents,
-        model="rerank-2.5",
-        top_k=top_k
+    response = await get_model_scheduler().run(
+        "rerank-2.5",
+        lambda: vo.rerank(
+            query=query,
+            documents=documents,
+            model="rerank-2.5",
+            top_k=top_k
+        ),
+        tokens=estimate_tokens(query, *documents) * 2
     )
     
     return [
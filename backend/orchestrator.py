@@ -7,8 +7,9 @@ Supports: ingest, search, compose, and generate modes.
 
 import logging
 import asyncio
+import uuid
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Tuple, Literal
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple, Literal
 
 from utils.load_and_merge import PPTXLoader, PPTXSlideManager
 from core.slide_generation import PresentationProcessor
@@ -19,8 +20,9 @@ from utils.schemas import (
 )
 from core.planner import SlidePlannerAgent
 from core.retrieval import SlideRetrievalService
-from core.storage import SlideStorageAdapter
+from core.storage import SlideStorageAdapter, validate_tenant_id
 from core.ingestion import SlideIngestionService
+from models.scheduler import llm_job
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +45,9 @@ class SlideLibraryOrchestrator:
     - 'generate': Generate content for existing template (fixed mode)
     
     This provides a single, consistent interface for all slide library functionality.
+    
+    Requests may name a tenant; each tenant gets its own partitioned storage
+    adapter and services (see for_tenant), created on first use and reused.
     """
     
     def __init__(
@@ -69,6 +74,10 @@ class SlideLibraryOrchestrator:
         self._retrieval = None
         self._planner = None
         
+        # Per-tenant orchestrators, keyed by normalized tenant id
+        self._tenants: Dict[str, "SlideLibraryOrchestrator"] = {}
+        self._tenants_lock = asyncio.Lock()
+        
         logger.info("SlideLibraryOrchestrator initialized")
     
     async def _ensure_initialized(self):
@@ -92,36 +101,154 @@ class SlideLibraryOrchestrator:
         self._initialized = True
         logger.info("Orchestrator services initialized")
     
+    async def for_tenant(self, tenant_id: Optional[str]) -> "SlideLibraryOrchestrator":
+        """
+        Resolve the orchestrator serving a tenant.
+        
+        Tenant orchestrators share this one's storage services, planner and
+        default template but read and write only their tenant's partition.
+        
+        Args:
+            tenant_id: Tenant id, or None for the shared library
+            
+        Returns:
+            Initialized orchestrator for the tenant
+            
+        Raises:
+            ValueError: If the tenant id is invalid
+        """
+        await self._ensure_initialized()
+        
+        if not tenant_id:
+            return self
+        
+        storage = self.storage
+        key = validate_tenant_id(tenant_id)
+        tenant = self._tenants.get(key)
+        if tenant is None:
+            async with self._tenants_lock:
+                tenant = self._tenants.get(key)
+                if tenant is None:
+                    tenant = SlideLibraryOrchestrator(
+                        storage=SlideStorageAdapter(
+                            backend=storage.backend,
+                            mongo=storage.mongo,
+                            s3=storage.s3,
+                            qdrant=storage.qdrant,
+                            tenant_id=key
+                        ),
+                        default_template_path=self.default_template_path,
+                        auto_initialize=self.auto_initialize
+                    )
+                    await tenant._ensure_initialized()
+                    tenant._planner = self._planner
+                    self._tenants[key] = tenant
+                    logger.info(f"Tenant library ready: {key}")
+        return tenant
+    
     async def execute(
         self,
         mode: Mode,
+        tenant_id: Optional[str] = None,
         **kwargs
     ) -> Any:
         """
         Execute operation based on mode.
         
+        Each call is one job for the model scheduler, so concurrent requests
+        share LLM and embedding capacity fairly.
+        
         Args:
             mode: Operation mode ('ingest', 'search', 'compose', 'generate')
+            tenant_id: Run against this tenant's library (None for the shared one)
             **kwargs: Mode-specific parameters
             
         Returns:
             Mode-specific results
             
         Raises:
-            ValueError: If mode is invalid or required parameters missing
+            ValueError: If mode or tenant id is invalid or required parameters missing
         """
+        if tenant_id:
+            tenant = await self.for_tenant(tenant_id)
+            return await tenant.execute(mode, **kwargs)
+        
         await self._ensure_initialized()
         
-        if mode == "ingest":
-            return await self._execute_ingest(**kwargs)
-        elif mode == "search":
-            return await self._execute_search(**kwargs)
-        elif mode == "compose":
-            return await self._execute_compose(**kwargs)
-        elif mode == "generate":
-            return await self._execute_generate(**kwargs)
-        else:
-            raise ValueError(f"Invalid mode: {mode}. Must be one of: ingest, search, compose, generate")
+        with llm_job(f"{mode}-{uuid.uuid4().hex[:12]}"):
+            if mode == "ingest":
+                return await self._execute_ingest(**kwargs)
+            elif mode == "search":
+                return await self._execute_search(**kwargs)
+            elif mode == "compose":
+                return await self._execute_compose(**kwargs)
+            elif mode == "generate":
+                return await self._execute_generate(**kwargs)
+            else:
+                raise ValueError(f"Invalid mode: {mode}. Must be one of: ingest, search, compose, generate")
+    
+    async def stream(
+        self,
+        mode: Mode,
+        tenant_id: Optional[str] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a generation mode and stream its progress.
+        
+        Content is generated per slide with streaming requests; each slide is
+        applied to a partial deck as soon as its content is complete.
+        
+        Args:
+            mode: 'compose' or 'generate'
+            tenant_id: Run against this tenant's library (None for the shared one)
+            **kwargs: Same parameters as execute()
+            
+        Yields:
+            Stage events ({"event": "stage", "stage": ...}) followed by the
+            PresentationProcessor.stream() events; the last is "complete"
+            with the output file paths
+            
+        Raises:
+            ValueError: If mode or tenant id is invalid or required parameters missing
+        """
+        if tenant_id:
+            tenant = await self.for_tenant(tenant_id)
+            async for event in tenant.stream(mode, **kwargs):
+                yield event
+            return
+        
+        await self._ensure_initialized()
+        
+        with llm_job(f"{mode}-{uuid.uuid4().hex[:12]}"):
+            if mode == "compose":
+                yield {"event": "stage", "stage": "planning"}
+                plan, merged_path, slides_by_position, outlines_by_position = await self._prepare_composition(**kwargs)
+                yield {"event": "stage", "stage": "merged", "slides": len(plan.slides), "merged_pptx": str(merged_path)}
+                processor = self._content_processor(
+                    merged_pptx_path=merged_path,
+                    plan=plan,
+                    user_context=kwargs["user_context"],
+                    output_dir=kwargs.get("output_dir", "output"),
+                    library_slides=slides_by_position,
+                    outlines=outlines_by_position
+                )
+            elif mode == "generate":
+                processor = PresentationProcessor(
+                    pptx_path=kwargs["pptx_path"],
+                    user_input=kwargs["user_input"],
+                    documents=kwargs.get("documents", ""),
+                    output_dir=kwargs.get("output_dir", "output")
+                )
+            else:
+                raise ValueError(f"Invalid mode: {mode}. Streaming supports: compose, generate")
+            
+            yield {"event": "stage", "stage": "generating"}
+            async for event in processor.stream():
+                yield event
+            
+            if mode == "compose":
+                await self._store_computed_reasoning(processor, slides_by_position)
     
     async def _execute_ingest(
         self,
@@ -201,6 +328,42 @@ class SlideLibraryOrchestrator:
         Returns:
             Dict with output file paths
         """
+        plan, merged_path, slides_by_position, outlines_by_position = await self._prepare_composition(
+            user_context=user_context,
+            user_prompt=user_prompt,
+            output_dir=output_dir,
+            num_slides=num_slides
+        )
+        
+        # Step 4: Generate content
+        logger.info("[COMPOSE] Step 4/4: Generating content")
+        result = await self._generate_content(
+            merged_pptx_path=merged_path,
+            plan=plan,
+            user_context=user_context,
+            output_dir=output_dir,
+            library_slides=slides_by_position,
+            outlines=outlines_by_position
+        )
+        
+        logger.info("[COMPOSE] ✅ Composition complete")
+        return result
+    
+    async def _prepare_composition(
+        self,
+        user_context: str,
+        user_prompt: str,
+        output_dir: str = "output",
+        num_slides: Optional[int] = None,
+        **kwargs
+    ) -> Tuple[PresentationPlan, Path, Dict[int, SlideLibraryMetadata], Dict[int, SlideOutlineItem]]:
+        """
+        Plan a composition, retrieve its slides and merge them into one deck.
+        
+        Returns:
+            Tuple of (plan, merged template path, library slide metadata and
+            plan outline items, both by 1-based position in the merged deck)
+        """
         logger.info(f"[COMPOSE] Starting dynamic composition")
         logger.info(f"[COMPOSE] Prompt: {user_prompt}")
         
@@ -217,11 +380,15 @@ class SlideLibraryOrchestrator:
         # Step 2: Retrieve slides
         logger.info("[COMPOSE] Step 2/4: Retrieving slides")
         slide_paths = []
+        library_slides: List[Optional[SlideLibraryMetadata]] = []
+        retrieved_outlines: List[SlideOutlineItem] = []
         
         for outline_item in plan.slides:
-            slide_path = await self._retrieve_slide_with_retry(outline_item)
+            metadata, slide_path = await self._retrieve_slide_with_retry(outline_item)
             if slide_path:
                 slide_paths.append(slide_path)
+                library_slides.append(metadata)
+                retrieved_outlines.append(outline_item)
                 logger.info(f"[COMPOSE] ✅ Slide {outline_item.position}")
             else:
                 logger.warning(f"[COMPOSE] ⚠️  No slide for position {outline_item.position}")
@@ -238,6 +405,21 @@ class SlideLibraryOrchestrator:
         target_loader = PPTXLoader(str(slide_paths[0]))
         target_prs = target_loader.get_presentation()
         
+        # Library slides and outline items by 1-based position in the merged
+        # deck (the default template may contribute several slides, and plan
+        # positions without a retrieved slide are skipped)
+        first_count = target_loader.get_slide_count()
+        slides_by_position = {
+            (1 if index == 0 else first_count + index): metadata
+            for index, metadata in enumerate(library_slides)
+            if metadata and (index > 0 or first_count == 1)
+        }
+        outlines_by_position = {
+            (1 if index == 0 else first_count + index): outline_item
+            for index, outline_item in enumerate(retrieved_outlines)
+            if index > 0 or first_count == 1
+        }
+        
         for slide_path in slide_paths[1:]:
             loader = PPTXLoader(str(slide_path))
             PPTXSlideManager.copy_slide(
@@ -250,18 +432,7 @@ class SlideLibraryOrchestrator:
         PPTXSlideManager.save_presentation(target_prs, str(merged_path))
         target_loader.dispose()
         logger.info(f"Merged {len(slide_paths)} slides to: {merged_path}")
-        
-        # Step 4: Generate content
-        logger.info("[COMPOSE] Step 4/4: Generating content")
-        result = await self._generate_content(
-            merged_pptx_path=merged_path,
-            plan=plan,
-            user_context=user_context,
-            output_dir=output_dir
-        )
-        
-        logger.info("[COMPOSE] ✅ Composition complete")
-        return result
+        return plan, merged_path, slides_by_position, outlines_by_position
     
     async def _execute_generate(
         self,
@@ -301,7 +472,7 @@ class SlideLibraryOrchestrator:
     async def _retrieve_slide_with_retry(
         self,
         outline_item: SlideOutlineItem
-    ) -> Optional[Path]:
+    ) -> Tuple[Optional[SlideLibraryMetadata], Optional[Path]]:
         """
         Retrieve a slide with exponential backoff retry.
         
@@ -309,7 +480,8 @@ class SlideLibraryOrchestrator:
             outline_item: Slide specification
             
         Returns:
-            Path to retrieved/default slide, or None
+            Tuple of (library metadata or None for the default template,
+            path to retrieved/default slide or None)
         """
         for attempt in range(MAX_RETRIES):
             try:
@@ -321,8 +493,9 @@ class SlideLibraryOrchestrator:
                 if results:
                     metadata = results[0]
                     _, slide_path = await self.storage.get_slide_by_id(metadata.slide_id)
+                    self.storage.popularity.record([metadata.slide_id], "compose_picks")
                     logger.debug(f"Retrieved: {metadata.description[:50]}...")
-                    return slide_path
+                    return metadata, slide_path
                 else:
                     logger.debug(f"No results for: {outline_item.description}")
                     
@@ -343,57 +516,152 @@ class SlideLibraryOrchestrator:
         
         if self.default_template_path and Path(self.default_template_path).exists():
             logger.info(f"Using default template: {self.default_template_path}")
-            return Path(self.default_template_path)
+            return None, Path(self.default_template_path)
         else:
             logger.warning("No default template available")
-            return None
+            return None, None
     
     async def _generate_content(
         self,
         merged_pptx_path: Path,
         plan: PresentationPlan,
         user_context: str,
-        output_dir: str
+        output_dir: str,
+        library_slides: Optional[Dict[int, SlideLibraryMetadata]] = None,
+        outlines: Optional[Dict[int, SlideOutlineItem]] = None
     ) -> Dict[str, str]:
         """
         Generate content for merged presentation.
         
+        Reasoning stored with the library slides is passed to the processor,
+        which then skips the reasoning pass for them. Reasoning computed for
+        library slides that had none is stored for the next compose.
+        
         Args:
             merged_pptx_path: Path to merged template
             plan: Presentation plan
             user_context: User context
             output_dir: Output directory
+            library_slides: Library slide metadata by 1-based position in the merged deck
+            outlines: Plan outline items by 1-based position in the merged deck
             
         Returns:
             Dict with output file paths
         """
+        library_slides = library_slides or {}
+        processor = self._content_processor(
+            merged_pptx_path=merged_pptx_path,
+            plan=plan,
+            user_context=user_context,
+            output_dir=output_dir,
+            library_slides=library_slides,
+            outlines=outlines or {}
+        )
+        
+        result = await processor.execute()
+        await self._store_computed_reasoning(processor, library_slides)
+        
+        logger.info(f"Content generation complete")
+        return result
+    
+    def _content_processor(
+        self,
+        merged_pptx_path: Path,
+        plan: PresentationPlan,
+        user_context: str,
+        output_dir: str,
+        library_slides: Dict[int, SlideLibraryMetadata],
+        outlines: Dict[int, SlideOutlineItem]
+    ) -> PresentationProcessor:
+        """
+        Build the processor for a merged deck, with the plan as context.
+        
+        The plan is sent with every slide; the user context is the document
+        set from which each slide gets its relevant passages, queried with
+        the slide's plan description and guidelines.
+        """
         # Enrich context with plan information
-        enriched_context = f"""Presentation Plan:
+        plan_context = f"""Presentation Plan:
 Theme: {plan.overall_theme}
 Audience: {plan.target_audience}
 
 Slides:
 """
         for slide in plan.slides:
-            enriched_context += f"{slide.position}. {slide.description}\n   Guidelines: {slide.content_guidelines}\n"
-        
-        enriched_context += f"\n\nContext:\n{user_context}"
+            plan_context += f"{slide.position}. {slide.description}\n   Guidelines: {slide.content_guidelines}\n"
         
         # Use PresentationProcessor
-        processor = PresentationProcessor(
+        template_reasoning = {
+            position: metadata.reasoning
+            for position, metadata in library_slides.items()
+            if metadata.reasoning
+        }
+        
+        return PresentationProcessor(
             pptx_path=str(merged_pptx_path),
             user_input=plan.overall_theme,
-            documents=enriched_context,
-            output_dir=output_dir
+            documents=user_context,
+            output_dir=output_dir,
+            template_reasoning=template_reasoning,
+            context_header=plan_context,
+            slide_guidelines={
+                position: f"{slide.description} {slide.content_guidelines}"
+                for position, slide in outlines.items()
+            }
         )
+    
+    async def _store_computed_reasoning(
+        self,
+        processor: PresentationProcessor,
+        library_slides: Dict[int, SlideLibraryMetadata]
+    ) -> None:
+        """Backfill reasoning for slides ingested before it was stored."""
+        for position, metadata in library_slides.items():
+            reasoning = processor.computed_reasoning.get(position)
+            if not metadata.reasoning and reasoning:
+                try:
+                    await self.storage.set_slide_reasoning(metadata.slide_id, reasoning)
+                except Exception as e:
+                    logger.warning(f"Failed to store reasoning for slide {metadata.slide_id}: {e}")
+    
+    async def flush_popularity(self) -> int:
+        """
+        Flush popularity counters of the shared and every tenant library.
         
-        result = await processor.execute()
+        Returns:
+            Number of slides updated
+        """
+        if not self._initialized:
+            return 0
+        written = 0
+        for orchestrator in [self, *self._tenants.values()]:
+            written += await orchestrator.storage.popularity.flush()
+        return written
+    
+    async def run_popularity_flush(self, interval_seconds: float):
+        """
+        Flush popularity counters forever at a fixed interval.
         
-        logger.info(f"Content generation complete")
-        return result
+        Args:
+            interval_seconds: Delay between flushes
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush_popularity()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Popularity flush failed: {e}")
     
     async def close(self):
-        """Close storage connections."""
+        """Flush tenant counters and close storage connections (shared with tenant orchestrators)."""
+        for tenant in self._tenants.values():
+            try:
+                await tenant.storage.popularity.flush()
+            except Exception as e:
+                logger.error(f"Popularity flush failed for tenant {tenant.storage.tenant_id}: {e}")
+        self._tenants.clear()
         if self.storage and self._initialized:
             await self.storage.close()
             logger.info("Orchestrator closed")
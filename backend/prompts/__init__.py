@@ -5,11 +5,15 @@ from .prompts import (
     SLIDE_DESCRIPTION_USER_PROMPT,
     PRESENTATION_PLANNER_SYSTEM_PROMPT,
     PRESENTATION_PLANNER_USER_PROMPT,
+    PACKED_SLIDES_INSTRUCTIONS,
+    PACKED_SLIDES_USER_PROMPT,
 )
 from .schemas import (
     CONTENT_REASONING_SCHEMA,
     CONTENT_GENERATION_SCHEMA,
     PRESENTATION_PLANNER_SCHEMA,
+    PACKED_CONTENT_REASONING_SCHEMA,
+    PACKED_SLIDE_DESCRIPTION_SCHEMA,
 )
 
 __all__ = [
@@ -22,4 +26,8 @@ __all__ = [
     "CONTENT_REASONING_SCHEMA",
     "CONTENT_GENERATION_SCHEMA",
     "PRESENTATION_PLANNER_SCHEMA",
+    "PACKED_SLIDES_INSTRUCTIONS",
+    "PACKED_SLIDES_USER_PROMPT",
+    "PACKED_CONTENT_REASONING_SCHEMA",
+    "PACKED_SLIDE_DESCRIPTION_SCHEMA",
 ]
\ No newline at end of file
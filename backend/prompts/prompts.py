@@ -353,3 +353,37 @@ Generate a presentation plan in the following JSON format:
 }}
 
 Presentation Plan:"""
+
+
+PACKED_SLIDES_INSTRUCTIONS = """
+
+# Multiple Slides
+
+The input contains several independent slides as a JSON array. Apply the
+instructions above to each slide separately; never mix content between
+slides. Return an object with a `slides` array holding exactly one result
+per input slide, each echoing that slide's `slide` number.
+"""
+
+
+def PACKED_SLIDES_USER_PROMPT(slides: list, task: str) -> str:
+    """
+    Generate user prompt for a batch of slides handled in one request.
+    
+    Args:
+        slides: Slide structures, each with its `slide` number
+        task: One-line task statement for the batch
+        
+    Returns:
+        Formatted user prompt string
+    """
+    import json
+    
+    return f"""{task}
+
+# Slides
+
+```json
+{json.dumps(slides, indent=2, ensure_ascii=False)}
+```
+"""
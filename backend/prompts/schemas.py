@@ -153,4 +153,34 @@ CONTENT_GENERATION_SCHEMA = {
         }
     },
     "required": ["slide", "description", "content"]
-}
\ No newline at end of file
+}
+
+
+PACKED_CONTENT_REASONING_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "slides": {
+            "type": "ARRAY",
+            "items": CONTENT_REASONING_SCHEMA
+        }
+    },
+    "required": ["slides"]
+}
+
+PACKED_SLIDE_DESCRIPTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "slides": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "slide": {"type": "NUMBER"},
+                    "description": {"type": "STRING"}
+                },
+                "required": ["slide", "description"]
+            }
+        }
+    },
+    "required": ["slides"]
+}
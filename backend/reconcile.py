@@ -0,0 +1,49 @@
+"""
+Reconciliation Script
+
+Repairs or removes partial writes across S3, MongoDB, and Qdrant:
+- Stale write intents left by crashed ingestions
+- MongoDB documents without vectors (re-embedded)
+- Qdrant vectors without documents (deleted)
+- Unreferenced slide library objects in S3 (deleted)
+
+Usage:
+    python reconcile.py                # repair
+    python reconcile.py --dry-run      # report only
+    python reconcile.py --tenant acme  # one tenant's library
+"""
+
+import argparse
+import asyncio
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv(override=True)
+
+from core.storage import SlideStorageAdapter
+from core.reconciliation import SlideReconciler
+
+
+async def main(dry_run: bool, tenant_id: str | None = None):
+    """Run one reconciliation pass."""
+    storage = SlideStorageAdapter(tenant_id=tenant_id)
+    await storage.initialize()
+
+    try:
+        reconciler = SlideReconciler(storage)
+        report = await reconciler.run(dry_run=dry_run)
+
+        print("\n" + "=" * 50)
+        for category, count in report.items():
+            print(f"{category}: {count}")
+        print("=" * 50)
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile slide library storage backends")
+    parser.add_argument("--dry-run", action="store_true", help="Report inconsistencies without changing anything")
+    parser.add_argument("--tenant", default=None, help="Operate on this tenant's library instead of the shared one")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.tenant))
@@ -0,0 +1,64 @@
+"""
+Snapshot Script
+
+Exports the slide library to a versioned archive, or restores one into
+empty backends without re-running description generation or embeddings:
+- MongoDB slide documents
+- Qdrant vectors and payloads
+- Optionally every S3 object the documents reference
+
+Usage:
+    python snapshot.py export library.tar            # metadata + vectors
+    python snapshot.py export library.tar --objects  # also copy S3 objects
+    python snapshot.py import library.tar            # bulk-load into empty backends
+    python snapshot.py import library.tar --tenant acme
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv(override=True)
+
+from core.storage import SlideStorageAdapter
+from core.snapshot import LibrarySnapshot, SNAPSHOT_IMPORT_CONCURRENCY
+
+
+async def main(command: str, archive: Path, objects: bool, concurrency: int, tenant_id: str | None) -> int:
+    """Export or import a slide library snapshot."""
+    storage = SlideStorageAdapter(tenant_id=tenant_id)
+    await storage.initialize()
+
+    try:
+        snapshot = LibrarySnapshot(storage)
+        if command == "export":
+            manifest = await snapshot.export(archive, include_objects=objects)
+            counts = manifest["counts"]
+        else:
+            try:
+                counts = await snapshot.restore(archive, concurrency=concurrency)
+            except ValueError as e:
+                print(f"Import refused: {e}")
+                return 1
+
+        print("\n" + "=" * 50)
+        for category, count in counts.items():
+            print(f"{category}: {count}")
+        print("=" * 50)
+        return 0
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a slide library snapshot")
+    parser.add_argument("command", choices=["export", "import"], help="Direction")
+    parser.add_argument("archive", type=Path, help="Snapshot archive path (.tar)")
+    parser.add_argument("--objects", action="store_true", help="Export: include referenced S3 objects")
+    parser.add_argument("--concurrency", type=int, default=SNAPSHOT_IMPORT_CONCURRENCY, help="Import: concurrent backend writes")
+    parser.add_argument("--tenant", default=None, help="Operate on this tenant's library instead of the shared one")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.command, args.archive, args.objects, args.concurrency, args.tenant)))
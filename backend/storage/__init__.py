@@ -1,12 +1,20 @@
 """
 Storage services for slide library.
 
-Minimal wrappers for MongoDB, S3, and Qdrant.
+Minimal wrappers for MongoDB, S3, and Qdrant, plus embedded local
+replacements (SQLite documents, filesystem blobs, embedded Qdrant).
 """
 
 from .mongodb import MongoDBService, get_mongo_service
-from .s3 import S3Service, get_s3_service
+from .s3 import S3Service, get_s3_service, calculate_file_hash
 from .qdrant import QdrantService, get_qdrant_service
+from .local import (
+    LocalDocumentStore,
+    LocalBlobStore,
+    get_local_document_store,
+    get_local_blob_store,
+    get_local_qdrant_service,
+)
 
 __all__ = [
     'MongoDBService',
@@ -15,4 +23,10 @@ __all__ = [
     'get_mongo_service',
     'get_s3_service',
     'get_qdrant_service',
+    'calculate_file_hash',
+    'LocalDocumentStore',
+    'LocalBlobStore',
+    'get_local_document_store',
+    'get_local_blob_store',
+    'get_local_qdrant_service',
 ]
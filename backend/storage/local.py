@@ -0,0 +1,933 @@
+"""
+Local Storage Backends - Embedded replacements for MongoDB, S3, and Qdrant.
+
+Lets the slide library run on a single node with no network services:
+- LocalDocumentStore: SQLite-backed document store with the subset of the
+  Motor collection API the slide library uses
+- LocalBlobStore: filesystem object store with the S3Service interface
+- Qdrant runs in embedded mode (QdrantService with a local path)
+
+Select with SLIDE_STORAGE_BACKEND=local; data lives under LOCAL_STORAGE_DIR.
+SQLite and file I/O run in worker threads. Other processes (CLI tools,
+extra workers) may share the document store; embedded Qdrant allows only
+one process per directory.
+"""
+
+import os
+import copy
+import shutil
+import asyncio
+import sqlite3
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+import bson
+from bson import ObjectId
+from botocore.exceptions import ClientError
+from pymongo import IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+from .mongodb import MongoDBService
+from .s3 import S3Service, STREAM_CHUNK_SIZE, calculate_file_hash
+from .qdrant import QdrantService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Root directory for all local backend data
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "local_storage")
+
+# Seconds a write waits for another process's transaction to finish
+SQLITE_BUSY_TIMEOUT_SECONDS = float(os.getenv("LOCAL_STORAGE_BUSY_TIMEOUT_SECONDS", "30"))
+
+_MISSING = object()
+
+# Global singletons
+_local_document_store_instance: Optional['LocalDocumentStore'] = None
+_local_blob_store_instance: Optional['LocalBlobStore'] = None
+_local_qdrant_service_instance: Optional[QdrantService] = None
+
+
+def get_local_document_store() -> 'LocalDocumentStore':
+    """Get singleton instance of LocalDocumentStore."""
+    global _local_document_store_instance
+    if _local_document_store_instance is None:
+        _local_document_store_instance = LocalDocumentStore()
+    return _local_document_store_instance
+
+
+def get_local_blob_store() -> 'LocalBlobStore':
+    """Get singleton instance of LocalBlobStore."""
+    global _local_blob_store_instance
+    if _local_blob_store_instance is None:
+        _local_blob_store_instance = LocalBlobStore()
+    return _local_blob_store_instance
+
+
+def get_local_qdrant_service() -> QdrantService:
+    """Get singleton embedded QdrantService stored under LOCAL_STORAGE_DIR."""
+    global _local_qdrant_service_instance
+    if _local_qdrant_service_instance is None:
+        path = Path(LOCAL_STORAGE_DIR) / "vectors"
+        path.mkdir(parents=True, exist_ok=True)
+        _local_qdrant_service_instance = QdrantService(path=str(path))
+    return _local_qdrant_service_instance
+
+
+# ---------------------------------------------------------------------------
+# Query evaluation (MongoDB query subset)
+# ---------------------------------------------------------------------------
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    """
+    Resolve a dotted field path, returning _MISSING if absent.
+    
+    Paths through arrays of subdocuments resolve to the list of values,
+    as MongoDB does for queries like {"storage_ref.parts.key": ...}.
+    """
+    value: Any = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and not part.isdigit():
+            values = [item[part] for item in value if isinstance(item, dict) and part in item]
+            if not values:
+                return _MISSING
+            value = values
+        else:
+            return _MISSING
+    return value
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+def _equals(value: Any, operand: Any) -> bool:
+    # Equality on an array field matches any element, as in MongoDB
+    if isinstance(value, list) and not isinstance(operand, list):
+        return operand in value
+    if value is _MISSING:
+        return operand is None
+    return value == operand
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        for op, operand in condition.items():
+            if op == "$in":
+                if not any(_equals(value, item) for item in operand):
+                    return False
+            elif op == "$nin":
+                if any(_equals(value, item) for item in operand):
+                    return False
+            elif op == "$ne":
+                if _equals(value, operand):
+                    return False
+            elif op == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+            elif not _compare(value, op, operand):
+                return False
+        return True
+    return _equals(value, condition)
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Evaluate a MongoDB-style filter against a document."""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif not _match_condition(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+def _project_path(value: Any, parts: List[str]) -> Any:
+    """Project one dotted path, descending into arrays of subdocuments."""
+    if not parts:
+        return copy.deepcopy(value)
+    if isinstance(value, dict):
+        if parts[0] not in value:
+            return _MISSING
+        sub = _project_path(value[parts[0]], parts[1:])
+        return _MISSING if sub is _MISSING else {parts[0]: sub}
+    if isinstance(value, list):
+        return [
+            sub for sub in (_project_path(item, parts) for item in value if isinstance(item, dict))
+            if sub is not _MISSING
+        ]
+    return _MISSING
+
+
+def _merge(target: Dict[str, Any], source: Dict[str, Any]):
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        elif isinstance(value, list) and isinstance(target.get(key), list):
+            for existing, item in zip(target[key], value):
+                if isinstance(existing, dict) and isinstance(item, dict):
+                    _merge(existing, item)
+        else:
+            target[key] = value
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply an inclusion projection (dotted paths supported)."""
+    if not projection:
+        return copy.deepcopy(doc)
+
+    include_id = projection.get("_id", 1)
+    fields = [field for field, flag in projection.items() if field != "_id" and flag]
+    if not fields:
+        result = copy.deepcopy(doc)
+        if not include_id:
+            result.pop("_id", None)
+        return result
+
+    result: Dict[str, Any] = {}
+    if include_id and "_id" in doc:
+        result["_id"] = doc["_id"]
+    for field in fields:
+        projected = _project_path(doc, field.split("."))
+        if projected is not _MISSING:
+            _merge(result, projected)
+    return result
+
+
+def _sort_key(field: str):
+    def key(doc: Dict[str, Any]):
+        value = _get_path(doc, field)
+        # Missing values sort first ascending, like MongoDB's null ordering
+        return (value is not _MISSING and value is not None, value if value is not _MISSING else None)
+    return key
+
+
+def _apply_sort(docs: List[Dict[str, Any]], sort: Optional[Sequence]) -> List[Dict[str, Any]]:
+    if not sort:
+        return docs
+    if isinstance(sort, str):
+        sort = [(sort, 1)]
+    # Stable sorts applied from the least significant key
+    for field, direction in reversed(list(sort)):
+        docs = sorted(docs, key=_sort_key(field), reverse=direction < 0)
+    return docs
+
+
+# ---------------------------------------------------------------------------
+# Query planning (reported by explain)
+# ---------------------------------------------------------------------------
+
+def _equality_fields(query: Dict[str, Any]) -> set:
+    return {
+        field for field, condition in query.items()
+        if not field.startswith("$") and not (
+            isinstance(condition, dict) and any(key.startswith("$") for key in condition)
+        )
+    }
+
+
+def _serves_sort(key: List[tuple], query: Dict[str, Any], sort: List[tuple]) -> bool:
+    """Whether an index returns documents in sort order for a query."""
+    fields = list(key)
+    equality = _equality_fields(query)
+    sort_fields = {field for field, _ in sort}
+    # Leading fields pinned by equality do not affect the order
+    while fields and fields[0][0] in equality and fields[0][0] not in sort_fields:
+        fields.pop(0)
+    prefix = [(field, int(direction)) for field, direction in fields[:len(sort)]]
+    wanted = [(field, int(direction)) for field, direction in sort]
+    return prefix == wanted or prefix == [(field, -direction) for field, direction in wanted]
+
+
+def _index_scan(name: str, key: List[tuple]) -> Dict[str, Any]:
+    return {
+        "stage": "FETCH",
+        "inputStage": {"stage": "IXSCAN", "indexName": name, "keyPattern": dict(key)},
+    }
+
+
+def _plan(indexes: Dict[str, Dict[str, Any]], query: Dict[str, Any], sort: Optional[Sequence]) -> Dict[str, Any]:
+    """
+    Winning plan MongoDB would choose for a find, given the declared indexes.
+
+    The local store evaluates every filter in memory; the plan only reports
+    whether the index set covers the query, so index checks behave the same
+    as against MongoDB.
+    """
+    if isinstance(sort, str):
+        sort = [(sort, 1)]
+    sort = list(sort or [])
+
+    if set(query) == {"$or"}:
+        branches = [_plan(indexes, branch, None) for branch in query["$or"]]
+        plan = (
+            {"stage": "OR", "inputStages": branches}
+            if all(branch["stage"] != "COLLSCAN" for branch in branches)
+            else {"stage": "COLLSCAN"}
+        )
+        return {"stage": "SORT", "inputStage": plan} if sort else plan
+
+    fields = {field for field in query if not field.startswith("$")}
+    for name, spec in indexes.items():
+        key = spec["key"]
+        if key[0][0] in fields:
+            plan = _index_scan(name, key)
+            return {"stage": "SORT", "inputStage": plan} if sort and not _serves_sort(key, query, sort) else plan
+    if sort:
+        for name, spec in indexes.items():
+            if _serves_sort(spec["key"], query, sort):
+                return _index_scan(name, spec["key"])
+        return {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}
+    return {"stage": "COLLSCAN"}
+
+
+# ---------------------------------------------------------------------------
+# Document store
+# ---------------------------------------------------------------------------
+
+def _normalize(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a document through BSON, so it holds what MongoDB would return."""
+    return bson.decode(bson.encode(document))
+
+
+class LocalCursor:
+    """Minimal async cursor, evaluated when its results are read."""
+
+    def __init__(self, collection: "LocalCollection", query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction: Optional[int] = None) -> "LocalCursor":
+        self._sort = [(key_or_list, direction or 1)] if isinstance(key_or_list, str) else list(key_or_list)
+        return self
+
+    def skip(self, count: int) -> "LocalCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "LocalCursor":
+        self._limit = count
+        return self
+
+    async def _results(self) -> List[Dict[str, Any]]:
+        docs = _apply_sort(await self._collection._read(self._query), self._sort)[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = await self._results()
+        return results[:length] if length else results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in await self._results():
+            yield doc
+
+    async def explain(self) -> Dict[str, Any]:
+        indexes = await self._collection._read_indexes()
+        return {"queryPlanner": {"winningPlan": _plan(indexes, self._query, self._sort)}}
+
+
+class LocalCollection:
+    """
+    SQLite-backed collection exposing the Motor methods used by the slide library.
+
+    Documents are stored as BSON and cached in memory. Every operation runs
+    in a worker thread under the store lock; writes run in an immediate
+    transaction and first reload the table if another process changed it
+    (tracked by PRAGMA data_version and a per-table version), so unique
+    indexes and version counters hold across processes sharing the database.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.Lock, table: str, name: str):
+        self._conn = connection
+        self._lock = lock
+        self._table = table
+        self.name = name
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (id TEXT PRIMARY KEY, doc BLOB NOT NULL)')
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+        self._data_version: Optional[int] = None
+        self._version: Optional[int] = None
+
+    @staticmethod
+    def _doc_id(value: Any) -> str:
+        return repr(value)
+
+    def _refresh(self):
+        """Reload the table if another connection committed to it (store lock held)."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        row = self._conn.execute('SELECT version FROM "_versions" WHERE collection = ?', (self._table,)).fetchone()
+        version = row[0] if row else 0
+        if version == self._version:
+            return
+        self._version = version
+        self._docs = {
+            row[0]: bson.decode(row[1])
+            for row in self._conn.execute(f'SELECT id, doc FROM "{self._table}"')
+        }
+        self._indexes = {}
+        for name, spec in self._conn.execute('SELECT name, spec FROM "_indexes" WHERE collection = ?', (self._table,)):
+            spec = bson.decode(spec)
+            spec["key"] = [tuple(field) for field in spec["key"]]
+            self._indexes[name] = spec
+
+    def _locked_read(self, read: Callable[[], T]) -> T:
+        with self._lock:
+            self._refresh()
+            return read()
+
+    def _locked_write(self, write: Callable[[], T]) -> T:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                result = write()
+                self._conn.execute(
+                    'INSERT INTO "_versions" (collection, version) VALUES (?, 1) '
+                    'ON CONFLICT(collection) DO UPDATE SET version = version + 1',
+                    (self._table,)
+                )
+                version = self._conn.execute(
+                    'SELECT version FROM "_versions" WHERE collection = ?', (self._table,)
+                ).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # The in-memory copy may hold the rolled back changes
+                self._data_version = self._version = None
+                raise
+            self._version = version
+            return result
+
+    async def _read(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._locked_read, lambda: self._find(query or {}))
+
+    async def _read_indexes(self) -> Dict[str, Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self._locked_read,
+            lambda: {"_id_": {"key": [("_id", 1)], "unique": True}, **self._indexes}
+        )
+
+    async def _write(self, write: Callable[[], T]) -> T:
+        return await asyncio.to_thread(self._locked_write, write)
+
+    def _store(self, docs: Sequence[Dict[str, Any]]):
+        for doc in docs:
+            self._docs[self._doc_id(doc["_id"])] = doc
+        self._conn.executemany(
+            f'INSERT OR REPLACE INTO "{self._table}" (id, doc) VALUES (?, ?)',
+            [(self._doc_id(doc["_id"]), bson.encode(doc)) for doc in docs]
+        )
+
+    def _check_unique(self, doc: Dict[str, Any], pending: Sequence[Dict[str, Any]] = ()):
+        for name, spec in self._indexes.items():
+            if not spec.get("unique"):
+                continue
+            fields = [field for field, _ in spec["key"]]
+            values = [_get_path(doc, field) for field in fields]
+            if spec.get("sparse") and all(value is _MISSING for value in values):
+                continue
+            for other in [*self._docs.values(), *pending]:
+                if other.get("_id") == doc.get("_id"):
+                    continue
+                if [_get_path(other, field) for field in fields] == values:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name}")
+
+    def _find(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [doc for doc in self._docs.values() if matches(doc, query or {})]
+
+    async def find_one(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None, **kwargs):
+        docs = _apply_sort(await self._read(query or {}), kwargs.get("sort"))
+        return _project(docs[0], projection) if docs else None
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None, **kwargs) -> LocalCursor:
+        cursor = LocalCursor(self, query or {}, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        if kwargs.get("skip"):
+            cursor.skip(kwargs["skip"])
+        if kwargs.get("limit"):
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    async def distinct(self, key: str, query: Optional[Dict[str, Any]] = None) -> List[Any]:
+        values: Dict[Any, None] = {}
+        for doc in await self._read(query or {}):
+            value = _get_path(doc, key)
+            if value is _MISSING:
+                continue
+            for item in (value if isinstance(value, list) else [value]):
+                values[item] = None
+        return list(values)
+
+    async def count_documents(self, query: Dict[str, Any]) -> int:
+        return len(await self._read(query))
+
+    async def insert_one(self, document: Dict[str, Any]) -> InsertOneResult:
+        document.setdefault("_id", ObjectId())
+        doc = _normalize(document)
+
+        def write():
+            if self._doc_id(doc["_id"]) in self._docs:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+            self._check_unique(doc)
+            self._store([doc])
+            return InsertOneResult(doc["_id"], acknowledged=True)
+
+        return await self._write(write)
+
+    async def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = True) -> InsertManyResult:
+        docs = []
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+            docs.append(_normalize(document))
+
+        def write():
+            for index, doc in enumerate(docs):
+                if self._doc_id(doc["_id"]) in self._docs:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+                self._check_unique(doc, docs[:index])
+            self._store(docs)
+            return InsertManyResult([doc["_id"] for doc in docs], acknowledged=True)
+
+        return await self._write(write)
+
+    @staticmethod
+    def _apply_update(doc: Dict[str, Any], update: Dict[str, Any]):
+        for op, fields in update.items():
+            for path, value in fields.items():
+                parts = path.split(".")
+                target = doc
+                for part in parts[:-1]:
+                    target = target.setdefault(part, {})
+                if op == "$set":
+                    target[parts[-1]] = copy.deepcopy(value)
+                elif op == "$inc":
+                    target[parts[-1]] = target.get(parts[-1], 0) + value
+                elif op == "$unset":
+                    target.pop(parts[-1], None)
+                else:
+                    raise ValueError(f"Unsupported update operator: {op}")
+
+    def _upsert_base(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value for key, value in query.items()
+            if not key.startswith("$") and not isinstance(value, dict)
+        }
+
+    def _update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool):
+        """Update the first match (write transaction held); returns the documents before and after."""
+        docs = self._find(query)
+        if not docs and not upsert:
+            return None, None
+        doc = copy.deepcopy(docs[0]) if docs else self._upsert_base(query)
+        doc.setdefault("_id", ObjectId())
+        self._apply_update(doc, update)
+        doc = _normalize(doc)
+        self._check_unique(doc)
+        self._store([doc])
+        return (docs[0] if docs else None), doc
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult:
+        def write():
+            matched = bool(self._find(query))
+            if not matched and not upsert:
+                return UpdateResult({"n": 0, "nModified": 0}, acknowledged=True)
+            self._update_one(query, update, upsert)
+            return UpdateResult({"n": 1, "nModified": 1 if matched else 0}, acknowledged=True)
+
+        return await self._write(write)
+
+    async def update_many(self, query: Dict[str, Any], update: Dict[str, Any]) -> UpdateResult:
+        def write():
+            docs = [copy.deepcopy(doc) for doc in self._find(query)]
+            for doc in docs:
+                self._apply_update(doc, update)
+            docs = [_normalize(doc) for doc in docs]
+            self._store(docs)
+            return UpdateResult({"n": len(docs), "nModified": len(docs)}, acknowledged=True)
+
+        return await self._write(write)
+
+    async def find_one_and_update(
+        self,
+        query: Dict[str, Any],
+        update: Dict[str, Any],
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        def write():
+            existed = bool(self._find(query))
+            if not existed and not upsert:
+                return None
+            before, after = self._update_one(query, update, upsert)
+            result = after if return_document == ReturnDocument.AFTER else before
+            return copy.deepcopy(result) if result else None
+
+        return await self._write(write)
+
+    async def delete_one(self, query: Dict[str, Any]) -> DeleteResult:
+        return await self._write(lambda: self._delete(self._find(query)[:1]))
+
+    async def delete_many(self, query: Dict[str, Any]) -> DeleteResult:
+        return await self._write(lambda: self._delete(self._find(query)))
+
+    def _delete(self, docs: List[Dict[str, Any]]) -> DeleteResult:
+        doc_ids = [self._doc_id(doc["_id"]) for doc in docs]
+        for doc_id in doc_ids:
+            self._docs.pop(doc_id, None)
+        self._conn.executemany(f'DELETE FROM "{self._table}" WHERE id = ?', [(doc_id,) for doc_id in doc_ids])
+        return DeleteResult({"n": len(doc_ids)}, acknowledged=True)
+
+    async def create_indexes(self, indexes: Sequence[IndexModel]) -> List[str]:
+        specs = []
+        for index in indexes:
+            document = index.document
+            specs.append((document["name"], {
+                "key": [(field, int(direction)) for field, direction in document["key"].items()],
+                "unique": bool(document.get("unique", False)),
+                "sparse": bool(document.get("sparse", False)),
+            }))
+
+        def write():
+            for name, spec in specs:
+                self._indexes[name] = spec
+                if spec["unique"]:
+                    for doc in self._docs.values():
+                        self._check_unique(doc)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO "_indexes" (collection, name, spec) VALUES (?, ?, ?)',
+                    (self._table, name, bson.encode({**spec, "key": [list(field) for field in spec["key"]]}))
+                )
+            return [name for name, _ in specs]
+
+        return await self._write(write)
+
+    async def index_information(self) -> Dict[str, Dict[str, Any]]:
+        indexes = await self._read_indexes()
+        return {name: {"key": spec["key"], "unique": spec.get("unique", False)} for name, spec in indexes.items()}
+
+
+class LocalDocumentStore(MongoDBService):
+    """
+    Embedded document store with the MongoDBService interface.
+
+    Each collection is a SQLite table holding BSON documents.
+    """
+
+    def __init__(self, root_dir: Optional[str] = None):
+        super().__init__()
+        self.root_dir = Path(root_dir or LOCAL_STORAGE_DIR)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._collections: Dict[str, LocalCollection] = {}
+
+    def _open(self, db_path: Path) -> sqlite3.Connection:
+        # Autocommit mode: collections manage their own transactions
+        connection = sqlite3.connect(
+            str(db_path),
+            timeout=SQLITE_BUSY_TIMEOUT_SECONDS,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS "_indexes" (collection TEXT, name TEXT, spec BLOB, PRIMARY KEY (collection, name))'
+        )
+        connection.execute('CREATE TABLE IF NOT EXISTS "_versions" (collection TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+        return connection
+
+    async def initialize(self):
+        """Open (or create) the SQLite database."""
+        if self._initialized:
+            print("Local document store already initialized")
+            return
+
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        db_path = self.root_dir / "documents.sqlite3"
+        self._connection = await asyncio.to_thread(self._open, db_path)
+        self._initialized = True
+        print(f"Local document store initialized: {db_path}")
+
+    def get_collection(self, collection_name: str, database_name: str = "slide_library") -> LocalCollection:
+        """Get a collection, creating its table on first use."""
+        if not self._initialized or self._connection is None:
+            raise RuntimeError("Local document store not initialized. Call await initialize() first.")
+
+        table = f"{database_name}__{collection_name}"
+        if table not in self._collections:
+            with self._lock:
+                self._collections[table] = LocalCollection(self._connection, self._lock, table, collection_name)
+        return self._collections[table]
+
+    async def close(self):
+        """Close the SQLite connection."""
+        if self._connection:
+            with self._lock:
+                self._connection.close()
+            self._connection = None
+            self._collections.clear()
+            self._initialized = False
+            print("Local document store closed")
+
+
+# ---------------------------------------------------------------------------
+# Blob store
+# ---------------------------------------------------------------------------
+
+class LocalBlobStore(S3Service):
+    """
+    Filesystem object store with the S3Service interface.
+
+    Objects are stored as files named by their key under <root>/blobs.
+    """
+
+    def __init__(self, root_dir: Optional[str] = None):
+        super().__init__()
+        self.root_dir = Path(root_dir or LOCAL_STORAGE_DIR) / "blobs"
+
+    async def initialize(self, bucket_name: Optional[str] = None, **kwargs):
+        """Create the blob directory."""
+        if self._initialized:
+            print("Local blob store already initialized")
+            return
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.bucket_name = bucket_name or "local"
+        self._initialized = True
+        print(f"Local blob store initialized: {self.root_dir}")
+
+    def _path(self, key: str) -> Path:
+        path = (self.root_dir / key).resolve()
+        if self.root_dir.resolve() not in path.parents:
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    @staticmethod
+    def _not_found(key: str, operation: str) -> ClientError:
+        return ClientError({"Error": {"Code": "NoSuchKey", "Message": f"Key not found: {key}"}}, operation)
+
+    def _write(self, key: str, source: Path):
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent)
+        os.close(fd)
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+
+    async def upload_file_with_hash(
+        self,
+        file_path: Path,
+        original_name: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        file_hash: Optional[str] = None,
+        check_exists: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Copy a file into the store under its content hash."""
+        if not self._initialized:
+            raise RuntimeError("Local blob store not initialized")
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        file_hash = file_hash or await asyncio.to_thread(calculate_file_hash, file_path)
+        original_name = original_name or file_path.name
+
+        if not (check_exists and self._path(file_hash).exists()):
+            await asyncio.to_thread(self._write, file_hash, file_path)
+
+        return {
+            "hash": file_hash,
+            "original_name": original_name,
+            "s3_key": file_hash,
+            "s3_url": f"file://{self._path(file_hash)}",
+            "uploaded_at": datetime.now(timezone.utc).isoformat(),
+            "size": file_path.stat().st_size,
+            "file_type": Path(original_name).suffix.lower().lstrip("."),
+        }
+
+    async def download_file(self, s3_key: str, local_path: Path) -> Path:
+        """Copy an object to a local path."""
+        source = self._path(s3_key)
+        if not source.exists():
+            raise self._not_found(s3_key, "GetObject")
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(shutil.copyfile, source, local_path)
+        return local_path
+
+    async def open_object_stream(
+        self,
+        s3_key: str,
+        byte_range: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Dict[str, Any]:
+        """Open an object for streaming, honouring a single byte range."""
+        path = self._path(s3_key)
+        if not path.exists():
+            raise self._not_found(s3_key, "GetObject")
+
+        size = path.stat().st_size
+        start, end = 0, size - 1
+        content_range = None
+        if byte_range:
+            spec = byte_range.removeprefix("bytes=")
+            first, _, last = spec.partition("-")
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            elif last:
+                start = max(0, size - int(last))
+            if start >= size or start > end:
+                raise ClientError({"Error": {"Code": "InvalidRange", "Message": "Range not satisfiable"}}, "GetObject")
+            content_range = f"bytes {start}-{end}/{size}"
+
+        async def body() -> AsyncIterator[bytes]:
+            remaining = end - start + 1
+            f = await asyncio.to_thread(open, path, "rb")
+            try:
+                await asyncio.to_thread(f.seek, start)
+                while remaining > 0:
+                    chunk = await asyncio.to_thread(f.read, min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+            finally:
+                f.close()
+
+        return {
+            "body": body(),
+            "content_length": end - start + 1,
+            "content_range": content_range,
+            "etag": f'"{s3_key}"',
+            "content_type": None,
+            "last_modified": datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc),
+        }
+
+    async def generate_presigned_url(self, s3_key: str, expires_in: int = 0, content_type: Optional[str] = None) -> Optional[str]:
+        """Local objects cannot be presigned; callers fall back to streaming."""
+        return None
+
+    async def delete_file(self, s3_key: str) -> bool:
+        """Delete an object."""
+        try:
+            self._path(s3_key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _delete_paths(self, keys: List[str]) -> Dict[str, Any]:
+        deleted = 0
+        failed: List[str] = []
+        for key in keys:
+            try:
+                self._path(key).unlink()
+                deleted += 1
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                print(f"Failed to delete {key}: {e}")
+                failed.append(key)
+        return {"deleted": deleted, "failed": failed}
+
+    async def delete_files(self, s3_keys: Iterable[str], **kwargs) -> Dict[str, Any]:
+        """
+        Delete many objects.
+
+        Returns:
+            Dict with the count of objects removed (missing keys are not
+            counted) and the keys that could not be deleted
+        """
+        return await asyncio.to_thread(self._delete_paths, list(dict.fromkeys(s3_keys)))
+
+    def _put(self, objects: Dict[str, bytes]):
+        for key, data in objects.items():
+            target = self._path(key)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=target.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+
+    async def put_objects(self, objects: Dict[str, bytes], **kwargs) -> int:
+        """Write many in-memory objects."""
+        await asyncio.to_thread(self._put, objects)
+        return len(objects)
+
+    def _get(self, keys: List[str]) -> Dict[str, bytes]:
+        results: Dict[str, bytes] = {}
+        for key in keys:
+            path = self._path(key)
+            if not path.exists():
+                raise self._not_found(key, "GetObject")
+            results[key] = path.read_bytes()
+        return results
+
+    async def get_objects(self, s3_keys: Iterable[str], **kwargs) -> Dict[str, bytes]:
+        """Read many objects into memory."""
+        return await asyncio.to_thread(self._get, list(dict.fromkeys(s3_keys)))
+
+    def _list(self, prefix: str) -> List[Dict[str, Any]]:
+        objects = []
+        for path in sorted(self.root_dir.rglob("*")):
+            if not path.is_file():
+                continue
+            key = path.relative_to(self.root_dir).as_posix()
+            if not key.startswith(prefix):
+                continue
+            stat = path.stat()
+            objects.append({
+                "key": key,
+                "size": stat.st_size,
+                "last_modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            })
+        return objects
+
+    async def list_objects(self, prefix: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """List stored objects."""
+        for obj in await asyncio.to_thread(self._list, prefix):
+            yield obj
+
+    async def missing_objects(self, s3_keys: Iterable[str], **kwargs) -> List[str]:
+        """Find which objects do not exist."""
+        keys = list(dict.fromkeys(s3_keys))
+        return await asyncio.to_thread(lambda: [key for key in keys if not self._path(key).exists()])
+
+    async def file_exists(self, s3_key: str) -> bool:
+        """Check if an object exists."""
+        return await asyncio.to_thread(self._path(s3_key).exists)
@@ -6,8 +6,10 @@ Provides CRUD operations for slide library storage.
 
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -105,6 +107,107 @@ class MongoDBService:
             print(f"Deleted document from {collection_name}")
         return success
 
+    async def ensure_indexes(
+        self,
+        collection_name: str,
+        indexes: Sequence[IndexModel],
+        database_name: str = "slide_library"
+    ) -> List[str]:
+        """
+        Create the declared indexes on a collection.
+
+        Existing indexes with the same name and definition are left untouched,
+        so this is safe to run on every startup.
+
+        Args:
+            collection_name: Name of the collection
+            indexes: Index declarations
+            database_name: Name of the database
+
+        Returns:
+            Names of the indexes that were created or confirmed
+        """
+        collection = self.get_collection(collection_name, database_name)
+        created = []
+        for index in indexes:
+            try:
+                created.extend(await collection.create_indexes([index]))
+            except OperationFailure as e:
+                # e.g. duplicate values blocking a unique index, or a changed definition
+                print(f"Failed to create index {index.document.get('name')} on {collection_name}: {e}")
+        return created
+
+    async def missing_indexes(
+        self,
+        collection_name: str,
+        indexes: Sequence[IndexModel],
+        database_name: str = "slide_library"
+    ) -> List[IndexModel]:
+        """
+        Report declared indexes whose key pattern is absent from a collection.
+
+        Args:
+            collection_name: Name of the collection
+            indexes: Index declarations
+            database_name: Name of the database
+
+        Returns:
+            Index declarations that are not present
+        """
+        collection = self.get_collection(collection_name, database_name)
+        existing = await collection.index_information()
+        existing_keys = [
+            (tuple((field, int(direction)) for field, direction in info["key"]), bool(info.get("unique", False)))
+            for info in existing.values()
+        ]
+
+        missing = []
+        for index in indexes:
+            document = index.document
+            key = tuple((field, int(direction)) for field, direction in document["key"].items())
+            if (key, bool(document.get("unique", False))) not in existing_keys:
+                missing.append(index)
+        return missing
+
+    async def explain_plan_stages(
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        sort: Optional[List[tuple]] = None,
+        database_name: str = "slide_library"
+    ) -> List[str]:
+        """
+        Return the stages of the winning query plan for a find.
+
+        Args:
+            collection_name: Name of the collection
+            query: Query filter
+            sort: Optional sort specification
+            database_name: Name of the database
+
+        Returns:
+            Stage names (e.g. IXSCAN, FETCH, COLLSCAN, SORT)
+        """
+        collection = self.get_collection(collection_name, database_name)
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+
+        stages = []
+
+        def walk(plan: Dict[str, Any]):
+            if "stage" in plan:
+                stages.append(plan["stage"])
+            for child_key in ("inputStage", "queryPlan"):
+                if isinstance(plan.get(child_key), dict):
+                    walk(plan[child_key])
+            for child in plan.get("inputStages", []):
+                walk(child)
+
+        walk(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        return stages
+
     async def close(self):
         """Close MongoDB connection."""
         if self.client:
@@ -34,20 +34,30 @@ class QdrantService:
     Handles vector storage and similarity search.
     """
 
-    def __init__(self):
-        """Initialize Qdrant async client."""
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize Qdrant async client.
+        
+        Args:
+            path: Directory for embedded (in-process) Qdrant storage, used by the
+                local storage profile. Without it, QDRANT_URI must point at a server.
+        """
         qdrant_uri = os.getenv("QDRANT_URI")
         qdrant_api_key = os.getenv("QDRANT_API_KEY")
         
-        if not qdrant_uri:
+        if not path and not qdrant_uri:
             raise ValueError("QDRANT_URI environment variable must be set")
         
         try:
-            self.client = AsyncQdrantClient(
-                url=qdrant_uri,
-                api_key=qdrant_api_key
-            )
-            print(f"Qdrant async client initialized: {qdrant_uri}")
+            if path:
+                self.client = AsyncQdrantClient(path=path)
+                print(f"Qdrant embedded client initialized: {path}")
+            else:
+                self.client = AsyncQdrantClient(
+                    url=qdrant_uri,
+                    api_key=qdrant_api_key
+                )
+                print(f"Qdrant async client initialized: {qdrant_uri}")
         except Exception as e:
             print(f"Qdrant initialization failed: {e}")
             raise
@@ -5,12 +5,15 @@ Provides upload/download operations for slide library.
 """
 
 import os
+import asyncio
 import hashlib
 import logging
+from contextlib import AsyncExitStack
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional
 from datetime import datetime, timezone
 import aioboto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
@@ -18,10 +21,41 @@ load_dotenv(override=True)
 
 logger = logging.getLogger(__name__)
 
+# Chunk size used when streaming object bodies to clients
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Default lifetime of presigned download URLs (seconds)
+PRESIGNED_URL_EXPIRY = int(os.getenv("S3_PRESIGNED_URL_EXPIRY", "300"))
+
+# Multipart upload tuning: files above the threshold are split into parts
+# that are uploaded in parallel
+MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8")) * 1024 * 1024
+MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "8")) * 1024 * 1024
+MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", "8"))
+
+# Batched deletes: S3 accepts at most 1000 keys per DeleteObjects request
+DELETE_BATCH_SIZE = 1000
+DELETE_CONCURRENCY = int(os.getenv("S3_DELETE_CONCURRENCY", "4"))
+
+# Concurrent requests for batched small-object puts/gets (package parts)
+OBJECT_BATCH_CONCURRENCY = int(os.getenv("S3_OBJECT_BATCH_CONCURRENCY", "16"))
+
+# Error codes meaning an object does not exist (HEAD responses carry only the status)
+NOT_FOUND_CODES = ("404", "NoSuchKey", "NotFound")
+
 # Global singleton
 _s3_service_instance = None
 
 
+def calculate_file_hash(file_path: Path) -> str:
+    """Generate SHA256 hash of file content."""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
 def get_s3_service() -> 'S3Service':
     """Get singleton instance of S3Service."""
     global _s3_service_instance
@@ -41,6 +75,11 @@ class S3Service:
         self.session = None
         self.bucket_name: Optional[str] = None
         self._initialized = False
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNKSIZE,
+            max_concurrency=MULTIPART_CONCURRENCY,
+        )
 
     async def initialize(
         self,
@@ -93,25 +132,29 @@ class S3Service:
 
     def _generate_file_hash(self, file_path: Path) -> str:
         """Generate SHA256 hash of file content."""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        return calculate_file_hash(file_path)
 
     async def upload_file_with_hash(
         self,
         file_path: Path,
         original_name: Optional[str] = None,
-        metadata: Optional[Dict[str, str]] = None
+        metadata: Optional[Dict[str, str]] = None,
+        file_hash: Optional[str] = None,
+        check_exists: bool = True
     ) -> Optional[Dict[str, Any]]:
         """
         Upload a file to S3 with hash-based naming.
 
+        Large files are sent as a parallel multipart upload.
+
         Args:
             file_path: Local file path
             original_name: Original filename
             metadata: Optional metadata dict
+            file_hash: Precomputed SHA256 of the file; skips re-hashing when given
+            check_exists: Probe S3 with head_object before uploading. Callers
+                that already know the hash is new (e.g. from MongoDB) can skip
+                the round trip; re-uploading identical bytes is harmless.
 
         Returns:
             Mapping data with hash, s3_key, etc.
@@ -122,7 +165,7 @@ class S3Service:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        file_hash = self._generate_file_hash(file_path)
+        file_hash = file_hash or self._generate_file_hash(file_path)
         original_name = original_name or file_path.name
         
         try:
@@ -133,7 +176,7 @@ class S3Service:
         file_ext = Path(original_name).suffix.lower().lstrip(".")
 
         # Check if file already exists
-        if await self.file_exists(file_hash):
+        if check_exists and await self.file_exists(file_hash):
             print(f"File with hash {file_hash} already exists in S3")
             return {
                 "hash": file_hash,
@@ -156,7 +199,8 @@ class S3Service:
                     str(file_path),
                     self.bucket_name,
                     file_hash,
-                    ExtraArgs=extra_args
+                    ExtraArgs=extra_args,
+                    Config=self.transfer_config
                 )
 
             mapping_data = {
@@ -205,6 +249,98 @@ class S3Service:
             print(f"Download failed: {e}")
             raise
 
+    async def open_object_stream(
+        self,
+        s3_key: str,
+        byte_range: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Open an S3 object for streaming without staging it on local disk.
+
+        The S3 client stays open until the returned body iterator is
+        exhausted or closed, so callers must always consume or close it.
+
+        Args:
+            s3_key: S3 object key
+            byte_range: Optional HTTP Range header value (e.g. "bytes=0-1023")
+            chunk_size: Size of chunks yielded by the body iterator
+
+        Returns:
+            Dict with body (async iterator of bytes), content_length,
+            content_range, etag, content_type and last_modified
+
+        Raises:
+            ClientError: If the object is missing or the range is not satisfiable
+        """
+        if not self._initialized:
+            raise RuntimeError("S3 not initialized")
+
+        stack = AsyncExitStack()
+        try:
+            client = await stack.enter_async_context(self.session.client('s3'))
+
+            params = {"Bucket": self.bucket_name, "Key": s3_key}
+            if byte_range:
+                params["Range"] = byte_range
+
+            response = await client.get_object(**params)
+        except Exception:
+            await stack.aclose()
+            raise
+
+        stream = response["Body"]
+
+        async def body() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in stream.iter_chunks(chunk_size):
+                    yield chunk
+            finally:
+                stream.close()
+                await stack.aclose()
+
+        return {
+            "body": body(),
+            "content_length": response.get("ContentLength"),
+            "content_range": response.get("ContentRange"),
+            "etag": response.get("ETag"),
+            "content_type": response.get("ContentType"),
+            "last_modified": response.get("LastModified"),
+        }
+
+    async def generate_presigned_url(
+        self,
+        s3_key: str,
+        expires_in: int = PRESIGNED_URL_EXPIRY,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Generate a short-lived presigned GET URL for an object.
+
+        Signing is a local operation; no request is sent to S3.
+
+        Args:
+            s3_key: S3 object key
+            expires_in: URL lifetime in seconds
+            content_type: Optional Content-Type override for the response
+
+        Returns:
+            Presigned URL string
+        """
+        if not self._initialized:
+            raise RuntimeError("S3 not initialized")
+
+        params = {"Bucket": self.bucket_name, "Key": s3_key}
+        if content_type:
+            params["ResponseContentType"] = content_type
+
+        async with self.session.client('s3') as client:
+            return await client.generate_presigned_url(
+                "get_object",
+                Params=params,
+                ExpiresIn=expires_in
+            )
+
     async def delete_file(self, s3_key: str) -> bool:
         """
         Delete a file from S3.
@@ -230,6 +366,195 @@ class S3Service:
             print(f"Delete failed: {e}")
             return False
 
+    async def delete_files(
+        self,
+        s3_keys: Iterable[str],
+        batch_size: int = DELETE_BATCH_SIZE,
+        concurrency: int = DELETE_CONCURRENCY
+    ) -> Dict[str, Any]:
+        """
+        Delete many objects with batched DeleteObjects requests.
+
+        Batches of up to 1000 keys are sent concurrently over one client.
+
+        Args:
+            s3_keys: S3 object keys
+            batch_size: Keys per request (max 1000)
+            concurrency: Maximum concurrent requests
+
+        Returns:
+            Dict with deleted count and failed keys
+        """
+        if not self._initialized:
+            raise RuntimeError("S3 not initialized")
+
+        keys = list(dict.fromkeys(s3_keys))
+        if not keys:
+            return {"deleted": 0, "failed": []}
+
+        batch_size = max(1, min(batch_size, DELETE_BATCH_SIZE))
+        batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+        semaphore = asyncio.Semaphore(concurrency)
+        failed: List[str] = []
+
+        async with self.session.client('s3') as client:
+            async def delete_batch(batch: List[str]):
+                async with semaphore:
+                    try:
+                        response = await client.delete_objects(
+                            Bucket=self.bucket_name,
+                            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                        )
+                        failed.extend(error["Key"] for error in response.get("Errors", []))
+                    except ClientError as e:
+                        print(f"Batch delete failed: {e}")
+                        failed.extend(batch)
+
+            await asyncio.gather(*(delete_batch(batch) for batch in batches))
+
+        deleted = len(keys) - len(failed)
+        print(f"Deleted {deleted} files in {len(batches)} batches ({len(failed)} failed)")
+        return {"deleted": deleted, "failed": failed}
+
+    async def put_objects(
+        self,
+        objects: Dict[str, bytes],
+        concurrency: int = OBJECT_BATCH_CONCURRENCY
+    ) -> int:
+        """
+        Upload many small in-memory objects over one client.
+
+        Args:
+            objects: Mapping of S3 key to object bytes
+            concurrency: Maximum concurrent requests
+
+        Returns:
+            Number of objects uploaded
+        """
+        if not self._initialized:
+            raise RuntimeError("S3 not initialized")
+
+        if not objects:
+            return 0
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with self.session.client('s3') as client:
+            async def put(key: str, data: bytes):
+                async with semaphore:
+                    await client.put_object(Bucket=self.bucket_name, Key=key, Body=data)
+
+            await asyncio.gather(*(put(key, data) for key, data in objects.items()))
+
+        print(f"Uploaded {len(objects)} objects")
+        return len(objects)
+
+    async def get_objects(
+        self,
+        s3_keys: Iterable[str],
+        concurrency: int = OBJECT_BATCH_CONCURRENCY
+    ) -> Dict[str, bytes]:
+        """
+        Download many small objects into memory over one client.
+
+        Args:
+            s3_keys: S3 object keys
+            concurrency: Maximum concurrent requests
+
+        Returns:
+            Mapping of S3 key to object bytes
+
+        Raises:
+            ClientError: If any object is missing
+        """
+        if not self._initialized:
+            raise RuntimeError("S3 not initialized")
+
+        keys = list(dict.fromkeys(s3_keys))
+        if not keys:
+            return {}
+
+        semaphore = asyncio.Semaphore(concurrency)
+        results: Dict[str, bytes] = {}
+
+        async with self.session.client('s3') as client:
+            async def get(key: str):
+                async with semaphore:
+                    response = await client.get_object(Bucket=self.bucket_name, Key=key)
+                    async with response["Body"] as body:
+                        results[key] = await body.read()
+
+            await asyncio.gather(*(get(key) for key in keys))
+
+        return results
+
+    async def list_objects(self, prefix: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """
+        List all objects in the bucket, following pagination.
+
+        Args:
+            prefix: Optional key prefix filter
+
+        Yields:
+            Dicts with key, size and last_modified
+        """
+        if not self._initialized:
+            raise RuntimeError("S3 not initialized")
+
+        async with self.session.client('s3') as client:
+            paginator = client.get_paginator('list_objects_v2')
+            async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get("Contents", []):
+                    yield {
+                        "key": obj["Key"],
+                        "size": obj.get("Size", 0),
+                        "last_modified": obj.get("LastModified"),
+                    }
+
+    async def missing_objects(
+        self,
+        s3_keys: Iterable[str],
+        concurrency: int = OBJECT_BATCH_CONCURRENCY
+    ) -> List[str]:
+        """
+        Find which objects do not exist, with HEAD requests over one client.
+
+        Args:
+            s3_keys: S3 object keys
+            concurrency: Maximum concurrent requests
+
+        Returns:
+            Missing keys, in input order
+
+        Raises:
+            ClientError: If any HEAD fails for a reason other than not found,
+                since existence is then unknown
+        """
+        if not self._initialized:
+            raise RuntimeError("S3 not initialized")
+
+        keys = list(dict.fromkeys(s3_keys))
+        if not keys:
+            return []
+
+        semaphore = asyncio.Semaphore(concurrency)
+        missing = set()
+
+        async with self.session.client('s3') as client:
+            async def head(key: str):
+                async with semaphore:
+                    try:
+                        await client.head_object(Bucket=self.bucket_name, Key=key)
+                    except ClientError as e:
+                        # Only a definite not-found counts; 403, 5xx and throttling are unknown
+                        if e.response.get("Error", {}).get("Code") not in NOT_FOUND_CODES:
+                            raise
+                        missing.add(key)
+
+            await asyncio.gather(*(head(key) for key in keys))
+
+        return [key for key in keys if key in missing]
+
     async def file_exists(self, s3_key: str) -> bool:
         """Check if file exists in S3."""
         if not self._initialized:
@@ -0,0 +1,55 @@
+"""
+S3 Garbage Collection Script
+
+Removes slide library objects that no MongoDB document references.
+
+Live keys are every slide's storage_ref.s3_key and preview, plus keys named
+by write intents still in flight. The bucket is listed with pagination and
+unreferenced content-hash objects older than the grace period are removed
+with concurrent DeleteObjects batches of up to 1000 keys.
+
+Usage:
+    python storage_gc.py --dry-run              # report reclaimable bytes
+    python storage_gc.py                        # delete
+    python storage_gc.py --min-age-seconds 600  # override the grace period
+    python storage_gc.py --tenant acme          # one tenant's objects
+"""
+
+import argparse
+import asyncio
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv(override=True)
+
+from core.storage import SlideStorageAdapter
+from core.reconciliation import SlideReconciler, ORPHAN_GRACE_SECONDS
+
+
+async def main(dry_run: bool, min_age_seconds: int, tenant_id: str | None = None):
+    """Run one garbage collection pass."""
+    storage = SlideStorageAdapter(tenant_id=tenant_id)
+    await storage.mongo.initialize()
+    await storage.s3.initialize()
+
+    try:
+        reconciler = SlideReconciler(storage, orphan_grace_seconds=min_age_seconds)
+        report = await reconciler.collect_garbage(dry_run=dry_run)
+
+        print("\n" + "=" * 50)
+        print(f"{'Would delete' if dry_run else 'Deleted'}: {report['orphaned_objects']} objects")
+        print(f"{'Reclaimable' if dry_run else 'Reclaimed'}: {report['reclaimed_bytes'] / (1024 * 1024):.2f} MiB")
+        if report["failed_deletes"]:
+            print(f"Failed deletes: {report['failed_deletes']}")
+        print("=" * 50)
+    finally:
+        await storage.mongo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete unreferenced slide library objects from S3")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting")
+    parser.add_argument("--min-age-seconds", type=int, default=ORPHAN_GRACE_SECONDS, help="Skip objects modified more recently than this")
+    parser.add_argument("--tenant", default=None, help="Operate on this tenant's library instead of the shared one")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.min_age_seconds, args.tenant))
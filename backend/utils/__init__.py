@@ -8,6 +8,9 @@ from .schemas import (
     SlideLibraryMetadata,
     SlideMetadata,
     StorageReference,
+    PackagePart,
+    SlideReasoning,
+    SlideStorageItem,
     PresentationPlan,
     SlideOutlineItem,
     SlideRetrievalResult,
@@ -34,6 +37,7 @@ from .utils import (
     extract_table_styling,
     normalize_presentation,
     export_slide_structure,
+    element_fingerprint,
     update_text_component,
     update_single_cell_table,
     update_table_component,
@@ -46,6 +50,8 @@ from .utils import (
     process_tag
 )
 
+from .json_stream import JSONStreamParser
+
 from .load_and_merge import (
     PPTXLoader,
     PPTXSlideManager,
@@ -57,6 +63,9 @@ __all__ = [
     "SlideLibraryMetadata",
     "SlideMetadata",
     "StorageReference",
+    "PackagePart",
+    "SlideReasoning",
+    "SlideStorageItem",
     "PresentationPlan",
     "SlideOutlineItem",
     "SlideRetrievalResult",
@@ -81,6 +90,7 @@ __all__ = [
     "extract_table_styling",
     "normalize_presentation",
     "export_slide_structure",
+    "element_fingerprint",
     "update_text_component",
     "update_single_cell_table",
     "update_table_component",
@@ -91,6 +101,7 @@ __all__ = [
     "save_presentation",
     "clear_all_alt_text",
     "process_tag",
+    "JSONStreamParser",
     # Load and merge
     "PPTXLoader",
     "PPTXSlideManager",
@@ -0,0 +1,122 @@
+"""
+Incremental JSON Parsing
+
+Parses a JSON object as it streams in and reports each element of selected
+top-level arrays as soon as that element is complete, e.g. every item of
+"content" and "charts" in a content generation response.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class JSONStreamParser:
+    """
+    Incremental scanner for one streamed JSON object.
+
+    Text before the first "{" (markdown fences, stray thinking text) is
+    ignored. Only string, nesting and key state is tracked; a completed array
+    element is decoded with json.loads on its own slice of the buffer.
+    """
+
+    def __init__(self, array_keys: Iterable[str]):
+        """
+        Initialize parser.
+
+        Args:
+            array_keys: Top-level keys whose array elements are reported
+        """
+        self.array_keys = set(array_keys)
+        self.buffer = ""
+        self.complete = False
+
+        self._pos = 0
+        self._started = False
+        self._stack: List[Dict[str, Any]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Add streamed text.
+
+        Args:
+            chunk: Next piece of the response
+
+        Returns:
+            (array key, element) for every element completed by this chunk
+        """
+        self.buffer += chunk
+        completed: List[Tuple[str, Any]] = []
+
+        buffer = self.buffer
+        i = self._pos
+        while i < len(buffer) and not self.complete:
+            c = buffer[i]
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._stack.append({"type": "{", "start": i, "key": None, "item_of": None})
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    try:
+                        self._last_string = json.loads(buffer[self._string_start:i + 1])
+                    except ValueError:
+                        self._last_string = None
+                i += 1
+                continue
+
+            top = self._stack[-1]
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":" and top["type"] == "{":
+                top["key"] = self._last_string
+            elif c == "," and top["type"] == "{":
+                top["key"] = None
+            elif c in "{[":
+                item_of = None
+                if (
+                    c == "{"
+                    and len(self._stack) == 2
+                    and top["type"] == "["
+                    and top["array_key"] in self.array_keys
+                ):
+                    item_of = top["array_key"]
+                array_key = top["key"] if top["type"] == "{" and len(self._stack) == 1 else None
+                self._stack.append({"type": c, "start": i, "key": None, "item_of": item_of, "array_key": array_key})
+            elif c in "}]":
+                frame = self._stack.pop()
+                if frame["item_of"]:
+                    try:
+                        completed.append((frame["item_of"], json.loads(buffer[frame["start"]:i + 1])))
+                    except ValueError:
+                        pass
+                if not self._stack:
+                    self.complete = True
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def result(self) -> Any:
+        """
+        Decode the whole response.
+
+        Raises:
+            ValueError: If the streamed text is not valid JSON
+        """
+        text = re.sub(r'^.*?</think>\s*|```json\s*|\s*```', '', self.buffer, flags=re.DOTALL).strip()
+        return json.loads(text)
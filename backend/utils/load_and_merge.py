@@ -8,6 +8,7 @@ Main pieces:
   - copy_slide_with_template(source_prs, source_idx, template_prs, template_idx)
   - copy_presentation_dimensions(source_prs, target_prs)
   - save_presentation(prs, output_path)  # saves and strips eval / empty Google bullet shapes
+  - save_presentation(prs, output_path, minimize=True)  # also prunes unused layouts/masters/media and downsamples images
 
 Typical usage:
     loader = PPTXLoader("input.pptx")
@@ -18,15 +19,32 @@ Typical usage:
 """
 
 import os
+import io
 from typing import List, Optional, Dict, Any
 from spire.presentation import Presentation, FileFormat, SlideOrienation
 from spire.presentation.common import SizeF
 from pptx import Presentation as PPTXPresentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Package minimizer: images whose longest side exceeds this many pixels are downsampled
+MAX_IMAGE_PX = int(os.getenv("SLIDE_MAX_IMAGE_PX", "2560"))
+JPEG_QUALITY = int(os.getenv("SLIDE_JPEG_QUALITY", "85"))
+
+# Raster formats the minimizer re-encodes (vector formats are left untouched)
+DOWNSAMPLE_CONTENT_TYPES = {
+    "image/png": "PNG",
+    "image/jpeg": "JPEG",
+    "image/jpg": "JPEG",
+}
+
+# Relationship types that only point at embedded binary media
+MEDIA_RELATIONSHIP_TYPES = {RT.IMAGE, RT.MEDIA, RT.VIDEO, RT.AUDIO}
+
 
 class PPTXLoader:
     """
@@ -220,19 +238,56 @@ class PPTXSlideManager:
             logger.warning(f"Could not copy dimensions: {e}")
     
     @staticmethod
-    def save_presentation(presentation: Presentation, output_path: str):
+    def save_presentation(
+        presentation: Presentation,
+        output_path: str,
+        minimize: bool = False,
+        max_image_px: Optional[int] = MAX_IMAGE_PX
+    ) -> Optional[Dict[str, int]]:
+        """
+        Save a presentation and run post-processing.
+        
+        Args:
+            presentation: Spire presentation
+            output_path: Destination .pptx path
+            minimize: Also prune unused layouts, masters, notes master and
+                media, and downsample oversized images
+            max_image_px: Longest image side kept by the minimizer (None keeps
+                full resolution)
+            
+        Returns:
+            Minimization report (bytes before/after/saved and counts) when
+            minimize is set, else None
+        """
         try:
             os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else '.', exist_ok=True)
 
             presentation.SaveToFile(output_path, FileFormat.Pptx2016)
 
-            PPTXSlideManager.post_processing(output_path)
+            if not minimize:
+                PPTXSlideManager.post_processing(output_path)
+                return None
+
+            bytes_before = os.path.getsize(output_path)
+            report = PPTXSlideManager.post_processing(output_path, minimize=True, max_image_px=max_image_px)
+            bytes_after = os.path.getsize(output_path)
+            report.update({
+                "bytes_before": bytes_before,
+                "bytes_after": bytes_after,
+                "bytes_saved": bytes_before - bytes_after,
+            })
+            return report
         except Exception as e:
             logger.error(f"Failed to save presentation: {e}")
             raise
     
     @staticmethod
-    def post_processing(pptx_path: str):
+    def post_processing(
+        pptx_path: str,
+        minimize: bool = False,
+        max_image_px: Optional[int] = MAX_IMAGE_PX
+    ) -> Dict[str, int]:
+        report: Dict[str, int] = {}
         try:
             prs = PPTXPresentation(pptx_path)
 
@@ -247,11 +302,122 @@ class PPTXSlideManager:
                     sp = shape._sp
                     sp.getparent().remove(sp)
 
+            if minimize:
+                report = PPTXSlideManager.minimize_package(prs, max_image_px=max_image_px)
+
             prs.save(pptx_path)
+            return report
         except Exception as e:
             logger.error(f"Failed during post-processing: {e}")
             raise
     
+    @staticmethod
+    def minimize_package(prs: Any, max_image_px: Optional[int] = MAX_IMAGE_PX) -> Dict[str, int]:
+        """
+        Shrink a python-pptx presentation in place before it is saved.
+        
+        python-pptx only writes parts reachable through relationships, so
+        dropping a relationship is enough to remove a part (and everything
+        only it referenced) from the saved package.
+        
+        Args:
+            prs: python-pptx Presentation
+            max_image_px: Longest image side to keep (None disables downsampling)
+            
+        Returns:
+            Counts of removed layouts, masters, notes masters, media
+            relationships and downsampled images
+        """
+        report = {
+            "layouts_removed": 0,
+            "masters_removed": 0,
+            "notes_masters_removed": 0,
+            "media_removed": 0,
+            "images_downsampled": 0,
+        }
+        
+        try:
+            used_layouts = {slide.slide_layout.part for slide in prs.slides}
+            master_ids = prs.slide_masters._sldMasterIdLst
+            
+            for master in list(prs.slide_masters):
+                layouts = list(master.slide_layouts)
+                if not any(layout.part in used_layouts for layout in layouts):
+                    # No slide uses this master: drop it with all its layouts
+                    for master_id in list(master_ids.sldMasterId_lst):
+                        if prs.part.rels[master_id.rId].target_part is master.part:
+                            master_ids.remove(master_id)
+                            prs.part.drop_rel(master_id.rId)
+                    report["masters_removed"] += 1
+                    continue
+                
+                for layout in layouts:
+                    if layout.part not in used_layouts:
+                        master.slide_layouts.remove(layout)
+                        report["layouts_removed"] += 1
+        except Exception as e:
+            logger.warning(f"Could not prune layouts: {e}")
+        
+        try:
+            if not any(slide.has_notes_slide for slide in prs.slides):
+                notes_master_list = prs.part._element.find(qn("p:notesMasterIdLst"))
+                if notes_master_list is not None:
+                    r_ids = [el.get(qn("r:id")) for el in notes_master_list]
+                    prs.part._element.remove(notes_master_list)
+                    for r_id in r_ids:
+                        if r_id in prs.part.rels:
+                            prs.part.drop_rel(r_id)
+                            report["notes_masters_removed"] += 1
+        except Exception as e:
+            logger.warning(f"Could not remove notes master: {e}")
+        
+        parts = list(prs.part.package.iter_parts())
+        
+        # Media relationships no element references any more (e.g. after shape removal)
+        for part in parts:
+            if not hasattr(part, "_element"):
+                continue
+            try:
+                xml = part.blob.decode("utf-8", errors="ignore")
+                for r_id, rel in list(part.rels.items()):
+                    if rel.is_external or rel.reltype not in MEDIA_RELATIONSHIP_TYPES:
+                        continue
+                    if f'"{r_id}"' not in xml:
+                        part.drop_rel(r_id)
+                        report["media_removed"] += 1
+            except Exception as e:
+                logger.warning(f"Could not prune media of {part.partname}: {e}")
+        
+        if max_image_px:
+            from PIL import Image
+            
+            for part in parts:
+                image_format = DOWNSAMPLE_CONTENT_TYPES.get(part.content_type)
+                if not image_format:
+                    continue
+                try:
+                    with Image.open(io.BytesIO(part.blob)) as image:
+                        if max(image.size) <= max_image_px:
+                            continue
+                        image.thumbnail((max_image_px, max_image_px), Image.LANCZOS)
+                        
+                        buffer = io.BytesIO()
+                        if image_format == "JPEG":
+                            if image.mode not in ("RGB", "L", "CMYK"):
+                                image = image.convert("RGB")
+                            image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+                        else:
+                            image.save(buffer, format="PNG", optimize=True)
+                    
+                    # Shapes keep their EMU extents, so only pixel density changes
+                    if buffer.tell() < len(part.blob):
+                        part._blob = buffer.getvalue()
+                        report["images_downsampled"] += 1
+                except Exception as e:
+                    logger.warning(f"Could not downsample {part.partname}: {e}")
+        
+        return report
+    
     @staticmethod
     def _contains_evaluation_warning(shape) -> bool:
         if hasattr(shape, 'has_text_frame') and shape.has_text_frame:
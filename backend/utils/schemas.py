@@ -5,8 +5,9 @@ Pydantic models for slide library data structures.
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from pathlib import Path
 import uuid
 
 
@@ -16,11 +17,32 @@ class SlideMetadata(BaseModel):
     height: int
 
 
+class PackagePart(BaseModel):
+    """One content-addressed part of a stored OOXML package."""
+    name: str = Field(description="Part name inside the package, e.g. ppt/slides/slide1.xml")
+    key: str = Field(description="S3 key of the part bytes (parts/<sha256>)")
+    size: int
+    compressed: bool = True
+
+
 class StorageReference(BaseModel):
     """References to stored slide across systems."""
     s3_key: str
     mongodb_id: str
     qdrant_id: str
+    parts: List[PackagePart] = Field(
+        default_factory=list,
+        description="Package manifest when stored as shared parts; s3_key is empty in that case"
+    )
+
+
+class SlideReasoning(BaseModel):
+    """Template reasoning for a library slide, computed once at ingestion."""
+    description: str = Field(default="", description="Reasoned overall description of the slide")
+    elements: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Element fingerprint -> content_description"
+    )
 
 
 class SlideLibraryMetadata(BaseModel):
@@ -36,6 +58,18 @@ class SlideLibraryMetadata(BaseModel):
     slide_index: int = Field(description="0-based index of slide in original presentation")
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     tags: List[str] = Field(default_factory=list)
+    reasoning: Optional[SlideReasoning] = Field(
+        default=None,
+        description="Per-element content reasoning reused by compose instead of a reasoning pass"
+    )
+
+
+class SlideStorageItem(BaseModel):
+    """A prepared slide awaiting storage in a batch."""
+    slide_pptx_path: Path
+    preview_image_path: Optional[Path] = None
+    metadata: SlideLibraryMetadata
+    embedding: List[float]
 
 
 class SlideOutlineItem(BaseModel):
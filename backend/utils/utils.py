@@ -1,6 +1,7 @@
 import os
 import uuid
 import json
+import hashlib
 import zipfile
 import xml.etree.ElementTree as ET
 from pptx import Presentation
@@ -509,6 +510,39 @@ def normalize_presentation(pptx_path: str) -> Tuple[Presentation, PresentationMa
     return presentation, content_mapping
 
 
+def element_fingerprint(content_item: ContentItem) -> str:
+    """
+    Stable identifier for a template element.
+
+    Element UUIDs are regenerated on every normalization, so stored
+    per-element data is keyed by the element's type, geometry and original
+    content instead.
+
+    Args:
+        content_item: Normalized content item
+
+    Returns:
+        Hex digest identifying the element
+    """
+    original = content_item.original_content
+    if hasattr(original, 'model_dump'):
+        original = original.model_dump()
+    payload = json.dumps(
+        [
+            content_item.content_type,
+            content_item.position.x,
+            content_item.position.y,
+            content_item.size.width,
+            content_item.size.height,
+            original,
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
 def export_slide_structure(content_mapping: PresentationMapping) -> List[Dict[str, Any]]:
     """
     Export the content mapping to the specified JSON structure.
@@ -1135,7 +1169,8 @@ def _copy_font_formatting(target_font, source_font):
 def apply_content_to_presentation(
     presentation: Presentation,
     content_mapping: PresentationMapping,
-    output_path: str = None
+    output_path: str = None,
+    save: bool = True
 ) -> str:
     """
     Apply generated content to presentation slides using UUID mapping.
@@ -1144,9 +1179,10 @@ def apply_content_to_presentation(
         presentation: Presentation object to update
         content_mapping: PresentationMapping with generated content
         output_path: Path to save the updated presentation (optional)
+        save: Set False to only update the presentation in memory
 
     Returns:
-        Path to the saved presentation
+        Path to the saved presentation (output_path unchanged when not saved)
     """
     uuid_to_shape = {}
 
@@ -1188,6 +1224,9 @@ def apply_content_to_presentation(
 
     print(f"Applied content to {applied_count} text elements, {table_applied_count} tables, and {chart_applied_count} charts")
 
+    if not save:
+        return output_path
+
     if output_path is None:
         output_path = "updated_presentation.pptx"
 
@@ -36,6 +36,17 @@ function formatDate(value?: string) {
   return Number.isNaN(date.getTime()) ? value : date.toLocaleDateString();
 }
 
+// Fields rendered by the grid; the listing endpoint projects everything else away
+const GRID_FIELDS = [
+  "slide_id",
+  "file_hash",
+  "description",
+  "preview",
+  "source_presentation",
+  "slide_index",
+  "updated_at",
+];
+
 function toViewModel(meta: SlideLibraryMetadata): SlideItem {
   return {
     id: meta.slide_id || meta.file_hash,
@@ -68,7 +79,7 @@ export function SlideLibrary() {
         const results = await searchSlides(text);
         setSlides(results.map(toViewModel));
       } else {
-        const { items } = await listSlides({ skip: 0, limit: 50 });
+        const { items } = await listSlides({ limit: 50, fields: GRID_FIELDS });
         setSlides(items.map(toViewModel));
       }
     } catch (err) {
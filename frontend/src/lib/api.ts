@@ -54,13 +54,17 @@ export async function searchSlides(query: string): Promise<SlideLibraryMetadata[
   });
 }
 
-export async function listSlides(params: { skip?: number; limit?: number } = {}): Promise<{
+export async function listSlides(
+  params: { cursor?: string | null; limit?: number; fields?: string[] } = {}
+): Promise<{
   count: number;
   items: SlideLibraryMetadata[];
+  next_cursor: string | null;
 }> {
   const searchParams = new URLSearchParams();
-  if (params.skip) searchParams.set("skip", String(params.skip));
+  if (params.cursor) searchParams.set("cursor", params.cursor);
   if (params.limit) searchParams.set("limit", String(params.limit));
+  if (params.fields?.length) searchParams.set("fields", params.fields.join(","));
 
   return request(`/slides${searchParams.toString() ? `?${searchParams}` : ""}`, {
     method: "GET",
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Backend modules import each other as top-level packages (as when api.py
+# runs from the backend directory). backend/__init__.py expects the
+# installed slide_library layout, so tests live outside the package.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
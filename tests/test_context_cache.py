@@ -0,0 +1,107 @@
+"""
+Context caching through vertexai_model, against a fake Vertex client.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.genai")
+pytest.importorskip("dotenv")
+pytest.importorskip("voyageai")
+
+from models import vertex
+from models.context_cache import CachedContext, ContextCacheManager
+
+SYSTEM = "Shared system instruction"
+PREFIX = "Shared user input and documents. " * 20
+SUFFIX = "Slide 3 data"
+
+
+class FakeModels:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = []
+
+    async def generate_content(self, model, contents, config):
+        self.calls.append(SimpleNamespace(model=model, contents=contents, config=config))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("404 cached content not found")
+        return SimpleNamespace(text='{"ok": true}', usage_metadata=None)
+
+
+class FakeClientManager:
+    def __init__(self, models: FakeModels):
+        self.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+
+    async def get_client(self, *args, **kwargs):
+        return self.client
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    models = FakeModels()
+    monkeypatch.setattr(vertex, "get_vertex_client_manager", lambda: FakeClientManager(models))
+    monkeypatch.setattr(vertex, "backoff_delay", lambda attempt: 0)
+    return models
+
+
+def vertex_context(model: str = "m") -> CachedContext:
+    return CachedContext("cachedContents/123", "vertex", model, SYSTEM, PREFIX, 1000, time.time() + 60)
+
+
+def call(cached_context: CachedContext, model: str = "m") -> str:
+    return asyncio.run(vertex.vertexai_model(
+        system="ignored when a cached context is given",
+        user=SUFFIX,
+        model=model,
+        cache=False,
+        cached_context=cached_context,
+        hedge=False,
+    ))
+
+
+def test_local_context_prepends_prefix(fake_models):
+    manager = ContextCacheManager(mode="local", min_tokens=1)
+    context = asyncio.run(manager.create("m", SYSTEM, PREFIX))
+
+    assert context is not None and context.backend == "local"
+    assert call(context) == '{"ok": true}'
+
+    sent = fake_models.calls[0]
+    assert sent.contents == PREFIX + SUFFIX
+    assert sent.config.system_instruction == [SYSTEM]
+    assert sent.config.cached_content is None
+
+
+def test_cache_name_sends_suffix_only(fake_models):
+    call(vertex_context())
+
+    sent = fake_models.calls[0]
+    assert sent.contents == SUFFIX
+    assert sent.config.cached_content == "cachedContents/123"
+    assert sent.config.system_instruction is None
+
+
+def test_context_for_other_model_is_sent_inline(fake_models):
+    call(vertex_context(model="other"), model="m")
+
+    sent = fake_models.calls[0]
+    assert sent.contents == PREFIX + SUFFIX
+    assert sent.config.cached_content is None
+
+
+def test_failure_falls_back_to_inline(fake_models):
+    fake_models.failures = 1
+
+    assert call(vertex_context()) == '{"ok": true}'
+
+    first, retry = fake_models.calls
+    assert first.contents == SUFFIX
+    assert first.config.cached_content == "cachedContents/123"
+    assert retry.contents == PREFIX + SUFFIX
+    assert retry.config.cached_content is None
+    assert retry.config.system_instruction == [SYSTEM]